@@ -0,0 +1,690 @@
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import ExitStack
+
+from bc19live.ckan import (build_ckan_csv_response, get_ckan_url,
+                           parse_ckan_response)
+from bc19live.daterows import DateRowStore
+from bc19live.dirs import DATA_DIR, FIXTURES_DIR
+from bc19live.fixtures import (FixtureMissingError, FixtureStore,
+                               RecordingSession, ReplaySession)
+from bc19live.http import build_response
+from bc19live.main import get_parser
+from bc19live.registry import DATASET_MANIFEST, DatasetRegistry
+from bc19live.scheduler import get_local_sources, get_named_local_sources
+from bc19live.utils import (collect_output_rows, materialize_json_date_rows,
+                            parse_csv, safe_open_for_write,
+                            use_date_row_store)
+
+
+#: The default scale factors for payload rows.
+DEFAULT_SCALES = [1, 10, 100]
+
+
+def get_dataset_urls(info):
+    """Return the URLs for a dataset.
+
+    Args:
+        info (dict):
+            The dataset information.
+
+    Returns:
+        dict:
+        A mapping of URL names to URLs. Datasets with a single URL use a name
+        of ``main``.
+    """
+    if 'url' in info:
+        return {
+            'main': info['url'],
+        }
+    elif 'ckan' in info:
+        # Only the first page of results is recorded.
+        return {
+            'main': get_ckan_url(info['ckan']),
+        }
+    else:
+        return dict(info.get('urls', {}))
+
+
+def record_fixtures(datasets, registry, store):
+    """Record the upstream payloads for datasets.
+
+    Each dataset's URLs are fetched, and its parser is run against them
+    (writing to a temporary directory and date row store), so that any
+    additional requests the parser makes (such as Tableau bootstrap requests)
+    are also recorded.
+
+    Local sources are copied from the current data directory.
+
+    Args:
+        datasets (list of dict):
+            The manifest entries for the datasets to record.
+
+        registry (bc19live.registry.DatasetRegistry):
+            The registry used to load dataset information.
+
+        store (bc19live.fixtures.FixtureStore):
+            The store to record payloads to.
+    """
+    temp_dir = tempfile.mkdtemp(prefix='bc19-record-')
+    date_rows = DateRowStore(os.path.join(temp_dir, 'date-rows.sqlite3'))
+
+    try:
+        with use_date_row_store(date_rows):
+            for entry in datasets:
+                filename = entry['filename']
+
+                try:
+                    info = registry.get_dataset(filename)
+                except Exception as e:
+                    sys.stderr.write('Unable to load dataset %s: %s\n'
+                                     % (filename, e))
+                    continue
+
+                urls = get_dataset_urls(info)
+
+                if urls:
+                    session = RecordingSession(store)
+                    responses = {}
+
+                    try:
+                        for url_name, url in urls.items():
+                            responses[url_name] = session.get(url)
+                    except Exception as e:
+                        sys.stderr.write('Unable to fetch %s for %s: %s\n'
+                                         % (url, filename, e))
+                        continue
+
+                    store.set_dataset_urls(filename, urls)
+
+                    try:
+                        _run_parser(info=info,
+                                    responses=responses,
+                                    local_filenames={},
+                                    out_filename=os.path.join(temp_dir,
+                                                              filename),
+                                    session=session)
+                    except Exception as e:
+                        sys.stderr.write(
+                            'Parser failed while recording %s (additional '
+                            'requests may not have been recorded): %s\n'
+                            % (filename, e))
+                else:
+                    for local_source in get_local_sources(info):
+                        source_filename = os.path.join(
+                            DATA_DIR,
+                            local_source['format'],
+                            local_source['filename'])
+
+                        if os.path.exists(source_filename):
+                            store.add_local_source(local_source,
+                                                   source_filename)
+                        else:
+                            sys.stderr.write('Local source %s for %s does not '
+                                             'exist. Build it first.\n'
+                                             % (source_filename, filename))
+
+                print('Recorded %s' % filename)
+    finally:
+        date_rows.close()
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def benchmark_dataset(info, store, scales=DEFAULT_SCALES):
+    """Benchmark a dataset's parser against recorded payloads.
+
+    The parser is run once for each scale factor, with the rows in its
+    payloads repeated that many times. Payloads that can't be scaled (such as
+    HTML pages or Tableau bootstrap payloads) are only benchmarked at a scale
+    of 1.
+
+    The parser is run twice for each scale: once to measure time, and once
+    with :py:mod:`tracemalloc` enabled to measure peak memory usage. Datasets
+    built a date row at a time use a temporary date row store, and writing
+    out their JSON files is part of each run.
+
+    Args:
+        info (dict):
+            The dataset information.
+
+        store (bc19live.fixtures.FixtureStore):
+            The store containing recorded payloads.
+
+        scales (list of int, optional):
+            The scale factors to benchmark.
+
+    Returns:
+        list of dict:
+        A result for each benchmarked scale factor, containing ``filename``,
+        ``scale``, ``status``, ``seconds``, ``peak_bytes``, ``input_bytes``,
+        and ``rows`` keys.
+
+    Raises:
+        bc19live.fixtures.FixtureMissingError:
+            Payloads were not recorded for this dataset.
+    """
+    filename = info['filename']
+    responses, local_filenames = _load_fixtures(info, store)
+    scaler = _get_scaler(info, responses, local_filenames)
+    results = []
+    temp_dir = tempfile.mkdtemp(prefix='bc19-benchmark-')
+    date_rows = DateRowStore(os.path.join(temp_dir, 'date-rows.sqlite3'))
+
+    try:
+        with use_date_row_store(date_rows):
+            for scale in scales:
+                if scale != 1 and scaler is None:
+                    continue
+
+                scaled_responses, scaled_local_filenames, input_bytes = \
+                    _scale_inputs(responses=responses,
+                                  local_filenames=local_filenames,
+                                  scale=scale,
+                                  scaler=scaler,
+                                  dest_dir=os.path.join(temp_dir, 'inputs'))
+                out_filename = os.path.join(temp_dir, info['format'], filename)
+                os.makedirs(os.path.dirname(out_filename), exist_ok=True)
+
+                result = {
+                    'filename': filename,
+                    'scale': scale,
+                    'status': 'ok',
+                    'seconds': None,
+                    'peak_bytes': None,
+                    'input_bytes': input_bytes,
+                    'rows': None,
+                }
+
+                output_rows = {}
+
+                def _run():
+                    if os.path.exists(out_filename):
+                        os.unlink(out_filename)
+
+                    with collect_output_rows(output_rows):
+                        parser_result = _run_parser(
+                            info=info,
+                            responses=scaled_responses,
+                            local_filenames=scaled_local_filenames,
+                            out_filename=out_filename,
+                            session=ReplaySession(store))
+
+                        if parser_result is not False:
+                            # Datasets built a date row at a time only
+                            # write their JSON files here.
+                            materialize_json_date_rows(out_filename)
+
+                    return parser_result
+
+                try:
+                    start_time = time.perf_counter()
+                    parser_result = _run()
+                    result['seconds'] = time.perf_counter() - start_time
+
+                    tracemalloc.start()
+
+                    try:
+                        _run()
+                        result['peak_bytes'] = \
+                            tracemalloc.get_traced_memory()[1]
+                    finally:
+                        tracemalloc.stop()
+                except Exception as e:
+                    result['status'] = 'error: %s' % e
+                else:
+                    if parser_result is False:
+                        result['status'] = 'skipped'
+                    else:
+                        result['rows'] = output_rows.get(out_filename)
+
+                results.append(result)
+    finally:
+        date_rows.close()
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+    return results
+
+
+def print_results(results, fp=sys.stdout):
+    """Print benchmark results as a table.
+
+    Args:
+        results (list of dict):
+            The benchmark results.
+
+        fp (file, optional):
+            The file to print to.
+    """
+    headers = ('Dataset', 'Scale', 'Status', 'Input bytes', 'Rows', 'Time s',
+               'Peak MiB')
+    rows = [
+        (
+            _result['filename'],
+            '%dx' % _result['scale'],
+            _result['status'],
+            '%d' % _result['input_bytes'],
+            '' if _result['rows'] is None else '%d' % _result['rows'],
+            ('' if _result['seconds'] is None
+             else '%.3f' % _result['seconds']),
+            ('' if _result['peak_bytes'] is None
+             else '%.1f' % (_result['peak_bytes'] / (1024 * 1024))),
+        )
+        for _result in results
+    ]
+
+    widths = [
+        max(len(_value) for _value in _col)
+        for _col in zip(headers, *rows)
+    ]
+
+    def _format_row(row):
+        return '  '.join(
+            (_value.ljust(_width) if _i in (0, 2) else _value.rjust(_width))
+            for _i, (_value, _width) in enumerate(zip(row, widths))
+        ).rstrip()
+
+    fp.write('%s\n' % _format_row(headers))
+    fp.write('%s\n' % '  '.join('-' * _width for _width in widths))
+
+    for row in rows:
+        fp.write('%s\n' % _format_row(row))
+
+
+def _load_fixtures(info, store):
+    """Load the recorded payloads for a dataset.
+
+    Args:
+        info (dict):
+            The dataset information.
+
+        store (bc19live.fixtures.FixtureStore):
+            The store containing recorded payloads.
+
+    Returns:
+        tuple:
+        A tuple of:
+
+        1. A mapping of URL names to responses.
+        2. A mapping of local source names to a tuple of the local source
+           information and the recorded file.
+
+    Raises:
+        bc19live.fixtures.FixtureMissingError:
+            Payloads were not recorded for this dataset.
+    """
+    filename = info['filename']
+    responses = {}
+    local_filenames = {}
+
+    if get_dataset_urls(info):
+        urls = store.get_dataset_urls(filename)
+
+        if urls is None:
+            raise FixtureMissingError('No fixtures recorded for %s'
+                                      % filename)
+
+        for url_name, url in urls.items():
+            response = store.get_response('GET', url)
+
+            if response is None:
+                raise FixtureMissingError('No fixture recorded for %s' % url)
+
+            responses[url_name] = response
+    else:
+        local_sources = get_named_local_sources(info)
+
+        for source_name, local_source in local_sources.items():
+            source_filename = store.get_local_source_filename(local_source)
+
+            if source_filename is None:
+                raise FixtureMissingError('No fixture recorded for %s'
+                                          % local_source['filename'])
+
+            local_filenames[source_name] = (local_source, source_filename)
+
+    return responses, local_filenames
+
+
+def _get_scaler(info, responses, local_filenames):
+    """Return a function used to scale the payloads for a dataset.
+
+    CSV payloads are scaled by repeating the data rows after the header.
+    JSON payloads (including CKAN datastore results) are scaled by repeating
+    the items in the largest list in the payload.
+
+    Args:
+        info (dict):
+            The dataset information.
+
+        responses (dict):
+            A mapping of URL names to responses.
+
+        local_filenames (dict):
+            A mapping of local source names to local source information and
+            recorded files.
+
+    Returns:
+        callable:
+        A function taking the payload (as bytes) and a scale factor and
+        returning the scaled payload, or ``None`` if the payloads can't be
+        scaled.
+    """
+    if responses:
+        if get_parser(info) is parse_csv and 'ckan' not in info:
+            header_lines = info.get('csv', {}).get('skip_rows', 0) + 1
+
+            return lambda data, scale: _scale_csv(data, scale, header_lines)
+
+        payloads = [
+            _response.content
+            for _response in responses.values()
+        ]
+    else:
+        formats = {
+            _local_source['format']
+            for _local_source, _filename in local_filenames.values()
+        }
+
+        if formats == {'csv'}:
+            return lambda data, scale: _scale_csv(data, scale, 1)
+
+        payloads = []
+
+        for local_source, source_filename in local_filenames.values():
+            with open(source_filename, 'rb') as fp:
+                payloads.append(fp.read())
+
+    try:
+        for payload in payloads:
+            json.loads(payload)
+    except ValueError:
+        return None
+
+    return _scale_json
+
+
+def _scale_inputs(responses, local_filenames, scale, scaler, dest_dir):
+    """Return scaled payloads for a benchmark run.
+
+    Args:
+        responses (dict):
+            A mapping of URL names to responses.
+
+        local_filenames (dict):
+            A mapping of local source names to local source information and
+            recorded files.
+
+        scale (int):
+            The scale factor.
+
+        scaler (callable):
+            The function used to scale payloads.
+
+        dest_dir (str):
+            The directory to write scaled local sources to.
+
+    Returns:
+        tuple:
+        A tuple of:
+
+        1. A mapping of URL names to scaled responses.
+        2. A mapping of local source names to scaled local source files.
+        3. The total size of the scaled payloads.
+    """
+    scaled_responses = {}
+    scaled_local_filenames = {}
+    input_bytes = 0
+
+    for url_name, response in responses.items():
+        content = response.content
+
+        if scale != 1:
+            content = scaler(content, scale)
+
+        scaled_responses[url_name] = build_response(
+            url=response.url,
+            content=content,
+            status_code=response.status_code,
+            headers=response.headers)
+        input_bytes += len(content)
+
+    for source_name, (local_source, source_filename) in \
+            local_filenames.items():
+        if scale == 1:
+            scaled_filename = source_filename
+        else:
+            with open(source_filename, 'rb') as fp:
+                content = scaler(fp.read(), scale)
+
+            scaled_filename = os.path.join(dest_dir, local_source['format'],
+                                           local_source['filename'])
+            os.makedirs(os.path.dirname(scaled_filename), exist_ok=True)
+
+            with open(scaled_filename, 'wb') as fp:
+                fp.write(content)
+
+        scaled_local_filenames[source_name] = scaled_filename
+        input_bytes += os.path.getsize(scaled_filename)
+
+    return scaled_responses, scaled_local_filenames, input_bytes
+
+
+def _scale_csv(data, scale, header_lines):
+    """Return a CSV payload with its data rows repeated.
+
+    Args:
+        data (bytes):
+            The CSV payload.
+
+        scale (int):
+            The number of times to repeat the data rows.
+
+        header_lines (int):
+            The number of lines at the start of the payload that aren't
+            repeated.
+
+    Returns:
+        bytes:
+        The scaled payload.
+    """
+    lines = data.splitlines(True)
+
+    if lines and not lines[-1].endswith(b'\n'):
+        lines[-1] += b'\n'
+
+    return (b''.join(lines[:header_lines]) +
+            b''.join(lines[header_lines:]) * scale)
+
+
+def _scale_json(data, scale):
+    """Return a JSON payload with its largest list repeated.
+
+    Args:
+        data (bytes):
+            The JSON payload.
+
+        scale (int):
+            The number of times to repeat the items in the list.
+
+    Returns:
+        bytes:
+        The scaled payload.
+    """
+    payload = json.loads(data)
+    largest = None
+    to_check = [payload]
+
+    while to_check:
+        value = to_check.pop()
+
+        if isinstance(value, dict):
+            to_check += value.values()
+        elif isinstance(value, list):
+            if largest is None or len(value) > len(largest):
+                largest = value
+
+    if largest is not None:
+        largest[:] = largest * scale
+
+    return json.dumps(payload).encode('utf-8')
+
+
+def _run_parser(info, responses, local_filenames, out_filename, session):
+    """Run a dataset's parser.
+
+    Args:
+        info (dict):
+            The dataset information.
+
+        responses (dict):
+            A mapping of URL names to responses.
+
+        local_filenames (dict):
+            A mapping of local source names to files.
+
+        out_filename (str):
+            The filename for the file to write.
+
+        session (requests.Session):
+            The HTTP session to pass to the parser.
+
+    Returns:
+        object:
+        The result of the parser.
+    """
+    parser = get_parser(info)
+
+    if 'url' in info:
+        return parser(info=info,
+                      response=responses['main'],
+                      session=session,
+                      out_filename=out_filename)
+    elif 'ckan' in info:
+        fields, records = parse_ckan_response(responses['main'])
+
+        return parser(info=info,
+                      response=build_ckan_csv_response(info['ckan'], fields,
+                                                       records),
+                      session=session,
+                      out_filename=out_filename)
+    elif 'urls' in info:
+        return parser(info=info,
+                      responses=responses,
+                      session=session,
+                      out_filename=out_filename)
+    else:
+        with ExitStack() as stack:
+            fps = {
+                _source_name: stack.enter_context(open(_source_filename, 'r'))
+                for _source_name, _source_filename in local_filenames.items()
+            }
+
+            if 'local_source' in info:
+                return parser(info=info,
+                              in_fp=fps['main'],
+                              out_filename=out_filename)
+            else:
+                return parser(info=info,
+                              in_fps=fps,
+                              out_filename=out_filename)
+
+
+def main():
+    """Main function for benchmarking dataset parsers.
+
+    By default, this replays recorded payloads through each dataset's parser,
+    without any network access, reporting the time and peak memory used at
+    each scale factor.
+
+    Passing ``--record`` will instead fetch and record the payloads for each
+    dataset. Datasets built from local sources record the current copies of
+    those sources, so the main build should be run first.
+
+    Names of dataset modules or filenames can be passed to limit which
+    datasets are benchmarked or recorded.
+    """
+    argparser = argparse.ArgumentParser(
+        description='Benchmark dataset parsers against recorded payloads.')
+    argparser.add_argument(
+        '--record',
+        action='store_true',
+        help='Fetch and record payloads for the datasets.')
+    argparser.add_argument(
+        '--fixtures-dir',
+        default=FIXTURES_DIR,
+        help='The directory containing recorded payloads.')
+    argparser.add_argument(
+        '-s',
+        '--scale',
+        type=int,
+        action='append',
+        dest='scales',
+        help='A scale factor for payload rows. This can be passed multiple '
+             'times. Defaults to %s.'
+             % ', '.join('%d' % _scale for _scale in DEFAULT_SCALES))
+    argparser.add_argument(
+        '--json',
+        dest='json_filename',
+        help='Write the results as JSON to this file.')
+    argparser.add_argument(
+        'feeds',
+        nargs='*',
+        help='Dataset module names or filenames to benchmark.')
+    options = argparser.parse_args()
+
+    registry = DatasetRegistry(sorted(DATASET_MANIFEST.keys()))
+    store = FixtureStore(options.fixtures_dir)
+
+    if options.feeds:
+        feeds = set()
+
+        for feed_name in options.feeds:
+            if feed_name in registry.filenames:
+                feeds.add(feed_name)
+            elif feed_name in registry.entries_by_module:
+                feeds.update(
+                    _entry['filename']
+                    for _entry in registry.entries_by_module[feed_name]
+                )
+            else:
+                sys.stderr.write('Invalid dataset/filename specified: "%s"\n'
+                                 % feed_name)
+                sys.exit(1)
+    else:
+        feeds = registry.filenames
+
+    datasets = [
+        _entry
+        for _entry in registry.entries
+        if _entry['filename'] in feeds
+    ]
+
+    if options.record:
+        record_fixtures(datasets, registry, store)
+        return
+
+    results = []
+
+    for entry in datasets:
+        filename = entry['filename']
+
+        try:
+            info = registry.get_dataset(filename)
+            results += benchmark_dataset(info, store,
+                                         options.scales or DEFAULT_SCALES)
+        except FixtureMissingError as e:
+            sys.stderr.write('Skipping %s: %s\n' % (filename, e))
+        except Exception as e:
+            sys.stderr.write('Unable to benchmark %s: %s\n' % (filename, e))
+
+    print_results(results)
+
+    if options.json_filename:
+        with safe_open_for_write(options.json_filename) as fp:
+            json.dump(results, fp, indent=2, sort_keys=True)
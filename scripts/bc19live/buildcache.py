@@ -0,0 +1,317 @@
+import ast
+import hashlib
+import inspect
+import json
+import os
+import threading
+from functools import lru_cache
+
+from bc19live.http import http_cache
+
+
+#: Keys in dataset information that aren't included in build keys.
+#:
+#: URLs are excluded, since the content they return is hashed instead, and
+#: some URLs contain values that change on every run (such as timestamps used
+#: to bust caches).
+IGNORED_INFO_KEYS = {'url', 'urls'}
+
+
+#: The directory containing the :py:mod:`bc19live` package.
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+_source_hashes = {}
+_source_hashes_lock = threading.Lock()
+
+
+def hash_file(filename):
+    """Return a hash of a file's contents.
+
+    Args:
+        filename (str):
+            The path to the file.
+
+    Returns:
+        str:
+        The SHA-256 hex digest of the file, or ``None`` if it could not be
+        read.
+    """
+    sha = hashlib.sha256()
+
+    try:
+        with open(filename, 'rb') as fp:
+            for chunk in iter(lambda: fp.read(1024 * 1024), b''):
+                sha.update(chunk)
+    except OSError:
+        return None
+
+    return sha.hexdigest()
+
+
+def hash_bytes(data):
+    """Return a hash of a byte string.
+
+    Args:
+        data (bytes):
+            The data to hash.
+
+    Returns:
+        str:
+        The SHA-256 hex digest of the data.
+    """
+    return hashlib.sha256(data).hexdigest()
+
+
+def get_build_key(info, parser, input_hashes):
+    """Return a key identifying the inputs to a dataset build.
+
+    The key covers the hashes of every input (local source files or HTTP
+    response payloads), the dataset information, and the source code of the
+    module containing the parser along with the :py:mod:`bc19live` modules
+    it imports. If any of these change, the key will change.
+
+    Args:
+        info (dict):
+            The dataset information.
+
+        parser (callable):
+            The parser for the dataset.
+
+        input_hashes (dict):
+            A mapping of input names to hashes of their contents.
+
+    Returns:
+        str:
+        The build key, or ``None`` if any input could not be hashed.
+    """
+    if None in input_hashes.values():
+        return None
+
+    sha = hashlib.sha256()
+    sha.update(json.dumps(input_hashes, sort_keys=True).encode('utf-8'))
+    sha.update(_serialize_value({
+        _key: _value
+        for _key, _value in info.items()
+        if _key not in IGNORED_INFO_KEYS
+    }).encode('utf-8'))
+    sha.update(_get_source_hash(parser).encode('utf-8'))
+
+    return sha.hexdigest()
+
+
+def is_build_current(filename, key):
+    """Return whether a dataset was last built with the given key.
+
+    Args:
+        filename (str):
+            The filename of the dataset.
+
+        key (str):
+            The build key for the dataset.
+
+    Returns:
+        bool:
+        ``True`` if the last successful build used the same key.
+    """
+    return key is not None and http_cache.get_build_key(filename) == key
+
+
+def record_build(filename, key):
+    """Record a successful build of a dataset.
+
+    Args:
+        filename (str):
+            The filename of the dataset.
+
+        key (str):
+            The build key for the dataset.
+    """
+    http_cache.set_build_key(filename, key)
+
+
+def _get_source_hash(func):
+    """Return a hash of the source code used by a function.
+
+    The whole module defining the function is hashed, so that changes to any
+    helper functions used by the parser are also picked up. So are the
+    :py:mod:`bc19live` modules it imports, directly or indirectly (such as
+    :py:mod:`bc19live.utils` and :py:mod:`bc19live.tableau`), which parsers
+    build upon. Changes to modules that the parser doesn't import (such as
+    :py:mod:`bc19live.report`) don't affect the hash.
+
+    Args:
+        func (callable):
+            The function.
+
+    Returns:
+        str:
+        The hash of the source code.
+    """
+    try:
+        source_filename = inspect.getsourcefile(func)
+    except TypeError:
+        source_filename = None
+
+    if source_filename is None:
+        return _serialize_value(func)
+
+    sha = hashlib.sha256()
+
+    for filename in _get_source_filenames(source_filename):
+        sha.update(os.path.relpath(filename, PACKAGE_DIR).encode('utf-8'))
+        sha.update(_get_file_hash(filename).encode('utf-8'))
+
+    return sha.hexdigest()
+
+
+@lru_cache(maxsize=None)
+def _get_source_filenames(source_filename):
+    """Return the source files used by a module.
+
+    This includes the module itself, and every :py:mod:`bc19live` module it
+    imports, directly or indirectly. Imports are found by parsing the
+    source, rather than importing anything. It's computed once per module
+    per process.
+
+    Args:
+        source_filename (str):
+            The path to the module's source file.
+
+    Returns:
+        tuple of str:
+        The sorted paths to the source files.
+    """
+    found = set()
+    pending = [os.path.abspath(source_filename)]
+
+    while pending:
+        filename = pending.pop()
+
+        if filename in found:
+            continue
+
+        found.add(filename)
+
+        try:
+            with open(filename, 'rb') as fp:
+                tree = ast.parse(fp.read(), filename)
+        except (OSError, SyntaxError, ValueError):
+            continue
+
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                module_names = [
+                    _alias.name
+                    for _alias in node.names
+                ]
+            elif isinstance(node, ast.ImportFrom) and node.level == 0:
+                # The imported names may be modules themselves (as in
+                # "from bc19live import utils").
+                module_names = [node.module] + [
+                    '%s.%s' % (node.module, _alias.name)
+                    for _alias in node.names
+                ]
+            else:
+                continue
+
+            for module_name in module_names:
+                pending += _get_module_filenames(module_name)
+
+    return tuple(sorted(found))
+
+
+def _get_module_filenames(module_name):
+    """Return the source files loaded when importing a bc19live module.
+
+    This includes the module and the ``__init__.py`` of each package
+    containing it.
+
+    Args:
+        module_name (str):
+            The full name of the module.
+
+    Returns:
+        list of str:
+        The paths to the source files. This will be empty if the module
+        isn't part of :py:mod:`bc19live`, or can't be found.
+    """
+    parts = module_name.split('.')
+
+    if parts[0] != 'bc19live':
+        return []
+
+    filenames = []
+    path = PACKAGE_DIR
+
+    for part in parts[1:]:
+        filenames.append(os.path.join(path, '__init__.py'))
+        path = os.path.join(path, part)
+
+    if os.path.exists('%s.py' % path):
+        filenames.append('%s.py' % path)
+    elif os.path.exists(os.path.join(path, '__init__.py')):
+        filenames.append(os.path.join(path, '__init__.py'))
+    else:
+        return []
+
+    return filenames
+
+
+def _get_file_hash(filename):
+    """Return a hash of a source file, computed once per process.
+
+    Args:
+        filename (str):
+            The path to the source file.
+
+    Returns:
+        str:
+        The hash of the file, or an empty string if it could not be read.
+    """
+    with _source_hashes_lock:
+        try:
+            return _source_hashes[filename]
+        except KeyError:
+            source_hash = hash_file(filename) or ''
+            _source_hashes[filename] = source_hash
+
+            return source_hash
+
+
+def _serialize_value(value):
+    """Return a stable string representation of a value.
+
+    Dictionaries are serialized with sorted keys, and functions are
+    serialized using their source code, so that the result is the same
+    between runs.
+
+    Args:
+        value (object):
+            The value to serialize.
+
+    Returns:
+        str:
+        The serialized value.
+    """
+    if isinstance(value, dict):
+        return '{%s}' % ','.join(
+            '%s:%s' % (_serialize_value(_key), _serialize_value(_value))
+            for _key, _value in sorted(value.items(),
+                                       key=lambda pair: repr(pair[0]))
+        )
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        if isinstance(value, (set, frozenset)):
+            value = sorted(value, key=repr)
+
+        return '[%s]' % ','.join(
+            _serialize_value(_item)
+            for _item in value
+        )
+    elif callable(value):
+        try:
+            return inspect.getsource(value)
+        except (OSError, TypeError):
+            return getattr(value, '__qualname__', repr(value))
+    else:
+        return repr(value)
@@ -0,0 +1,521 @@
+import csv
+import io
+import math
+import time
+from urllib.parse import urlencode
+
+from bc19live.errors import CKANError
+from bc19live.http import build_response, http_cache, http_get
+from bc19live.utils import parse_csv
+
+
+#: The default base URL for CKAN API actions.
+DEFAULT_CKAN_BASE_URL = 'https://data.chhs.ca.gov/api/3/action'
+
+#: The number of records to request in each page of results.
+#:
+#: This must not exceed the server's ``ckan.datastore.search.rows_max``
+#: setting (32000 by default).
+CKAN_PAGE_SIZE = 10000
+
+#: Fields added to every record by the CKAN datastore.
+CKAN_INTERNAL_FIELDS = {'_id', '_full_text'}
+
+#: CKAN datastore field types holding dates or timestamps.
+CKAN_DATE_TYPES = {'date', 'timestamp'}
+
+#: The number of seconds after which an incrementally-fetched dataset is
+#: fully fetched again.
+#:
+#: Only records from the latest date seen onward are fetched incrementally,
+#: so this ensures that any revisions to older records are eventually picked
+#: up.
+CKAN_FULL_FETCH_INTERVAL = 7 * 24 * 60 * 60
+
+
+def _quote_identifier(name):
+    """Return a quoted SQL identifier.
+
+    Args:
+        name (str):
+            The identifier to quote.
+
+    Returns:
+        str:
+        The quoted identifier.
+    """
+    return '"%s"' % name.replace('"', '""')
+
+
+def _quote_literal(value):
+    """Return a quoted SQL string literal.
+
+    Args:
+        value (object):
+            The value to quote. This will be converted to a string.
+
+    Returns:
+        str:
+        The quoted literal.
+    """
+    return "'%s'" % str(value).replace("'", "''")
+
+
+def build_ckan_sql(ckan_info, since=None, offset=0):
+    """Return the SQL used to query a page of records from a CKAN resource.
+
+    Args:
+        ckan_info (dict):
+            The ``ckan`` information from the dataset. This contains:
+
+            ``resource_id`` (str):
+                The ID of the datastore resource.
+
+            ``date_field`` (str):
+                The field containing each record's date.
+
+            ``filters`` (dict, optional):
+                A mapping of field names to values that records must match.
+
+            ``ignore_case`` (bool, optional):
+                Whether ``filters`` should match values regardless of case.
+
+            ``base_url`` (str, optional):
+                The base URL for CKAN API actions. This defaults to
+                :py:data:`DEFAULT_CKAN_BASE_URL`.
+
+        since (str, optional):
+            If provided, only records with a ``date_field`` value on or after
+            this will be returned.
+
+        offset (int, optional):
+            The offset of the first record to return.
+
+    Returns:
+        str:
+        The SQL statement.
+    """
+    if ckan_info.get('ignore_case'):
+        filter_fmt = 'UPPER(%s) = UPPER(%s)'
+    else:
+        filter_fmt = '%s = %s'
+
+    conditions = [
+        filter_fmt % (_quote_identifier(_field), _quote_literal(_value))
+        for _field, _value in sorted(ckan_info.get('filters', {}).items())
+    ]
+
+    if since is not None:
+        conditions.append('%s >= %s' % (
+            _quote_identifier(ckan_info['date_field']),
+            _quote_literal(since)))
+
+    sql = 'SELECT * FROM %s' % _quote_identifier(ckan_info['resource_id'])
+
+    if conditions:
+        sql += ' WHERE %s' % ' AND '.join(conditions)
+
+    return '%s ORDER BY "_id" LIMIT %d OFFSET %d' % (sql, CKAN_PAGE_SIZE,
+                                                      offset)
+
+
+def get_ckan_url(ckan_info, since=None, offset=0):
+    """Return the URL used to query a page of records from a CKAN resource.
+
+    Args:
+        ckan_info (dict):
+            The ``ckan`` information from the dataset.
+
+        since (str, optional):
+            If provided, only records with a ``date_field`` value on or after
+            this will be returned.
+
+        offset (int, optional):
+            The offset of the first record to return.
+
+    Returns:
+        str:
+        The URL for the ``datastore_search_sql`` action.
+    """
+    return '%s/datastore_search_sql?%s' % (
+        ckan_info.get('base_url', DEFAULT_CKAN_BASE_URL).rstrip('/'),
+        urlencode({
+            'sql': build_ckan_sql(ckan_info, since=since, offset=offset),
+        }))
+
+
+def normalize_ckan_date(value):
+    """Return a date from a CKAN record in ``YYYY-MM-DD`` form.
+
+    Timestamp columns are returned by CKAN as ``YYYY-MM-DDTHH:MM:SS``. These
+    are trimmed down to the date, to match the values in the resource's
+    downloadable CSV file. Any other values are returned as-is.
+
+    Args:
+        value (str):
+            The value from the record.
+
+    Returns:
+        str:
+        The normalized date.
+    """
+    if value and len(value) > 10 and value[10] == 'T':
+        return value[:10]
+
+    return value
+
+
+def format_ckan_value(value):
+    """Return a value from a CKAN record as written in a CSV file.
+
+    CKAN returns numeric fields as JSON numbers, which may be floats even for
+    whole numbers. These are formatted the way the resource's downloadable
+    CSV file presents them, so that they parse the same way.
+
+    Args:
+        value (object):
+            The value from the record.
+
+    Returns:
+        str:
+        The formatted value. Missing values (including ``NaN``) are blank.
+    """
+    if value is None:
+        return ''
+    elif isinstance(value, bool):
+        return 'true' if value else 'false'
+    elif isinstance(value, float):
+        if math.isnan(value) or math.isinf(value):
+            return ''
+        elif value.is_integer():
+            return '%d' % value
+
+        return repr(value)
+
+    return str(value)
+
+
+def parse_ckan_response(response):
+    """Return the fields and records from a CKAN datastore response.
+
+    Args:
+        response (requests.Response):
+            The response from a ``datastore_search_sql`` request.
+
+    Returns:
+        tuple:
+        A 2-tuple containing:
+
+        1. The list of fields, in order. Each is a dictionary containing the
+           field's ``id`` and datastore ``type``.
+        2. The list of records.
+
+    Raises:
+        bc19live.errors.CKANError:
+            The request failed, or returned an unexpected payload.
+    """
+    try:
+        payload = response.json()
+    except ValueError:
+        payload = {}
+
+    if response.status_code != 200 or not payload.get('success'):
+        raise CKANError(
+            'HTTP error %s while fetching %s: %s'
+            % (response.status_code, response.url,
+               payload.get('error') or response.text[:3000]))
+
+    result = payload['result']
+    fields = [
+        {
+            'id': _field['id'],
+            'type': _field.get('type'),
+        }
+        for _field in result.get('fields', [])
+        if _field['id'] not in CKAN_INTERNAL_FIELDS
+    ]
+
+    return fields, result.get('records', [])
+
+
+def fetch_ckan_records(ckan_info, since=None, session=None,
+                       on_response=None):
+    """Fetch matching records from a CKAN resource.
+
+    The ``filters`` and ``since`` conditions are applied by the server,
+    and the results are fetched page by page until all records have been
+    returned.
+
+    Args:
+        ckan_info (dict):
+            The ``ckan`` information from the dataset.
+
+        since (str, optional):
+            If provided, only records with a ``date_field`` value on or after
+            this will be returned.
+
+        session (requests.Session, optional):
+            The HTTP session to use.
+
+        on_response (callable, optional):
+            A function called with each response and the number of seconds
+            it took to fetch.
+
+    Returns:
+        tuple:
+        A 3-tuple containing:
+
+        1. The requests session.
+        2. The list of fields, in order (see :py:func:`parse_ckan_response`).
+        3. The list of records.
+
+    Raises:
+        bc19live.errors.CKANError:
+            A request failed, or returned an unexpected payload.
+    """
+    fields = None
+    records = []
+
+    while True:
+        url = get_ckan_url(ckan_info, since=since, offset=len(records))
+
+        start_time = time.monotonic()
+        session, response = http_get(url,
+                                     allow_cache=False,
+                                     session=session)
+
+        if on_response is not None:
+            on_response(response, time.monotonic() - start_time)
+
+        page_fields, page = parse_ckan_response(response)
+
+        if fields is None:
+            fields = page_fields
+
+        records += page
+
+        if len(page) < CKAN_PAGE_SIZE:
+            break
+
+    return session, fields, records
+
+
+def build_ckan_csv_response(ckan_info, fields, records):
+    """Return a response containing CKAN records as CSV.
+
+    This allows the records to be parsed by
+    :py:func:`~bc19live.utils.parse_csv`, using the same column
+    configuration as the resource's downloadable CSV file. Values of any
+    date or timestamp field (along with the ``date_field``) are normalized
+    to dates, as they are in that file.
+
+    Args:
+        ckan_info (dict):
+            The ``ckan`` information from the dataset.
+
+        fields (list of dict):
+            The fields, in order (see :py:func:`parse_ckan_response`).
+
+        records (list of dict):
+            The records.
+
+    Returns:
+        requests.Response:
+        The response.
+    """
+    date_field = ckan_info['date_field']
+    field_names = [
+        _field['id']
+        for _field in fields
+    ]
+    date_fields = {
+        _field['id']
+        for _field in fields
+        if (_field['id'] == date_field or
+            _field.get('type') in CKAN_DATE_TYPES)
+    }
+    fp = io.StringIO()
+    writer = csv.writer(fp, lineterminator='\n')
+    writer.writerow(field_names)
+
+    for record in records:
+        row = []
+
+        for field in field_names:
+            value = format_ckan_value(record.get(field))
+
+            if field in date_fields:
+                value = normalize_ckan_date(value)
+
+            row.append(value)
+
+        writer.writerow(row)
+
+    return build_response(url=get_ckan_url(ckan_info),
+                          content=fp.getvalue().encode('utf-8'))
+
+
+def get_last_seen(ckan_info, records, last_seen=None):
+    """Return the latest date found in a list of CKAN records.
+
+    Dates are compared as strings, so ``date_field`` must hold ISO 8601
+    dates or timestamps. They're returned as stored by the server (without
+    normalizing them), so that they can be compared against the field in a
+    query.
+
+    Args:
+        ckan_info (dict):
+            The ``ckan`` information from the dataset.
+
+        records (list of dict):
+            The records.
+
+        last_seen (str, optional):
+            The latest date seen before these records.
+
+    Returns:
+        str:
+        The latest date, or ``last_seen`` if there are no newer dates.
+    """
+    date_field = ckan_info['date_field']
+    dates = [
+        _record[date_field]
+        for _record in records
+        if _record.get(date_field)
+    ]
+
+    if last_seen is not None:
+        dates.append(last_seen)
+
+    if not dates:
+        return None
+
+    return max(dates)
+
+
+def get_ckan_date_column(info):
+    """Return the CSV column holding the date of each CKAN record.
+
+    Args:
+        info (dict):
+            The dataset information.
+
+    Returns:
+        str:
+        The name of the column built from the ``ckan`` source's
+        ``date_field``, or ``None`` if there isn't one.
+    """
+    date_field = info['ckan']['date_field']
+
+    for col_info in info.get('csv', {}).get('columns', []):
+        if (col_info.get('source_column', col_info['name']) == date_field and
+            'transform_func' not in col_info):
+            return col_info['name']
+
+    return None
+
+
+def can_fetch_ckan_incrementally(info, parser):
+    """Return whether a CKAN dataset can be fetched incrementally.
+
+    Datasets must be marked with ``append_only``, and must be parsed by
+    :py:func:`~bc19live.utils.parse_csv` into a file with a column for the
+    ``date_field``. ``delta`` columns aren't supported, since they depend on
+    the rows that come before.
+
+    Args:
+        info (dict):
+            The dataset information.
+
+        parser (callable):
+            The parser for the dataset.
+
+    Returns:
+        bool:
+        ``True`` if the dataset can be fetched incrementally.
+    """
+    if not info.get('append_only') or parser is not parse_csv:
+        return False
+
+    csv_info = info.get('csv', {})
+    default_type = csv_info.get('default_type')
+
+    return (get_ckan_date_column(info) is not None and
+            not any(
+                _col_info.get('type', default_type) == 'delta'
+                for _col_info in csv_info.get('columns', [])
+            ))
+
+
+def get_ckan_state(filename, ckan_info, parser_key):
+    """Return the stored incremental fetch state for a CKAN dataset.
+
+    Args:
+        filename (str):
+            The filename of the dataset.
+
+        ckan_info (dict):
+            The ``ckan`` information from the dataset.
+
+        parser_key (str):
+            The build key for the parser and dataset information, without
+            any inputs.
+
+    Returns:
+        dict:
+        The state, or ``None`` if the dataset must be fully fetched. This is
+        the case if it hasn't been fully fetched before, if its query,
+        parser, or dataset information have changed since, or if it was last
+        fully fetched more than :py:data:`CKAN_FULL_FETCH_INTERVAL` seconds
+        ago.
+    """
+    state = http_cache.get_append_state(filename)
+
+    if (state is None or
+        state.get('url') != get_ckan_url(ckan_info) or
+        state.get('parser_key') != parser_key or
+        (time.time() - state.get('full_fetched', 0) >=
+         CKAN_FULL_FETCH_INTERVAL)):
+        return None
+
+    return state
+
+
+def save_ckan_state(filename, ckan_info, parser_key, records, state=None):
+    """Store the incremental fetch state for a CKAN dataset.
+
+    Args:
+        filename (str):
+            The filename of the dataset.
+
+        ckan_info (dict):
+            The ``ckan`` information from the dataset.
+
+        parser_key (str):
+            The build key for the parser and dataset information, without
+            any inputs.
+
+        records (list of dict):
+            The records that were fetched.
+
+        state (dict, optional):
+            The state used to fetch the records incrementally. If not
+            provided, the records are from a full fetch.
+    """
+    if state is None:
+        last_seen = get_last_seen(ckan_info, records)
+
+        if last_seen is None:
+            state = None
+        else:
+            state = {
+                'url': get_ckan_url(ckan_info),
+                'last_seen': last_seen,
+                'parser_key': parser_key,
+                'full_fetched': time.time(),
+            }
+    else:
+        state = dict(state, last_seen=get_last_seen(ckan_info, records,
+                                                    state['last_seen']))
+
+    http_cache.set_append_state(filename, state)
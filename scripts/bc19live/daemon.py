@@ -0,0 +1,153 @@
+import os
+import sys
+import time
+
+from bc19live.dirs import DATA_DIR
+from bc19live.scheduler import build_dependency_graph, get_local_sources
+
+
+#: The default number of seconds between full rebuilds in daemon mode.
+DEFAULT_REBUILD_INTERVAL = 60 * 60
+
+#: The default number of seconds between checks for changed local sources.
+DEFAULT_POLL_INTERVAL = 5
+
+
+def get_local_source_mtimes(datasets):
+    """Return the modification times of all local sources for datasets.
+
+    Args:
+        datasets (list of dict):
+            The list of datasets.
+
+    Returns:
+        dict:
+        A mapping of local source filenames to modification times. Missing
+        files will have a time of ``None``.
+    """
+    mtimes = {}
+
+    for info in datasets:
+        for local_source in get_local_sources(info):
+            filename = local_source['filename']
+
+            if filename not in mtimes:
+                path = os.path.join(DATA_DIR, local_source['format'],
+                                    filename)
+
+                try:
+                    mtimes[filename] = os.stat(path).st_mtime_ns
+                except OSError:
+                    mtimes[filename] = None
+
+    return mtimes
+
+
+def get_affected_datasets(datasets, changed_filenames):
+    """Return the datasets affected by changes to files.
+
+    A dataset is affected if it uses one of the changed files as a local
+    source, or if it depends on another affected dataset.
+
+    Args:
+        datasets (list of dict):
+            The list of datasets to check.
+
+        changed_filenames (set of str):
+            The filenames of the files that have changed.
+
+    Returns:
+        list of dict:
+        The affected datasets, in the order they were provided.
+    """
+    graph = build_dependency_graph(datasets)
+    affected = set()
+    changed = True
+
+    while changed:
+        changed = False
+
+        for info in datasets:
+            filename = info['filename']
+
+            if filename in affected:
+                continue
+
+            local_source_filenames = {
+                _local_source['filename']
+                for _local_source in get_local_sources(info)
+            }
+
+            if (local_source_filenames & changed_filenames or
+                graph[filename] & affected):
+                affected.add(filename)
+                changed = True
+
+    return [
+        _info
+        for _info in datasets
+        if _info['filename'] in affected
+    ]
+
+
+def run_daemon(datasets, build_func,
+               interval=DEFAULT_REBUILD_INTERVAL,
+               poll_interval=DEFAULT_POLL_INTERVAL):
+    """Continuously rebuild datasets.
+
+    All datasets are rebuilt when the daemon starts, and then every
+    ``interval`` seconds.
+
+    Between those rebuilds, local sources are checked every
+    ``poll_interval`` seconds. If any have been modified outside of a
+    rebuild, the datasets depending on them (directly or indirectly) will be
+    rebuilt.
+
+    Since this runs in a single process, dataset modules, HTTP cache state,
+    and any worker processes are kept around between rebuilds.
+
+    This runs until interrupted.
+
+    Args:
+        datasets (list of dict):
+            The list of datasets to build.
+
+        build_func (callable):
+            The function used to build a list of datasets. This takes the
+            list of datasets as its only argument.
+
+        interval (int, optional):
+            The number of seconds between full rebuilds.
+
+        poll_interval (int, optional):
+            The number of seconds between checks for changed local sources.
+    """
+    next_rebuild = time.monotonic()
+    mtimes = {}
+
+    try:
+        while True:
+            if time.monotonic() >= next_rebuild:
+                build_func(datasets)
+
+                next_rebuild = time.monotonic() + interval
+                mtimes = get_local_source_mtimes(datasets)
+            else:
+                new_mtimes = get_local_source_mtimes(datasets)
+                changed_filenames = {
+                    _filename
+                    for _filename, _mtime in new_mtimes.items()
+                    if _mtime != mtimes.get(_filename)
+                }
+
+                if changed_filenames:
+                    print('Local sources changed: %s'
+                          % ', '.join(sorted(changed_filenames)))
+
+                    build_func(get_affected_datasets(datasets,
+                                                     changed_filenames))
+                    mtimes = get_local_source_mtimes(datasets)
+
+            time.sleep(poll_interval)
+    except KeyboardInterrupt:
+        sys.stderr.write('Stopping the dataset daemon.\n')
@@ -2,11 +2,16 @@ DATASETS = [
     {
         'filename': 'adult-and-senior-care.csv',
         'format': 'csv',
+        'append_only': True,
         'url': (
             'https://raw.githubusercontent.com/datadesk/california-coronavirus-data/master/cdph-adult-and-senior-care-facilities.csv'
         ),
         'csv': {
-            'match_row': lambda row: row['county'] == 'Butte',
+            'engine': 'columnar',
+            'prefilter': b'Butte',
+            'filters': [
+                ('county', '==', 'Butte'),
+            ],
             'sort_by': 'date',
             'columns': [
                 {
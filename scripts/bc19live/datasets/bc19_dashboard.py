@@ -2160,6 +2160,7 @@ DATASETS = [
             },
         },
         'parser': build_dashboard_dataset,
+        'cpu_bound': True,
     },
 
 ]
@@ -2186,6 +2187,7 @@ if 0:
             },
         },
         'parser': build_schools_dataset,
+        'cpu_bound': True,
         'districts': [
             ('blueoak', {
                 'short_name': 'Blue Oak',
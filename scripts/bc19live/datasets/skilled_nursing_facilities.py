@@ -29,13 +29,19 @@ DATASETS = [
         'filename': 'skilled-nursing-facilities-v3.csv',
         'format': 'csv',
         #'url': 'https://raw.githubusercontent.com/datadesk/california-coronavirus-data/master/cdph-skilled-nursing-facilities.csv',
-        'url': 'https://data.chhs.ca.gov/dataset/7759311f-1aa8-4ff6-bfbb-ba8f64290ae2/resource/d4d68f74-9176-4969-9f07-1546d81db5a7/download/covid19datanursinghome.csv',
+        'ckan': {
+            'resource_id': 'd4d68f74-9176-4969-9f07-1546d81db5a7',
+            'filters': {
+                'county': 'Butte',
+            },
+            'ignore_case': True,
+            'date_field': 'as_of_date',
+        },
         'csv': {
-            'match_row': lambda row: (
-                row['county'].upper() == 'BUTTE' and
-                row['as_of_date'] not in ('2020-04-21', '2020-04-22',
-                                          '2020-04-23')
-            ),
+            'filters': [
+                ('as_of_date', 'not in', ('2020-04-21', '2020-04-22',
+                                          '2020-04-23')),
+            ],
             'validators': [
                 lambda results: (
                     results[0]['date'] == '2020-05-15',
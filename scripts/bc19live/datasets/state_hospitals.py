@@ -2,7 +2,14 @@ DATASETS = [
     {
         'filename': 'state-hospitals-v3.csv',
         'format': 'csv',
-        'url': 'https://data.chhs.ca.gov/dataset/2df3e19e-9ee4-42a6-a087-9761f82033f6/resource/47af979d-8685-4981-bced-96a6b79d3ed5/download/covid19hospitalbycounty.csv',
+        'append_only': True,
+        'ckan': {
+            'resource_id': '47af979d-8685-4981-bced-96a6b79d3ed5',
+            'filters': {
+                'county': 'Butte',
+            },
+            'date_field': 'todays_date',
+        },
         'csv': {
             'match_row': lambda row: row['county'] == 'Butte',
             'validator': lambda results: results[0]['date'] == '2020-03-29',
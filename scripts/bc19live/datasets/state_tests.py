@@ -2,7 +2,14 @@ DATASETS = [
     {
         'filename': 'state-tests.csv',
         'format': 'csv',
-        'url': 'https://data.chhs.ca.gov/dataset/f333528b-4d38-4814-bebb-12db1f10f535/resource/046cdd2b-31e5-4d34-9ed3-b48cdbc4be7a/download/covid19cases_test.csv',
+        'append_only': True,
+        'ckan': {
+            'resource_id': '046cdd2b-31e5-4d34-9ed3-b48cdbc4be7a',
+            'filters': {
+                'area': 'Butte',
+            },
+            'date_field': 'date',
+        },
         'csv': {
             'match_row': lambda row: (row['area'] == 'Butte' and
                                       row['date'] != ''),
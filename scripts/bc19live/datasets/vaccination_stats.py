@@ -4,6 +4,7 @@ import itertools
 import json
 from datetime import datetime
 
+from bc19live.http import iter_response_lines
 from bc19live.utils import (add_or_update_json_date_row,
                             build_missing_date_rows,
                             convert_json_to_csv,
@@ -49,7 +50,7 @@ def build_demographic_stats_json_dataset(session, response, out_filename,
 
         return parse_real(value)
 
-    lines = response.iter_lines()
+    lines = iter_response_lines(response)
     reader = csv.DictReader(codecs.iterdecode(lines, 'utf-8'),
                             delimiter=',')
     cur_date = None
@@ -152,15 +153,19 @@ DATASETS = [
     {
         'filename': 'chhs-vaccinations-administered.csv',
         'format': 'csv',
-        'url': (
-            'https://data.chhs.ca.gov/dataset/e283ee5a-cf18-4f20-a92c-ee94a2866ccd/resource/130d7ba2-b6eb-438d-a412-741bde207e1c/download/covid19vaccinesbycounty.csv'
-        ),
+        'ckan': {
+            'resource_id': '130d7ba2-b6eb-438d-a412-741bde207e1c',
+            'filters': {
+                'county': 'Butte',
+            },
+            'date_field': 'administered_date',
+        },
         'csv': {
-            'match_row': lambda row: (
-                row['county'] == 'Butte' and
-                (datetime.strptime(row['administered_date'], '%Y-%m-%d') >=
-                 STATE_START_DATE)
-            ),
+            'filters': [
+                ('county', '==', 'Butte'),
+                ('administered_date', '>=',
+                 STATE_START_DATE.strftime('%Y-%m-%d')),
+            ],
             'validator': lambda results: (
                 len(results) > 0 and
                 results[0]['date'] == STATE_START_DATE.strftime('%Y-%m-%d')
@@ -221,6 +226,7 @@ DATASETS = [
         'filename': 'vaccination-demographics-v3.json',
         'format': 'json',
         'url': 'https://data.chhs.ca.gov/dataset/e283ee5a-cf18-4f20-a92c-ee94a2866ccd/resource/71729331-2f09-4ea4-a52f-a2661972e146/download/covid19vaccinesbycountybydemographic.csv',
+        'stream': True,
         'parser': build_demographic_stats_json_dataset,
     },
     {
@@ -9,6 +9,7 @@ from datetime import datetime, timedelta
 from typing import TYPE_CHECKING
 
 from bc19live.utils import (convert_json_to_csv,
+                            parse_date,
                             safe_open_for_write)
 
 if TYPE_CHECKING:
@@ -35,8 +36,8 @@ def build_dataset(
         fp.write(json.dumps(sorted(
             data['result']['records'],
             key=lambda record: (
-                (datetime.strptime(record['test_result_date'], '%m/%d/%Y')
-                 .isoformat())
+                parse_date(record['test_result_date'], '%m/%d/%Y')
+                .isoformat()
                 if record['test_result_date']
                 else ''
             )
@@ -57,8 +58,8 @@ def build_wastewater_levels(
         {
             **row,
             'pcr_target_avg_conc': float(row['pcr_target_avg_conc']),
-            'sample_collect_date': datetime.strptime(
-                row['sample_collect_date'], '%Y-%m-%d'),
+            'sample_collect_date': parse_date(row['sample_collect_date'],
+                                              '%Y-%m-%d'),
         }
         for row in reader
     ]
@@ -226,6 +227,7 @@ DATASETS = [
         'format': 'json',
         'url': 'https://data.chhs.ca.gov/api/3/action/datastore_search_sql?sql=SELECT%20%2A%20from%20%222742b824-3736-4292-90a9-7fad98e94c06%22%20WHERE%20%22pcr_target%22%3D%27sars-cov-2%27%20AND%20%22county_treatmentplant%22%3D%27Butte%27',
         'parser': build_dataset,
+        'build_cache': True,
     },
     {
         'filename': 'wastewater-v2.csv',
@@ -235,6 +237,7 @@ DATASETS = [
             'format': 'json',
         },
         'parser': convert_json_to_csv,
+        'build_cache': True,
         'rows_key': 'results.records',
         'match_row': lambda row: (
             row['test_result_date'] is not None
@@ -279,16 +282,20 @@ DATASETS = [
             'format': 'csv',
         },
         'parser': build_wastewater_levels,
+        'build_cache': True,
+        'cpu_bound': True,
     },
     {
         'filename': 'cdc-wastewater-levels.csv',
         'format': 'csv',
         'url': 'https://www.cdc.gov/wcms/vizdata/NCEZID_DIDRI/SC2/nwsssc2sitemapnocoords.csv',
         'csv': {
-            'match_row': lambda row: (
-                row['State/Territory'] == 'California' and
-                row['Counties_Served'] == 'Butte'
-            ),
+            'engine': 'columnar',
+            'prefilter': b'Butte',
+            'filters': [
+                ('State/Territory', '==', 'California'),
+                ('Counties_Served', '==', 'Butte'),
+            ],
             'add_missing_dates': True,
             'columns': [
                 {
@@ -0,0 +1,354 @@
+import json
+import os
+import sqlite3
+import sys
+import threading
+
+from bc19live.errors import ParseError
+
+
+class DateRowStore(object):
+    """An append-only store for date-keyed JSON datasets.
+
+    Datasets built a day at a time (through
+    :py:func:`~bc19live.utils.add_or_update_json_date_row`) are kept in a
+    SQLite database in WAL mode, rather than loading and rewriting the whole
+    JSON file for every new row. Only the last row of a dataset is ever
+    replaced, and new rows are appended after it.
+
+    Each row is stored already serialized, in the form used in the JSON file,
+    so that the file can be written out again without parsing or encoding
+    the older rows (see :py:func:`~bc19live.utils.materialize_json_date_rows`).
+
+    The JSON file on disk remains the source of truth. It's imported the
+    first time a dataset is used, and again if it changes (or is removed)
+    outside of the store. Any pending rows not yet written to the file are
+    then discarded.
+
+    Each thread uses its own connection to the database. Connections are
+    opened the first time they're needed.
+    """
+
+    #: The number of seconds to wait for another process to release a lock.
+    BUSY_TIMEOUT = 30
+
+    def __init__(self, filename):
+        """Initialize the store.
+
+        Args:
+            filename (str):
+                The path to the database file.
+        """
+        self.filename = filename
+
+        self._local = threading.local()
+
+    def get_last_date(self, filename, date_field='date'):
+        """Return the date of the last row for a dataset.
+
+        Args:
+            filename (str):
+                The path to the dataset's JSON file.
+
+            date_field (str, optional):
+                The name of the field in each row that references the date.
+
+        Returns:
+            str:
+            The date of the last row, or ``None`` if there are no rows (or
+            the last row has no date).
+
+        Raises:
+            bc19live.errors.ParseError:
+                The existing JSON file could not be imported.
+        """
+        conn = self._get_conn()
+        conn.execute('BEGIN IMMEDIATE')
+
+        try:
+            self._sync_json(conn, filename, date_field)
+            row = conn.execute(
+                'SELECT date FROM date_rows WHERE filename = ?'
+                ' ORDER BY seq DESC LIMIT 1',
+                (filename,)).fetchone()
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        else:
+            conn.execute('COMMIT')
+
+        if row is None:
+            return None
+
+        return row[0]
+
+    def add_rows(self, filename, rows, date_field='date',
+                 replace_last=False):
+        """Append rows to a dataset.
+
+        Args:
+            filename (str):
+                The path to the dataset's JSON file.
+
+            rows (iterable of dict):
+                The rows to append.
+
+            date_field (str, optional):
+                The name of the field in each row that references the date.
+
+            replace_last (bool, optional):
+                Whether to remove the current last row before appending.
+
+        Raises:
+            bc19live.errors.ParseError:
+                The existing JSON file could not be imported.
+        """
+        conn = self._get_conn()
+        conn.execute('BEGIN IMMEDIATE')
+
+        try:
+            self._sync_json(conn, filename, date_field)
+            row = conn.execute(
+                'SELECT MAX(seq) FROM date_rows WHERE filename = ?',
+                (filename,)).fetchone()
+            last_seq = row[0]
+
+            if last_seq is None:
+                last_seq = -1
+            elif replace_last:
+                conn.execute(
+                    'DELETE FROM date_rows WHERE filename = ? AND seq = ?',
+                    (filename, last_seq))
+                last_seq -= 1
+
+            self._insert_rows(conn, filename, rows, date_field,
+                              first_seq=last_seq + 1)
+            conn.execute(
+                'UPDATE date_row_files SET dirty = 1 WHERE filename = ?',
+                (filename,))
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        else:
+            conn.execute('COMMIT')
+
+    def needs_write(self, filename):
+        """Return whether a dataset's JSON file needs to be written.
+
+        This is the case if rows have been added since the file was last
+        written, or if the file is missing.
+
+        Args:
+            filename (str):
+                The path to the dataset's JSON file.
+
+        Returns:
+            bool:
+            ``True`` if the JSON file needs to be written, or ``False`` if
+            it's current (or the dataset isn't in the store).
+        """
+        row = self._get_conn().execute(
+            'SELECT dirty FROM date_row_files WHERE filename = ?',
+            (filename,)).fetchone()
+
+        return (row is not None and
+                (bool(row[0]) or not os.path.exists(filename)))
+
+    def get_row_count(self, filename):
+        """Return the number of rows stored for a dataset.
+
+        Args:
+            filename (str):
+                The path to the dataset's JSON file.
+
+        Returns:
+            int:
+            The number of rows, or ``None`` if the dataset isn't in the store.
+        """
+        conn = self._get_conn()
+
+        if conn.execute('SELECT 1 FROM date_row_files WHERE filename = ?',
+                        (filename,)).fetchone() is None:
+            return None
+
+        return conn.execute(
+            'SELECT COUNT(*) FROM date_rows WHERE filename = ?',
+            (filename,)).fetchone()[0]
+
+    def iter_row_texts(self, filename):
+        """Yield the serialized rows for a dataset.
+
+        Args:
+            filename (str):
+                The path to the dataset's JSON file.
+
+        Yields:
+            str:
+            Each row, serialized as JSON with an indentation of 2, in order.
+        """
+        cursor = self._get_conn().execute(
+            'SELECT data FROM date_rows WHERE filename = ? ORDER BY seq',
+            (filename,))
+
+        for row in cursor:
+            yield row[0]
+
+    def mark_written(self, filename):
+        """Record that a dataset's JSON file has been written.
+
+        Args:
+            filename (str):
+                The path to the dataset's JSON file.
+        """
+        st = os.stat(filename)
+
+        self._get_conn().execute(
+            'UPDATE date_row_files'
+            ' SET dirty = 0, json_mtime = ?, json_size = ?'
+            ' WHERE filename = ?',
+            (st.st_mtime_ns, st.st_size, filename))
+
+    def close(self):
+        """Close the connection for the current thread."""
+        conn = getattr(self._local, 'conn', None)
+
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def _sync_json(self, conn, filename, date_field):
+        """Import a dataset's JSON file, if needed.
+
+        The file is imported if the dataset isn't yet in the store, or if
+        the file has changed since it was last imported or written. If the
+        file doesn't exist, the dataset starts out empty.
+
+        If there were pending rows when the file changed, they're discarded
+        (with a warning) in favor of the file's contents, rather than being
+        written over the changes.
+
+        This must be called within a transaction.
+
+        Args:
+            conn (sqlite3.Connection):
+                The database connection.
+
+            filename (str):
+                The path to the dataset's JSON file.
+
+            date_field (str):
+                The name of the field in each row that references the date.
+
+        Raises:
+            bc19live.errors.ParseError:
+                The JSON file could not be loaded.
+        """
+        row = conn.execute(
+            'SELECT dirty, json_mtime, json_size FROM date_row_files'
+            ' WHERE filename = ?',
+            (filename,)).fetchone()
+
+        try:
+            st = os.stat(filename)
+            json_stat = (st.st_mtime_ns, st.st_size)
+        except FileNotFoundError:
+            st = None
+            json_stat = (None, None)
+
+        if row is not None:
+            if tuple(row[1:]) == json_stat:
+                return
+
+            if row[0]:
+                sys.stderr.write('%s changed while it had rows waiting to be '
+                                 'written. Discarding those rows and '
+                                 'importing it again.\n'
+                                 % filename)
+
+        if st is None:
+            rows = []
+        else:
+            with open(filename, 'r') as fp:
+                try:
+                    rows = json.load(fp)['dates']
+                except Exception as e:
+                    raise ParseError('Unable to load existing dataset: %s'
+                                     % e)
+
+        conn.execute('DELETE FROM date_rows WHERE filename = ?',
+                     (filename,))
+        self._insert_rows(conn, filename, rows, date_field)
+        conn.execute(
+            'INSERT OR REPLACE INTO date_row_files'
+            ' (filename, dirty, json_mtime, json_size)'
+            ' VALUES (?, 0, ?, ?)',
+            (filename,) + json_stat)
+
+    def _insert_rows(self, conn, filename, rows, date_field, first_seq=0):
+        """Insert rows for a dataset.
+
+        Args:
+            conn (sqlite3.Connection):
+                The database connection.
+
+            filename (str):
+                The path to the dataset's JSON file.
+
+            rows (iterable of dict):
+                The rows to insert.
+
+            date_field (str):
+                The name of the field in each row that references the date.
+
+            first_seq (int, optional):
+                The sequence number for the first row.
+        """
+        conn.executemany(
+            'INSERT INTO date_rows (filename, seq, date, data)'
+            ' VALUES (?, ?, ?, ?)',
+            (
+                (filename,
+                 _seq,
+                 _row.get(date_field),
+                 json.dumps(_row, indent=2, sort_keys=True))
+                for _seq, _row in enumerate(rows, start=first_seq)
+            ))
+
+    def _get_conn(self):
+        """Return the database connection for the current thread.
+
+        The connection will be opened and the database set up if needed.
+
+        Returns:
+            sqlite3.Connection:
+            The database connection.
+        """
+        conn = getattr(self._local, 'conn', None)
+
+        if conn is None:
+            # Statements are committed as they're executed, unless a
+            # transaction is explicitly started.
+            conn = sqlite3.connect(self.filename,
+                                   timeout=self.BUSY_TIMEOUT,
+                                   isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS date_rows ('
+                ' filename TEXT NOT NULL,'
+                ' seq INTEGER NOT NULL,'
+                ' date TEXT,'
+                ' data TEXT NOT NULL,'
+                ' PRIMARY KEY (filename, seq)'
+                ') WITHOUT ROWID')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS date_row_files ('
+                ' filename TEXT PRIMARY KEY,'
+                ' dirty INTEGER NOT NULL DEFAULT 0,'
+                ' json_mtime INTEGER,'
+                ' json_size INTEGER'
+                ')')
+
+            self._local.conn = conn
+
+        return conn
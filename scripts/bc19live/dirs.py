@@ -4,9 +4,26 @@ import os
 #: The root directory for all bc19.live files and directories.
 ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
 
-#: Location of the HTTP cached data file.
+#: Location of the legacy HTTP cached data file.
+#:
+#: Entries in this file are imported into :py:data:`HTTP_CACHE_DB`.
 CACHE_FILE = os.path.join(ROOT_DIR, '.http-cache')
 
+#: Location of the HTTP cache database.
+HTTP_CACHE_DB = os.path.join(ROOT_DIR, '.http-cache.sqlite3')
+
+#: Location of the directory containing cached HTTP response bodies.
+HTTP_BODY_CACHE_DIR = os.path.join(ROOT_DIR, '.http-cache-bodies')
+
+#: Location of the database of rows for date-keyed JSON datasets.
+DATE_ROWS_DB = os.path.join(ROOT_DIR, '.date-rows.sqlite3')
+
+#: Location of the report from the last dataset build.
+REPORT_FILE = os.path.join(ROOT_DIR, '.build-report.json')
+
+#: Location of recorded upstream payloads used for benchmarks.
+FIXTURES_DIR = os.path.join(ROOT_DIR, 'fixtures')
+
 #: Location of the data export directory.
 DATA_DIR = os.path.join(ROOT_DIR, 'htdocs', 'data')
 
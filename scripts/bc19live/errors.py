@@ -1,3 +1,6 @@
+import requests
+
+
 class ParseError(Exception):
     """Error parsing or extracting data from a dataset."""
 
@@ -5,3 +8,31 @@ class ParseError(Exception):
         super(ParseError, self).__init__(message)
 
         self.row = row
+
+    def __reduce__(self):
+        """Return information used to pickle the error.
+
+        This ensures the row is preserved when an error is passed between
+        processes.
+
+        Returns:
+            tuple:
+            The class and arguments used to reconstruct the error.
+        """
+        return (self.__class__, (str(self), self.row))
+
+
+class HostUnavailableError(requests.ConnectionError):
+    """A host is failing, and requests to it are being refused.
+
+    This is raised when a host's circuit breaker is open, after too many
+    consecutive failed requests.
+    """
+
+
+class CKANError(Exception):
+    """Error fetching records from a CKAN datastore.
+
+    This is raised when a request fails, or the server reports an error for
+    a query.
+    """
@@ -0,0 +1,338 @@
+import hashlib
+import json
+import os
+import shutil
+
+import requests
+
+from bc19live.dirs import FIXTURES_DIR
+from bc19live.http import build_response
+
+
+#: Response headers that aren't stored with recorded fixtures.
+#:
+#: Payloads are stored already decoded, so these would no longer be accurate.
+IGNORED_RESPONSE_HEADERS = {
+    'content-encoding',
+    'content-length',
+    'transfer-encoding',
+}
+
+
+class FixtureMissingError(requests.ConnectionError):
+    """A request was made for which no fixture was recorded."""
+
+
+class FixtureStore(object):
+    """A directory of recorded upstream payloads.
+
+    HTTP responses are stored in a :file:`responses` directory, keyed by a
+    hash of the request method, URL, and any form data. Each response has a
+    payload file and a JSON metadata file containing the status code and
+    headers.
+
+    The URLs that were fetched for each dataset are stored in a
+    :file:`datasets` directory, since some URLs contain values that change on
+    every run.
+
+    Local sources (the outputs of other datasets) are stored in a
+    :file:`local` directory, by format and filename.
+    """
+
+    def __init__(self, path=FIXTURES_DIR):
+        """Initialize the store.
+
+        Args:
+            path (str, optional):
+                The path to the fixtures directory.
+        """
+        self.path = path
+
+    def get_response(self, method, url, data=None):
+        """Return a recorded response for a request.
+
+        Args:
+            method (str):
+                The HTTP method.
+
+            url (str):
+                The URL that was requested.
+
+            data (dict, optional):
+                Form data sent with the request.
+
+        Returns:
+            requests.Response:
+            The recorded response, or ``None`` if one was not recorded.
+        """
+        payload_filename = self._get_response_filename(method, url, data)
+
+        try:
+            with open('%s.json' % payload_filename, 'r') as fp:
+                metadata = json.load(fp)
+
+            with open(payload_filename, 'rb') as fp:
+                content = fp.read()
+        except OSError:
+            return None
+
+        return build_response(url=url,
+                              content=content,
+                              status_code=metadata['status_code'],
+                              headers=metadata['headers'])
+
+    def add_response(self, method, url, response, data=None):
+        """Record a response for a request.
+
+        Args:
+            method (str):
+                The HTTP method.
+
+            url (str):
+                The URL that was requested.
+
+            response (requests.Response):
+                The response to record.
+
+            data (dict, optional):
+                Form data sent with the request.
+        """
+        payload_filename = self._get_response_filename(method, url, data)
+        os.makedirs(os.path.dirname(payload_filename), exist_ok=True)
+
+        with open(payload_filename, 'wb') as fp:
+            fp.write(response.content)
+
+        with open('%s.json' % payload_filename, 'w') as fp:
+            json.dump(
+                {
+                    'method': method,
+                    'url': url,
+                    'data': data,
+                    'status_code': response.status_code,
+                    'headers': {
+                        _key: _value
+                        for _key, _value in response.headers.items()
+                        if _key.lower() not in IGNORED_RESPONSE_HEADERS
+                    },
+                },
+                fp,
+                indent=2,
+                sort_keys=True)
+
+    def get_dataset_urls(self, filename):
+        """Return the URLs recorded for a dataset.
+
+        Args:
+            filename (str):
+                The filename of the dataset.
+
+        Returns:
+            dict:
+            A mapping of URL names (``main`` for datasets with a single URL)
+            to URLs, or ``None`` if none were recorded.
+        """
+        try:
+            with open(self._get_dataset_filename(filename), 'r') as fp:
+                return json.load(fp)
+        except OSError:
+            return None
+
+    def set_dataset_urls(self, filename, urls):
+        """Record the URLs fetched for a dataset.
+
+        Args:
+            filename (str):
+                The filename of the dataset.
+
+            urls (dict):
+                A mapping of URL names to URLs.
+        """
+        dataset_filename = self._get_dataset_filename(filename)
+        os.makedirs(os.path.dirname(dataset_filename), exist_ok=True)
+
+        with open(dataset_filename, 'w') as fp:
+            json.dump(urls, fp, indent=2, sort_keys=True)
+
+    def get_local_source_filename(self, local_source):
+        """Return the path to a recorded local source.
+
+        Args:
+            local_source (dict):
+                The local source information from a dataset.
+
+        Returns:
+            str:
+            The path to the recorded file, or ``None`` if it wasn't recorded.
+        """
+        filename = os.path.join(self.path, 'local', local_source['format'],
+                                local_source['filename'])
+
+        if os.path.exists(filename):
+            return filename
+
+        return None
+
+    def add_local_source(self, local_source, filename):
+        """Record a local source.
+
+        Args:
+            local_source (dict):
+                The local source information from a dataset.
+
+            filename (str):
+                The path to the file to record.
+        """
+        dest_dir = os.path.join(self.path, 'local', local_source['format'])
+        os.makedirs(dest_dir, exist_ok=True)
+        shutil.copyfile(filename,
+                        os.path.join(dest_dir, local_source['filename']))
+
+    def _get_dataset_filename(self, filename):
+        """Return the path to the recorded URLs for a dataset.
+
+        Args:
+            filename (str):
+                The filename of the dataset.
+
+        Returns:
+            str:
+            The path to the file.
+        """
+        return os.path.join(self.path, 'datasets', '%s.json' % filename)
+
+    def _get_response_filename(self, method, url, data):
+        """Return the path to a response payload.
+
+        Args:
+            method (str):
+                The HTTP method.
+
+            url (str):
+                The URL that was requested.
+
+            data (dict):
+                Form data sent with the request.
+
+        Returns:
+            str:
+            The path to the payload file.
+        """
+        return os.path.join(self.path, 'responses',
+                            get_request_key(method, url, data))
+
+
+class RecordingSession(requests.Session):
+    """A HTTP session that records every response to a fixture store."""
+
+    def __init__(self, store):
+        """Initialize the session.
+
+        Args:
+            store (FixtureStore):
+                The store to record responses to.
+        """
+        super(RecordingSession, self).__init__()
+
+        self.store = store
+
+    def request(self, method, url, *args, **kwargs):
+        """Perform a request, recording the response.
+
+        Args:
+            method (str):
+                The HTTP method.
+
+            url (str):
+                The URL to request.
+
+            *args (tuple):
+                Positional arguments for the request.
+
+            **kwargs (dict):
+                Keyword arguments for the request.
+
+        Returns:
+            requests.Response:
+            The response.
+        """
+        response = super(RecordingSession, self).request(method, url, *args,
+                                                         **kwargs)
+        self.store.add_response(method, url, response,
+                                data=kwargs.get('data'))
+
+        return response
+
+
+class ReplaySession(requests.Session):
+    """A HTTP session that serves responses from a fixture store.
+
+    No network requests are made. Requests without a recorded fixture raise
+    :py:class:`FixtureMissingError`.
+    """
+
+    def __init__(self, store):
+        """Initialize the session.
+
+        Args:
+            store (FixtureStore):
+                The store to serve responses from.
+        """
+        super(ReplaySession, self).__init__()
+
+        self.store = store
+
+    def request(self, method, url, data=None, **kwargs):
+        """Return a recorded response for a request.
+
+        Args:
+            method (str):
+                The HTTP method.
+
+            url (str):
+                The URL to request.
+
+            data (dict, optional):
+                Form data for the request.
+
+            **kwargs (dict, unused):
+                Other keyword arguments for the request.
+
+        Returns:
+            requests.Response:
+            The recorded response.
+
+        Raises:
+            FixtureMissingError:
+                No response was recorded for this request.
+        """
+        response = self.store.get_response(method, url, data)
+
+        if response is None:
+            raise FixtureMissingError('No fixture recorded for %s %s'
+                                      % (method, url))
+
+        return response
+
+
+def get_request_key(method, url, data=None):
+    """Return a key identifying a request.
+
+    Args:
+        method (str):
+            The HTTP method.
+
+        url (str):
+            The URL that was requested.
+
+        data (dict, optional):
+            Form data sent with the request.
+
+    Returns:
+        str:
+        The key for the request.
+    """
+    return hashlib.sha256(json.dumps(
+        [method.upper(), url, sorted((data or {}).items())]
+    ).encode('utf-8')).hexdigest()
+
@@ -1,8 +1,19 @@
-import json
+import gzip
+import hashlib
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse, urlsplit, urlunsplit
 
 import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
 
-from bc19live.dirs import CACHE_FILE
+from bc19live.dirs import CACHE_FILE, HTTP_BODY_CACHE_DIR, HTTP_CACHE_DB
+from bc19live.httpcache import HTTPCacheStore
+from bc19live.throttle import CircuitBreaker, TokenBucket
 
 
 #: The user agent that this script will identify as.
@@ -16,30 +27,464 @@ USER_AGENT = (
 )
 
 
-http_cache = {}
+#: The default number of URLs that can be prefetched at once.
+DEFAULT_PREFETCH_WORKERS = 8
+
+#: The default number of concurrent prefetches allowed for a single host.
+DEFAULT_PREFETCH_PER_HOST = 2
+
+
+#: The default number of seconds to wait to connect to a server.
+DEFAULT_CONNECT_TIMEOUT = 10
+
+#: The default number of seconds to wait for data from a server.
+DEFAULT_READ_TIMEOUT = 60
+
+#: The default number of times a failed request will be retried.
+DEFAULT_MAX_RETRIES = 3
+
+#: The base number of seconds to wait before retrying a request.
+#:
+#: This doubles for each attempt, up to :py:data:`MAX_RETRY_BACKOFF`, and
+#: a random amount of jitter is applied.
+RETRY_BACKOFF = 1.0
+
+#: The maximum number of seconds to wait before retrying a request.
+MAX_RETRY_BACKOFF = 30.0
+
+#: HTTP status codes that will cause a request to be retried.
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+#: HTTP methods that are safe to retry.
+RETRY_METHODS = {'GET', 'HEAD', 'OPTIONS'}
+
+#: The default number of requests per second allowed to a single host.
+DEFAULT_HOST_RATE = 5.0
+
+#: The default number of requests that can be sent to a host in a burst.
+DEFAULT_HOST_BURST = 10
+
+#: The number of consecutive failures before requests to a host fail fast.
+CIRCUIT_FAILURE_THRESHOLD = 5
+
+#: The number of seconds before a failing host is tried again.
+CIRCUIT_RESET_TIMEOUT = 60
+
+
+#: The size of the chunks read from streamed response bodies.
+STREAM_CHUNK_SIZE = 1024 * 1024
+
+#: Query arguments that are ignored when caching responses.
+#:
+#: These are used to bust caches (for example, ``_=<timestamp>``), and change
+#: on every request. See :py:func:`normalize_url`.
+VOLATILE_QUERY_ARGS = {'_'}
+
+#: Response headers stored along with cached response bodies.
+CACHED_RESPONSE_HEADERS = ['Content-Type']
+
+
+#: The shared HTTP cache.
+http_cache = HTTPCacheStore(HTTP_CACHE_DB)
+
+_offline = False
+_shared_adapter = None
+_shared_adapter_lock = threading.Lock()
+
+_http_settings = {
+    'connect_timeout': DEFAULT_CONNECT_TIMEOUT,
+    'read_timeout': DEFAULT_READ_TIMEOUT,
+    'max_retries': DEFAULT_MAX_RETRIES,
+    'host_rate': DEFAULT_HOST_RATE,
+    'url_map': {},
+}
+_host_controls = {}
+_host_controls_lock = threading.Lock()
 
 
 def load_http_cache():
-    """Load the HTTP cache from disk."""
-    try:
-        with open(CACHE_FILE, 'r') as fp:
-            http_cache.update(json.load(fp))
-    except Exception:
-        http_cache.clear()
+    """Prepare the HTTP cache.
+
+    Entries from the legacy JSON cache file are imported the first time this
+    is called.
+    """
+    if os.path.exists(CACHE_FILE):
+        http_cache.import_json(CACHE_FILE)
+
+
+def enable_shared_connections():
+    """Reuse HTTP connections across sessions.
+
+    By default, each new session has its own connection pool, which is
+    discarded along with the session. Once this is called, new sessions will
+    instead share one pool of connections per host, keeping them alive
+    between requests. This is useful for long-running processes that fetch
+    from the same hosts repeatedly.
+
+    Only the connections are shared. Each session still has its own cookies
+    and headers, so state (such as a Tableau session) isn't shared between
+    datasets.
+    """
+    global _shared_adapter
+
+    with _shared_adapter_lock:
+        if _shared_adapter is None:
+            _shared_adapter = SharedHTTPAdapter()
+
+
+def configure_http(connect_timeout=None, read_timeout=None, max_retries=None,
+                   host_rate=None, url_map=None):
+    """Configure timeouts, retries, and rate limits for HTTP requests.
+
+    This applies to all sessions created by this module. Any options not
+    provided will keep their current values.
+
+    A URL map can be provided to send requests to other servers (such as the
+    stand-in server in :py:mod:`bc19live.standin`). URLs are still cached
+    under their original forms.
+
+    Args:
+        connect_timeout (float, optional):
+            The number of seconds to wait to connect to a server.
 
+        read_timeout (float, optional):
+            The number of seconds to wait for data from a server.
 
-def write_http_cache():
-    """Write the HTTP cache to disk."""
-    with open(CACHE_FILE, 'w') as fp:
-        json.dump(http_cache, fp)
+        max_retries (int, optional):
+            The number of times a failed request will be retried.
+
+        host_rate (float, optional):
+            The number of requests per second allowed to a single host, or
+            0 for no limit.
+
+        url_map (dict, optional):
+            A mapping of URL prefixes to replacement prefixes. Requests to
+            URLs starting with a prefix are sent to the replacement instead.
+            The longest matching prefix is used.
+    """
+    for key, value in (('connect_timeout', connect_timeout),
+                       ('read_timeout', read_timeout),
+                       ('max_retries', max_retries),
+                       ('host_rate', host_rate),
+                       ('url_map', url_map)):
+        if value is not None:
+            _http_settings[key] = value
+
+
+def enable_offline_mode():
+    """Serve all HTTP GET requests from the HTTP cache.
+
+    Once this is called, :py:func:`http_get` will no longer contact any
+    servers. Responses will be built from cached response bodies, and URLs
+    without a cached body will result in a HTTP 504 response.
+    """
+    global _offline
+
+    _offline = True
+
+
+def normalize_url(url):
+    """Return a URL normalized for use as a cache key.
+
+    Query arguments listed in :py:data:`VOLATILE_QUERY_ARGS` are removed.
+    Everything else is left as-is.
+
+    Args:
+        url (str):
+            The URL to normalize.
+
+    Returns:
+        str:
+        The normalized URL.
+    """
+    parts = urlsplit(url)
+
+    if not parts.query:
+        return url
+
+    query = '&'.join(
+        _arg
+        for _arg in parts.query.split('&')
+        if _arg.split('=', 1)[0] not in VOLATILE_QUERY_ARGS
+    )
+
+    return urlunsplit(parts._replace(query=query))
+
+
+def build_response(url, content, status_code=200, headers=None):
+    """Return a HTTP response object for a payload.
+
+    Args:
+        url (str):
+            The URL for the response.
+
+        content (bytes):
+            The response payload.
+
+        status_code (int, optional):
+            The HTTP status code.
+
+        headers (dict, optional):
+            The response headers.
+
+    Returns:
+        requests.Response:
+        The response.
+    """
+    response = requests.Response()
+    response.url = url
+    response.status_code = status_code
+    response.headers = CaseInsensitiveDict(headers or {})
+    response.encoding = requests.utils.get_encoding_from_headers(
+        response.headers)
+    response._content = content
+    response._content_consumed = True
+
+    return response
+
+
+def _create_session():
+    """Return a new session for requests.
+
+    Returns:
+        HTTPSession:
+        The new session. This will use the shared connection pools, if
+        enabled through :py:func:`enable_shared_connections`.
+    """
+    session = HTTPSession()
 
+    if _shared_adapter is not None:
+        session.mount('https://', _shared_adapter)
+        session.mount('http://', _shared_adapter)
 
-def http_get(url, allow_cache=True, session=None):
+    return session
+
+
+def _rewrite_url(url):
+    """Return the URL to send a request to, based on the URL map.
+
+    Args:
+        url (str):
+            The URL being requested.
+
+    Returns:
+        str:
+        The URL to send the request to.
+    """
+    url_map = _http_settings['url_map']
+
+    if url_map:
+        for prefix in sorted(url_map, key=len, reverse=True):
+            if url.startswith(prefix):
+                return url_map[prefix] + url[len(prefix):]
+
+    return url
+
+
+def _get_host_controls(host):
+    """Return the rate limiter and circuit breaker for a host.
+
+    Args:
+        host (str):
+            The host.
+
+    Returns:
+        tuple:
+        A 2-tuple containing:
+
+        1. The :py:class:`~bc19live.throttle.TokenBucket` for the host.
+        2. The :py:class:`~bc19live.throttle.CircuitBreaker` for the host.
+    """
+    with _host_controls_lock:
+        try:
+            return _host_controls[host]
+        except KeyError:
+            host_rate = _http_settings['host_rate']
+            controls = (
+                TokenBucket(rate=host_rate,
+                            capacity=max(DEFAULT_HOST_BURST, host_rate)),
+                CircuitBreaker(host=host,
+                               failure_threshold=CIRCUIT_FAILURE_THRESHOLD,
+                               reset_timeout=CIRCUIT_RESET_TIMEOUT),
+            )
+            _host_controls[host] = controls
+
+            return controls
+
+
+def _get_retry_delay(attempt, response=None):
+    """Return the number of seconds to wait before retrying a request.
+
+    This uses exponential backoff with full jitter. If the server sent a
+    ``Retry-After`` header with a number of seconds, that will be used as a
+    minimum.
+
+    Args:
+        attempt (int):
+            The number of the attempt that failed, starting at 0.
+
+        response (requests.Response, optional):
+            The failed response, if one was received.
+
+    Returns:
+        float:
+        The number of seconds to wait.
+    """
+    delay = random.uniform(0, min(MAX_RETRY_BACKOFF,
+                                  RETRY_BACKOFF * (2 ** attempt)))
+
+    if response is not None:
+        try:
+            delay = max(delay,
+                        min(MAX_RETRY_BACKOFF,
+                            float(response.headers['Retry-After'])))
+        except (KeyError, ValueError):
+            pass
+
+    return delay
+
+
+class SharedHTTPAdapter(HTTPAdapter):
+    """A HTTP adapter whose connection pools are shared between sessions.
+
+    The connection pools are safe to use from multiple threads. Closing a
+    session won't close this adapter, so that other sessions can keep using
+    its connections.
+    """
+
+    def close(self):
+        """Leave the shared connection pools open."""
+
+
+class HTTPSession(requests.Session):
+    """A HTTP session with timeouts, retries, and per-host limits.
+
+    Every request has connect and read timeouts applied (unless the caller
+    provides its own). Requests are limited to a rate per host, and fail
+    fast (with :py:class:`~bc19live.errors.HostUnavailableError`) if a host
+    has failed too many times in a row.
+
+    Safe requests (such as ``GET``) are retried with exponential backoff if
+    the connection fails, times out, or the server responds with a
+    temporary error.
+
+    Requests are sent to a different server if their URLs match the
+    configured URL map.
+
+    These can be configured through :py:func:`configure_http`.
+    """
+
+    def request(self, method, url, *args, **kwargs):
+        """Perform a HTTP request.
+
+        Args:
+            method (str):
+                The HTTP method.
+
+            url (str):
+                The URL to request.
+
+            *args (tuple):
+                Positional arguments for the request.
+
+            **kwargs (dict):
+                Keyword arguments for the request.
+
+        Returns:
+            requests.Response:
+            The response. This may be an error response, if retries were
+            exhausted.
+
+        Raises:
+            bc19live.errors.HostUnavailableError:
+                The host has failed too many times in a row.
+
+            requests.RequestException:
+                The request failed, and retries were exhausted.
+        """
+        # Requests are limited by the host they're for, rather than the host
+        # they're sent to, so that mapped URLs behave like the real ones.
+        rate_limiter, circuit_breaker = \
+            _get_host_controls(urlparse(url).netloc)
+        url = _rewrite_url(url)
+
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = (_http_settings['connect_timeout'],
+                                 _http_settings['read_timeout'])
+
+        if method.upper() in RETRY_METHODS:
+            max_retries = _http_settings['max_retries']
+        else:
+            max_retries = 0
+
+        attempt = 0
+
+        while True:
+            circuit_breaker.before_request()
+            rate_limiter.acquire()
+
+            try:
+                response = super(HTTPSession, self).request(method, url,
+                                                            *args, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                circuit_breaker.record_failure()
+
+                if attempt >= max_retries:
+                    raise
+
+                response = None
+            except Exception:
+                # This isn't worth retrying, but it must still be recorded,
+                # or a trial request through an open circuit would never
+                # finish.
+                circuit_breaker.record_failure()
+                raise
+            else:
+                if response.status_code not in RETRY_STATUS_CODES:
+                    circuit_breaker.record_success()
+
+                    return response
+
+                circuit_breaker.record_failure()
+
+                if attempt >= max_retries:
+                    return response
+
+                response.close()
+
+            time.sleep(_get_retry_delay(attempt, response))
+            attempt += 1
+
+
+def http_get(url, allow_cache=True, session=None, stream=False,
+             headers=None):
     """Perform a HTTP GET request to a server.
 
     This will handle looking up and storing cache details, along with setting
     up session management and standard headers.
 
+    The bodies of successful responses are stored (compressed) in
+    :py:data:`~bc19live.dirs.HTTP_BODY_CACHE_DIR`. If the server reports
+    that the content has not been modified, the cached body will be attached
+    to the HTTP 304 response, and the response's ``from_cache`` attribute
+    will be ``True``. This allows parsers to be re-run without fetching the
+    content again. ``from_cache`` is also set for HTTP 200 responses whose
+    body matches the cached body, for servers that don't support
+    conditional requests.
+
+    Responses are cached by URL, ignoring any volatile query arguments (see
+    :py:func:`normalize_url`).
+
+    If ``stream`` is set, the body will not be loaded into memory. Instead,
+    the response's ``streamed_body`` attribute will be set to a
+    :py:class:`StreamedBody`, which reads the (possibly compressed) body in
+    large chunks, storing it in the cache as it's read. Lines can be read
+    through :py:func:`iter_response_lines`.
+
+    If offline mode is enabled (through :py:func:`enable_offline_mode`), no
+    requests will be made. The response will be built from the cache
+    instead.
+
     Args:
         url (str):
             The URL to retrieve.
@@ -48,7 +493,15 @@ def http_get(url, allow_cache=True, session=None):
             Whether to allow HTTP cache management.
 
         session (requests.Session, optional):
-            An existing session to use. If not provided, one will be created.
+            An existing session to use. If not provided, one will be created
+            (using shared connections, if enabled through
+            :py:func:`enable_shared_connections`).
+
+        stream (bool, optional):
+            Whether to stream the response body.
+
+        headers (dict, optional):
+            Additional headers to send with the request.
 
     Returns:
         tuple:
@@ -58,25 +511,511 @@ def http_get(url, allow_cache=True, session=None):
         2. The response.
     """
     if session is None:
-        session = requests.Session()
+        session = _create_session()
 
     session.headers['User-Agent'] = USER_AGENT
 
-    headers = {}
+    # Volatile query arguments (such as cache-busting timestamps) aren't
+    # part of the cache key, so that the entry can be found again.
+    cache_url = normalize_url(url)
+    cache_entry = http_cache.get(cache_url) or {}
 
-    if allow_cache and url in http_cache:
-        try:
-            headers['If-None-Match'] = http_cache[url]['etag']
-        except KeyError:
-            pass
+    if _offline:
+        return session, _get_cached_response(url, cache_url, cache_entry,
+                                             stream=stream)
 
-    response = session.get(url, headers=headers)
+    headers = dict(headers or {})
 
-    if response.headers.get('etag') and response.status_code == 200:
-        http_cache[url] = {
-            'etag': response.headers['etag'],
+    if allow_cache:
+        if cache_entry.get('etag'):
+            headers['If-None-Match'] = cache_entry['etag']
+
+        if cache_entry.get('last_modified'):
+            headers['If-Modified-Since'] = cache_entry['last_modified']
+
+    if stream:
+        headers.setdefault('Accept-Encoding', 'gzip, deflate')
+
+    response = session.get(url, headers=headers, stream=stream)
+
+    if response.status_code == 200:
+        new_cache_entry = {
+            'etag': response.headers.get('etag'),
+            'last_modified': response.headers.get('last-modified'),
+            'fetched': time.time(),
+            'headers': {
+                _header: response.headers[_header]
+                for _header in CACHED_RESPONSE_HEADERS
+                if _header in response.headers
+            },
         }
 
+        if stream:
+            # The body will be stored in the cache as it's read.
+            new_cache_entry['has_body'] = False
+            response.streamed_body = StreamedBody(response,
+                                                  cache_url=cache_url)
+        else:
+            body_hash = hashlib.sha256(response.content).hexdigest()
+
+            if (cache_entry.get('has_body') and
+                cache_entry.get('body_hash') == body_hash):
+                # Some servers (such as Google Sheets) send the full content
+                # every time, even if it hasn't changed. This is the same
+                # as the cached body, so treat it like a HTTP 304 with the
+                # cached body attached.
+                has_body = True
+                response.from_cache = True
+            else:
+                has_body = _write_cached_body(cache_url, response.content)
+
+            new_cache_entry.update({
+                'body_hash': body_hash,
+                'has_body': has_body,
+            })
+
+        http_cache.set(cache_url, new_cache_entry)
+    elif (response.status_code == 304 and
+          allow_cache and
+          cache_entry.get('has_body')):
+        if stream:
+            response.close()
+            _attach_cached_body(response, cache_url, cache_entry)
+        else:
+            content = _read_cached_body(cache_url)
+
+            if content is not None:
+                response._content = content
+                response.encoding = requests.utils.get_encoding_from_headers(
+                    CaseInsensitiveDict(cache_entry.get('headers', {})))
+                response.from_cache = True
+
     return session, response
 
 
+def iter_response_lines(response):
+    """Iterate through the lines of a response body.
+
+    Streamed responses (see :py:func:`http_get`) are read in large chunks,
+    without loading the whole body into memory. Other responses are read
+    through :py:meth:`requests.Response.iter_lines`.
+
+    Args:
+        response (requests.Response):
+            The HTTP response.
+
+    Yields:
+        bytes:
+        Each line in the body, without any trailing newline.
+    """
+    streamed_body = getattr(response, 'streamed_body', None)
+
+    if streamed_body is None:
+        return response.iter_lines()
+    else:
+        return streamed_body.iter_lines()
+
+
+class StreamedBody(object):
+    """A response body that's read incrementally, in large chunks.
+
+    The body is decoded (if it was sent compressed) as it's read. If a cache
+    URL is provided, the body is also written to the body cache as it's
+    read, and the HTTP cache entry for the URL is updated once the whole body
+    has been read.
+
+    Attributes:
+        hash (str):
+            The SHA-256 hex digest of the body. This is set once the whole
+            body has been read (or up-front, if known from the cache).
+
+        size (int):
+            The number of bytes of the body read so far.
+    """
+
+    def __init__(self, response, cache_url=None, body_hash=None):
+        """Initialize the body.
+
+        Args:
+            response (requests.Response):
+                The HTTP response, which must not have been read yet.
+
+            cache_url (str, optional):
+                The URL to store the body in the cache for.
+
+            body_hash (str, optional):
+                The known hash of the body.
+        """
+        self.response = response
+        self.cache_url = cache_url
+        self.hash = body_hash
+        self.size = 0
+
+    def iter_lines(self):
+        """Iterate through the lines of the body.
+
+        Yields:
+            bytes:
+            Each line in the body, without any trailing newline.
+        """
+        remainder = b''
+
+        for chunk in self.iter_chunks():
+            lines = (remainder + chunk).split(b'\n')
+            remainder = lines.pop()
+
+            for line in lines:
+                if line.endswith(b'\r'):
+                    line = line[:-1]
+
+                yield line
+
+        if remainder:
+            if remainder.endswith(b'\r'):
+                remainder = remainder[:-1]
+
+            yield remainder
+
+    def iter_chunks(self):
+        """Iterate through the decoded body in chunks.
+
+        Yields:
+            bytes:
+            Each chunk of the body.
+        """
+        sha = hashlib.sha256()
+        cache_url = self.cache_url
+        cache_fp = None
+        complete = False
+
+        if cache_url is not None:
+            cache_filename = _get_body_cache_filename(cache_url)
+            temp_filename = _get_body_temp_filename(cache_filename)
+
+            try:
+                os.makedirs(HTTP_BODY_CACHE_DIR, exist_ok=True)
+                cache_fp = gzip.open(temp_filename, 'wb')
+            except OSError:
+                cache_fp = None
+
+        try:
+            for chunk in self.response.iter_content(STREAM_CHUNK_SIZE):
+                sha.update(chunk)
+                self.size += len(chunk)
+
+                if cache_fp is not None:
+                    cache_fp.write(chunk)
+
+                yield chunk
+
+            complete = True
+            self.hash = sha.hexdigest()
+        finally:
+            if cache_fp is not None:
+                cache_fp.close()
+
+                if complete:
+                    os.replace(temp_filename, cache_filename)
+                    http_cache.update(cache_url,
+                                      body_hash=self.hash,
+                                      has_body=True)
+                else:
+                    try:
+                        os.unlink(temp_filename)
+                    except OSError:
+                        pass
+
+
+def _get_body_cache_filename(url):
+    """Return the path to the cached body for a URL.
+
+    Args:
+        url (str):
+            The URL.
+
+    Returns:
+        str:
+        The path to the cached body.
+    """
+    return os.path.join(HTTP_BODY_CACHE_DIR,
+                        '%s.gz' % hashlib.sha256(url.encode('utf-8'))
+                        .hexdigest())
+
+
+def _get_body_temp_filename(filename):
+    """Return the path to write a cached body to before moving it in place.
+
+    The path is unique to the current process and thread, since several
+    build processes may share the cache.
+
+    Args:
+        filename (str):
+            The path to the cached body.
+
+    Returns:
+        str:
+        The path to the temporary file.
+    """
+    return '%s.%d.%d.tmp' % (filename, os.getpid(), threading.get_ident())
+
+
+def _read_cached_body(url):
+    """Return the cached body for a URL.
+
+    Args:
+        url (str):
+            The URL.
+
+    Returns:
+        bytes:
+        The cached body, or ``None`` if it's not cached.
+    """
+    try:
+        with gzip.open(_get_body_cache_filename(url), 'rb') as fp:
+            return fp.read()
+    except (OSError, EOFError):
+        return None
+
+
+def _attach_cached_body(response, url, cache_entry):
+    """Attach the cached body for a URL to a response, to be streamed.
+
+    Args:
+        response (requests.Response):
+            The response to attach the body to.
+
+        url (str):
+            The URL.
+
+        cache_entry (dict):
+            The HTTP cache entry for the URL.
+
+    Returns:
+        bool:
+        ``True`` if the body was attached, or ``False`` if it's not cached.
+    """
+    try:
+        fp = gzip.open(_get_body_cache_filename(url), 'rb')
+    except OSError:
+        return False
+
+    response.raw = fp
+    response._content = False
+    response._content_consumed = False
+    response.encoding = requests.utils.get_encoding_from_headers(
+        CaseInsensitiveDict(cache_entry.get('headers', {})))
+    response.from_cache = True
+    response.streamed_body = StreamedBody(
+        response,
+        body_hash=cache_entry.get('body_hash'))
+
+    return True
+
+
+def _write_cached_body(url, content):
+    """Store the body for a URL in the cache.
+
+    Args:
+        url (str):
+            The URL.
+
+        content (bytes):
+            The body to store.
+
+    Returns:
+        bool:
+        ``True`` if the body was stored, or ``False`` if it could not be.
+    """
+    filename = _get_body_cache_filename(url)
+    temp_filename = _get_body_temp_filename(filename)
+
+    try:
+        os.makedirs(HTTP_BODY_CACHE_DIR, exist_ok=True)
+
+        with gzip.open(temp_filename, 'wb') as fp:
+            fp.write(content)
+
+        os.replace(temp_filename, filename)
+    except OSError:
+        return False
+
+    return True
+
+
+def _get_cached_response(url, cache_url, cache_entry, stream=False):
+    """Return a response for a URL built from the cache.
+
+    Args:
+        url (str):
+            The URL.
+
+        cache_url (str):
+            The normalized URL used as the cache key.
+
+        cache_entry (dict):
+            The HTTP cache entry for the URL.
+
+        stream (bool, optional):
+            Whether to stream the cached body, rather than loading it into
+            memory.
+
+    Returns:
+        requests.Response:
+        The response. This will be a HTTP 200 with the cached body, or a
+        HTTP 504 if there's no cached body.
+    """
+    if cache_entry.get('has_body'):
+        response = build_response(url=url,
+                                  content=None,
+                                  headers=cache_entry.get('headers', {}))
+
+        if stream:
+            if _attach_cached_body(response, cache_url, cache_entry):
+                return response
+        else:
+            response._content = _read_cached_body(cache_url)
+
+            if response._content is not None:
+                response.from_cache = True
+
+                return response
+
+    return build_response(url=url,
+                          content=b'Not available in the HTTP cache.',
+                          status_code=504)
+
+
+class HTTPPrefetcher(object):
+    """Fetches URLs concurrently ahead of when they're needed.
+
+    This is used to issue requests for all URLs that will be needed during a
+    build at once, rather than one at a time as each dataset is built.
+    Responses are held until they're claimed through :py:meth:`get`.
+
+    Each host has a limit on the number of concurrent requests, to avoid
+    overloading any one server.
+    """
+
+    def __init__(self,
+                 max_workers=DEFAULT_PREFETCH_WORKERS,
+                 max_per_host=DEFAULT_PREFETCH_PER_HOST):
+        """Initialize the prefetcher.
+
+        Args:
+            max_workers (int, optional):
+                The maximum number of URLs to fetch at once.
+
+            max_per_host (int, optional):
+                The maximum number of URLs to fetch at once from any single
+                host.
+        """
+        self.max_workers = max_workers
+        self.max_per_host = max_per_host
+
+        self._executor = None
+        self._futures = {}
+        self._claims = {}
+        self._host_semaphores = {}
+        self._lock = threading.Lock()
+
+    def start(self, urls):
+        """Begin fetching URLs in the background.
+
+        Args:
+            urls (list of tuple):
+                A list of ``(url, allow_cache)`` tuples. A URL may be listed
+                more than once, in which case it will only be fetched once,
+                and may be claimed once per listing. Caching will only be
+                allowed if allowed for every listing.
+        """
+        allow_cache_by_url = {}
+
+        for url, allow_cache in urls:
+            allow_cache_by_url[url] = (allow_cache and
+                                       allow_cache_by_url.get(url, True))
+            self._claims[url] = self._claims.get(url, 0) + 1
+
+        if not allow_cache_by_url:
+            return
+
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+
+        for url, allow_cache in allow_cache_by_url.items():
+            self._futures[url] = self._executor.submit(self._fetch,
+                                                       url,
+                                                       allow_cache)
+
+    def get(self, url):
+        """Return the prefetched response for a URL.
+
+        This will wait for the URL to finish fetching, if needed. Once every
+        listing of the URL has claimed the response, it will be released.
+
+        Args:
+            url (str):
+                The URL to return the response for.
+
+        Returns:
+            tuple:
+            A 3-tuple containing the requests session, the response, and the
+            number of seconds spent fetching it. This will be ``None`` if the
+            URL was not prefetched or failed to fetch.
+        """
+        with self._lock:
+            future = self._futures.get(url)
+
+            if future is None:
+                return None
+
+            self._claims[url] -= 1
+
+            if self._claims[url] <= 0:
+                del self._futures[url]
+
+        try:
+            return future.result()
+        except Exception:
+            # The caller will fetch this itself, and report any errors.
+            return None
+
+    def shutdown(self):
+        """Shut down the prefetcher.
+
+        Any unclaimed responses will be released.
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+        self._futures.clear()
+        self._claims.clear()
+
+    def _fetch(self, url, allow_cache):
+        """Fetch a URL, respecting the per-host limits.
+
+        Args:
+            url (str):
+                The URL to fetch.
+
+            allow_cache (bool):
+                Whether to allow HTTP cache management.
+
+        Returns:
+            tuple:
+            A 3-tuple containing the requests session, the response, and the
+            number of seconds spent fetching it.
+        """
+        host = urlparse(url).netloc
+
+        with self._lock:
+            semaphore = self._host_semaphores.get(host)
+
+            if semaphore is None:
+                semaphore = threading.BoundedSemaphore(self.max_per_host)
+                self._host_semaphores[host] = semaphore
+
+        with semaphore:
+            start_time = time.monotonic()
+            session, response = http_get(url, allow_cache=allow_cache)
+
+            return session, response, time.monotonic() - start_time
@@ -0,0 +1,327 @@
+import json
+import sqlite3
+import threading
+
+
+#: The fields stored for each HTTP cache entry.
+HTTP_CACHE_FIELDS = [
+    'etag',
+    'last_modified',
+    'fetched',
+    'headers',
+    'has_body',
+    'body_hash',
+]
+
+
+class HTTPCacheStore(object):
+    """A transactional store for HTTP cache entries.
+
+    Entries are stored in a SQLite database in WAL mode, and are written as
+    soon as they're set. This allows several build processes to share the
+    cache without overwriting each other's entries, and ensures entries
+    aren't lost if a build is interrupted.
+
+    Each thread uses its own connection to the database. Connections are
+    opened the first time they're needed.
+
+    Each entry is a dictionary containing the keys in
+    :py:data:`HTTP_CACHE_FIELDS`.
+
+    The store also holds the state used to incrementally fetch datasets (see
+    :py:mod:`bc19live.incremental` and
+    :py:func:`bc19live.ckan.get_ckan_state`), and the key of the last
+    successful build of each dataset (see :py:mod:`bc19live.buildcache`).
+    """
+
+    #: The number of seconds to wait for another process to release a lock.
+    BUSY_TIMEOUT = 30
+
+    def __init__(self, filename):
+        """Initialize the store.
+
+        Args:
+            filename (str):
+                The path to the database file.
+        """
+        self.filename = filename
+
+        self._local = threading.local()
+
+    def get(self, url):
+        """Return the entry for a URL.
+
+        Args:
+            url (str):
+                The URL.
+
+        Returns:
+            dict:
+            The entry, or ``None`` if the URL is not in the cache.
+        """
+        row = self._get_conn().execute(
+            'SELECT %s FROM http_cache WHERE url = ?'
+            % ', '.join(HTTP_CACHE_FIELDS),
+            (url,)).fetchone()
+
+        if row is None:
+            return None
+
+        entry = dict(zip(HTTP_CACHE_FIELDS, row))
+        entry['headers'] = json.loads(entry['headers'] or '{}')
+        entry['has_body'] = bool(entry['has_body'])
+
+        return entry
+
+    def set(self, url, entry):
+        """Set the entry for a URL, replacing any existing entry.
+
+        Args:
+            url (str):
+                The URL.
+
+            entry (dict):
+                The entry to store. Any missing fields will be stored as
+                empty.
+        """
+        self._get_conn().execute(
+            'INSERT OR REPLACE INTO http_cache (url, %s)'
+            ' VALUES (?, %s)'
+            % (', '.join(HTTP_CACHE_FIELDS),
+               ', '.join('?' for _field in HTTP_CACHE_FIELDS)),
+            [url] + self._serialize_entry(entry))
+
+    def update(self, url, **fields):
+        """Update fields on an existing entry for a URL.
+
+        If there's no entry for the URL, this does nothing.
+
+        Args:
+            url (str):
+                The URL.
+
+            **fields (dict):
+                The fields to update.
+        """
+        assert set(fields).issubset(HTTP_CACHE_FIELDS)
+
+        if not fields:
+            return
+
+        names = list(fields.keys())
+        values = self._serialize_entry(fields, names)
+
+        self._get_conn().execute(
+            'UPDATE http_cache SET %s WHERE url = ?'
+            % ', '.join('%s = ?' % _name for _name in names),
+            values + [url])
+
+    def get_append_state(self, filename):
+        """Return the incremental fetch state for a dataset.
+
+        Args:
+            filename (str):
+                The filename of the dataset.
+
+        Returns:
+            dict:
+            The state, or ``None`` if there is no state for the dataset.
+        """
+        row = self._get_conn().execute(
+            'SELECT state FROM append_state WHERE filename = ?',
+            (filename,)).fetchone()
+
+        if row is None:
+            return None
+
+        return json.loads(row[0])
+
+    def set_append_state(self, filename, state):
+        """Set the incremental fetch state for a dataset.
+
+        Args:
+            filename (str):
+                The filename of the dataset.
+
+            state (dict):
+                The state to store, or ``None`` to remove any stored state.
+        """
+        conn = self._get_conn()
+
+        if state is None:
+            conn.execute('DELETE FROM append_state WHERE filename = ?',
+                         (filename,))
+        else:
+            conn.execute('INSERT OR REPLACE INTO append_state'
+                         ' (filename, state) VALUES (?, ?)',
+                         (filename, json.dumps(state)))
+
+    def get_build_key(self, filename):
+        """Return the key of the last successful build of a dataset.
+
+        Args:
+            filename (str):
+                The filename of the dataset.
+
+        Returns:
+            str:
+            The build key, or ``None`` if there is no recorded build.
+        """
+        row = self._get_conn().execute(
+            'SELECT key FROM build_keys WHERE filename = ?',
+            (filename,)).fetchone()
+
+        if row is None:
+            return None
+
+        return row[0]
+
+    def set_build_key(self, filename, key):
+        """Set the key of the last successful build of a dataset.
+
+        Args:
+            filename (str):
+                The filename of the dataset.
+
+            key (str):
+                The build key, or ``None`` to remove any recorded build.
+        """
+        conn = self._get_conn()
+
+        if key is None:
+            conn.execute('DELETE FROM build_keys WHERE filename = ?',
+                         (filename,))
+        else:
+            conn.execute('INSERT OR REPLACE INTO build_keys'
+                         ' (filename, key) VALUES (?, ?)',
+                         (filename, key))
+
+    def import_json(self, filename):
+        """Import entries from a legacy JSON cache file.
+
+        Entries are only imported once per file. Existing entries in the
+        store take precedence over imported ones.
+
+        Args:
+            filename (str):
+                The path to the JSON cache file.
+        """
+        conn = self._get_conn()
+        meta_key = 'imported:%s' % filename
+
+        if conn.execute('SELECT 1 FROM meta WHERE key = ?',
+                        (meta_key,)).fetchone():
+            return
+
+        try:
+            with open(filename, 'r') as fp:
+                entries = json.load(fp)
+        except Exception:
+            entries = {}
+
+        conn.execute('BEGIN IMMEDIATE')
+
+        try:
+            conn.executemany(
+                'INSERT OR IGNORE INTO http_cache (url, %s)'
+                ' VALUES (?, %s)'
+                % (', '.join(HTTP_CACHE_FIELDS),
+                   ', '.join('?' for _field in HTTP_CACHE_FIELDS)),
+                [
+                    [_url] + self._serialize_entry(_entry)
+                    for _url, _entry in entries.items()
+                    if isinstance(_entry, dict)
+                ])
+            conn.execute('INSERT OR REPLACE INTO meta (key, value)'
+                         ' VALUES (?, ?)',
+                         (meta_key, '1'))
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        else:
+            conn.execute('COMMIT')
+
+    def close(self):
+        """Close the connection for the current thread."""
+        conn = getattr(self._local, 'conn', None)
+
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def _get_conn(self):
+        """Return the database connection for the current thread.
+
+        The connection will be opened and the database set up if needed.
+
+        Returns:
+            sqlite3.Connection:
+            The database connection.
+        """
+        conn = getattr(self._local, 'conn', None)
+
+        if conn is None:
+            # Statements are committed as they're executed, unless a
+            # transaction is explicitly started.
+            conn = sqlite3.connect(self.filename,
+                                   timeout=self.BUSY_TIMEOUT,
+                                   isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS http_cache ('
+                ' url TEXT PRIMARY KEY,'
+                ' etag TEXT,'
+                ' last_modified TEXT,'
+                ' fetched REAL,'
+                ' headers TEXT,'
+                ' has_body INTEGER NOT NULL DEFAULT 0,'
+                ' body_hash TEXT'
+                ')')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS append_state ('
+                ' filename TEXT PRIMARY KEY,'
+                ' state TEXT NOT NULL'
+                ')')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS build_keys ('
+                ' filename TEXT PRIMARY KEY,'
+                ' key TEXT NOT NULL'
+                ')')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS meta ('
+                ' key TEXT PRIMARY KEY,'
+                ' value TEXT'
+                ')')
+
+            self._local.conn = conn
+
+        return conn
+
+    def _serialize_entry(self, entry, fields=HTTP_CACHE_FIELDS):
+        """Return the database values for an entry.
+
+        Args:
+            entry (dict):
+                The entry.
+
+            fields (list of str, optional):
+                The fields to return values for.
+
+        Returns:
+            list:
+            The values for each field.
+        """
+        values = []
+
+        for field in fields:
+            value = entry.get(field)
+
+            if field == 'headers':
+                value = json.dumps(value or {})
+            elif field == 'has_body':
+                value = int(bool(value))
+
+            values.append(value)
+
+        return values
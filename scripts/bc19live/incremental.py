@@ -0,0 +1,279 @@
+import hashlib
+import time
+
+from bc19live.http import build_response, http_cache, http_get
+from bc19live.utils import parse_csv
+
+
+#: The number of bytes before the last processed offset used to verify that
+#: previously-processed content has not changed.
+APPEND_TAIL_SIZE = 4096
+
+#: The number of seconds after which an append-only dataset is fully fetched
+#: again.
+#:
+#: Only the end of the previously-processed content is verified when fetching
+#: incrementally, so this ensures that any changes to older rows are
+#: eventually picked up.
+APPEND_FULL_FETCH_INTERVAL = 7 * 24 * 60 * 60
+
+
+def can_fetch_appended(info, parser):
+    """Return whether a URL dataset can be fetched incrementally.
+
+    Datasets must be marked with ``append_only``, and must be parsed by
+    :py:func:`~bc19live.utils.parse_csv` from a single URL without
+    streaming. ``end_if`` and ``delta`` columns aren't supported, since they
+    depend on the rows that come before.
+
+    Args:
+        info (dict):
+            The dataset information.
+
+        parser (callable):
+            The parser for the dataset.
+
+    Returns:
+        bool:
+        ``True`` if the dataset can be fetched incrementally.
+    """
+    if (not info.get('append_only') or
+        'url' not in info or
+        info.get('stream') or
+        parser is not parse_csv):
+        return False
+
+    csv_info = info.get('csv', {})
+    default_type = csv_info.get('default_type')
+
+    return ('end_if' not in csv_info and
+            not any(
+                _col_info.get('type', default_type) == 'delta'
+                for _col_info in csv_info.get('columns', [])
+            ))
+
+
+def get_append_state(filename, url, parser_key):
+    """Return the stored incremental fetch state for a URL dataset.
+
+    Args:
+        filename (str):
+            The filename of the dataset.
+
+        url (str):
+            The URL for the dataset.
+
+        parser_key (str):
+            The build key for the parser and dataset information, without
+            any inputs.
+
+    Returns:
+        dict:
+        The state, or ``None`` if the dataset must be fully fetched. This is
+        the case if it hasn't been fully fetched before, if its URL, parser,
+        or dataset information have changed since, or if it was last fully
+        fetched more than :py:data:`APPEND_FULL_FETCH_INTERVAL` seconds ago.
+    """
+    state = http_cache.get_append_state(filename)
+
+    if (state is None or
+        state.get('url') != url or
+        state.get('parser_key') != parser_key or
+        (time.time() - state.get('full_fetched', 0) >=
+         APPEND_FULL_FETCH_INTERVAL)):
+        return None
+
+    return state
+
+
+def save_append_state(filename, state):
+    """Store the incremental fetch state for a URL dataset.
+
+    Args:
+        filename (str):
+            The filename of the dataset.
+
+        state (dict):
+            The state to store, or ``None`` to remove any stored state.
+    """
+    http_cache.set_append_state(filename, state)
+
+
+def fetch_appended(url, state, session=None):
+    """Fetch content appended to a URL since it was last processed.
+
+    This performs a HTTP Range request starting a short distance before the
+    end of the previously-processed content. That leading content is
+    compared against the stored hash, to make sure nothing before it has
+    changed.
+
+    Args:
+        url (str):
+            The URL to fetch.
+
+        state (dict):
+            The stored incremental fetch state.
+
+        session (requests.Session, optional):
+            The HTTP session to use.
+
+    Returns:
+        tuple:
+        A 3-tuple containing:
+
+        1. The requests session.
+        2. The response.
+        3. The new content (as complete lines), an empty byte string if
+           nothing has been appended, or ``None`` if the content could not be
+           fetched incrementally. In that case, if the response is a HTTP
+           200, it contains the full content.
+    """
+    tail_size = state['tail_size']
+    start = state['offset'] - tail_size
+    headers = {
+        # Ranges must apply to the uncompressed content.
+        'Accept-Encoding': 'identity',
+        'Range': 'bytes=%d-' % start,
+    }
+
+    if state.get('etag'):
+        headers['If-None-Match'] = state['etag']
+
+    session, response = http_get(url,
+                                 allow_cache=False,
+                                 session=session,
+                                 headers=headers)
+
+    if response.status_code == 304:
+        return session, response, b''
+
+    if (response.status_code != 206 or
+        not response.headers.get('Content-Range', '').startswith(
+            'bytes %d-' % start)):
+        return session, response, None
+
+    content = response.content
+
+    if (len(content) < tail_size or
+        (hashlib.sha256(content[:tail_size]).hexdigest() !=
+         state['tail_hash'])):
+        # The previously-processed content has changed.
+        return session, response, None
+
+    new_content = content[tail_size:]
+
+    # Only process complete lines. Anything after will be fetched again
+    # next time.
+    return session, response, new_content[:new_content.rfind(b'\n') + 1]
+
+
+def build_appended_response(url, state, new_content):
+    """Return a response containing the header and appended content.
+
+    Args:
+        url (str):
+            The URL the content was fetched from.
+
+        state (dict):
+            The stored incremental fetch state.
+
+        new_content (bytes):
+            The appended content.
+
+    Returns:
+        requests.Response:
+        A response that can be passed to
+        :py:func:`~bc19live.utils.parse_csv`.
+    """
+    header = ''.join(
+        '%s\n' % _line
+        for _line in state['header']
+    ).encode('utf-8')
+
+    return build_response(url=url,
+                          content=header + new_content)
+
+
+def build_full_append_state(info, response, parser_key):
+    """Return new incremental fetch state after a full fetch.
+
+    Args:
+        info (dict):
+            The dataset information.
+
+        response (requests.Response):
+            The response containing the full content.
+
+        parser_key (str):
+            The build key for the parser and dataset information, without
+            any inputs.
+
+    Returns:
+        dict:
+        The new state, or ``None`` if the content can't be fetched
+        incrementally (for instance, if it doesn't end with a complete
+        line).
+    """
+    content = response.content
+    header_count = info.get('csv', {}).get('skip_rows', 0) + 1
+    header = content.split(b'\n', header_count)[:header_count]
+    tail = content[-APPEND_TAIL_SIZE:]
+
+    if not tail.endswith(b'\n') or len(header) < header_count:
+        return None
+
+    try:
+        header = [
+            _line.rstrip(b'\r').decode('utf-8')
+            for _line in header
+        ]
+    except UnicodeDecodeError:
+        return None
+
+    return {
+        'url': info['url'],
+        'header': header,
+        'offset': len(content),
+        'tail_size': len(tail),
+        'tail_hash': hashlib.sha256(tail).hexdigest(),
+        'etag': response.headers.get('etag'),
+        'parser_key': parser_key,
+        'full_fetched': time.time(),
+    }
+
+
+def advance_append_state(state, response, new_content):
+    """Return new incremental fetch state after an incremental fetch.
+
+    Args:
+        state (dict):
+            The incremental fetch state used for the fetch.
+
+        response (requests.Response):
+            The HTTP 206 response for the fetch.
+
+        new_content (bytes):
+            The appended content that was processed.
+
+    Returns:
+        dict:
+        The new state.
+    """
+    content = response.content
+    tail_size = state['tail_size']
+    tail = (content[:tail_size] + new_content)[-APPEND_TAIL_SIZE:]
+
+    if len(content) - tail_size == len(new_content):
+        etag = response.headers.get('etag')
+    else:
+        # There's an incomplete line at the end. Don't let the server report
+        # this content as unchanged next time, or the rest of the line will
+        # never be fetched.
+        etag = None
+
+    return dict(state, **{
+        'offset': state['offset'] + len(new_content),
+        'tail_size': len(tail),
+        'tail_hash': hashlib.sha256(tail).hexdigest(),
+        'etag': etag,
+    })
@@ -1,33 +1,103 @@
+import argparse
+import json
+import multiprocessing
 import os
 import sys
+import time
 import traceback
+from concurrent.futures import ProcessPoolExecutor
 from contextlib import contextmanager
-from importlib import import_module
-from itertools import chain
-
-from bc19live.dirs import DATA_DIR
-from bc19live.errors import ParseError
-from bc19live.http import load_http_cache, http_get, write_http_cache
-from bc19live.utils import parse_csv
+from functools import partial
+
+from bc19live.buildcache import (get_build_key, hash_bytes, hash_file,
+                                 is_build_current, record_build)
+from bc19live.ckan import (build_ckan_csv_response,
+                           can_fetch_ckan_incrementally, fetch_ckan_records,
+                           get_ckan_date_column, get_ckan_state,
+                           normalize_ckan_date, save_ckan_state)
+from bc19live.daemon import (DEFAULT_POLL_INTERVAL,
+                             DEFAULT_REBUILD_INTERVAL,
+                             run_daemon)
+from bc19live.dirs import DATA_DIR, REPORT_FILE
+from bc19live.errors import CKANError, ParseError
+from bc19live.http import (DEFAULT_CONNECT_TIMEOUT, DEFAULT_HOST_RATE,
+                           DEFAULT_MAX_RETRIES, DEFAULT_READ_TIMEOUT,
+                           HTTPPrefetcher, configure_http,
+                           enable_offline_mode, enable_shared_connections,
+                           load_http_cache, http_get)
+from bc19live.incremental import (advance_append_state,
+                                  build_appended_response,
+                                  build_full_append_state,
+                                  can_fetch_appended, fetch_appended,
+                                  get_append_state, save_append_state)
+from bc19live.registry import DatasetRegistry
+from bc19live.report import DatasetReport, RunReport
+from bc19live.scheduler import (DEFAULT_MAX_WORKERS, get_local_sources,
+                                get_named_local_sources, run_scheduled)
+from bc19live.utils import (collect_output_rows, get_output_filenames,
+                            materialize_json_date_rows, parse_csv)
 
 
 #: The list of dataset module names.
+#:
+#: The order does not matter. Datasets that depend on other datasets (through
+#: their local sources) are built once those datasets have been built.
+#:
+#: Each module must be listed in
+#: :py:data:`bc19live.registry.DATASET_MANIFEST`.
 DATASET_MODULE_NAMES = [
     #'vaccination_stats',
     'wastewater',
-
-    # These must be last.
     #'timeline',
     'bc19_dashboard',
 ]
 
 
-def _get_urls(urls, allow_cache):
+def _get_out_filename(info):
+    """Return the output filename for a dataset.
+
+    Args:
+        info (dict):
+            The dataset information.
+
+    Returns:
+        str:
+        The absolute path to the output file.
+    """
+    return os.path.join(DATA_DIR, info['format'], info['filename'])
+
+
+def _has_outputs(info):
+    """Return whether all output files for a dataset exist.
+
+    If any are missing (such as a Parquet file for a dataset that was last
+    built without :py:mod:`pyarrow`), cached responses and build keys can't
+    be used to skip building the dataset.
+
+    Args:
+        info (dict):
+            The dataset information.
+
+    Returns:
+        bool:
+        ``True`` if every output file exists.
+    """
+    return all(
+        os.path.exists(_filename)
+        for _filename in get_output_filenames(_get_out_filename(info), info)
+    )
+
+
+def _get_urls(urls, allow_cache, prefetcher=None, dataset_report=None,
+              stream=False):
     """Return responses and up-to-date information from URLs.
 
     This takes a dictionary of keys to URLs and fetches each one, returning
     information on the up-to-date status of each and the response payloads.
 
+    If a URL was already fetched by the prefetcher, that response will be
+    used instead of fetching it again.
+
     If any URLs fails, an error will be logged and the URL information will
     be excluded from the results.
 
@@ -38,6 +108,16 @@ def _get_urls(urls, allow_cache):
         allow_cache (bool):
             Whether to allow a cached entry to be used.
 
+        prefetcher (bc19live.http.HTTPPrefetcher, optional):
+            The prefetcher that may contain responses for the URLs.
+
+        dataset_report (bc19live.report.DatasetReport, optional):
+            The report to record HTTP timings and sizes in.
+
+        stream (bool, optional):
+            Whether to stream the response bodies, rather than loading them
+            into memory.
+
     Returns:
         tuple:
         A tuple of:
@@ -52,15 +132,35 @@ def _get_urls(urls, allow_cache):
     urls_up_to_date = {}
 
     for url_name, url in urls.items():
-        session, response = \
-            http_get(url,
-                     allow_cache=allow_cache,
-                     session=session)
+        prefetched = None
+
+        if prefetcher is not None:
+            prefetched = prefetcher.get(url)
+
+        if prefetched is None:
+            start_time = time.monotonic()
+            session, response = \
+                http_get(url,
+                         allow_cache=allow_cache,
+                         session=session,
+                         stream=stream)
+            elapsed = time.monotonic() - start_time
+        else:
+            session, response, elapsed = prefetched
+
+        if dataset_report is not None:
+            dataset_report.add_response(response, elapsed)
 
         if response.status_code == 200:
+            # If the body matches the cached body (some servers never send
+            # HTTP 304s), the build cache will find that the parser doesn't
+            # need to run again.
             up_to_date = False
         elif response.status_code == 304:
-            up_to_date = True
+            # If the cached body was attached to the response, let the build
+            # cache decide whether the parser needs to run again (for
+            # instance, after the parser has changed).
+            up_to_date = not getattr(response, 'from_cache', False)
         else:
             sys.stderr.write('HTTP error %s while fetching %s: %s'
                              % (response.status_code, url,
@@ -75,6 +175,29 @@ def _get_urls(urls, allow_cache):
     return results, session
 
 
+def _get_local_source_filename(local_source):
+    """Return the filename for a local source.
+
+    If the local source is built a date row at a time, its JSON file will be
+    written first, if needed (see
+    :py:func:`~bc19live.utils.materialize_json_date_rows`).
+
+    Args:
+        local_source (dict):
+            The local source information.
+
+    Returns:
+        str:
+        The path to the local source.
+    """
+    filename = os.path.join(DATA_DIR,
+                            local_source['format'],
+                            local_source['filename'])
+    materialize_json_date_rows(filename)
+
+    return filename
+
+
 @contextmanager
 def _open_local_sources(local_sources):
     """Open one or more local sources for reading.
@@ -93,9 +216,7 @@ def _open_local_sources(local_sources):
     fps = {}
 
     for source_name, local_source in local_sources.items():
-        source_filename = os.path.join(DATA_DIR,
-                                       local_source['format'],
-                                       local_source['filename'])
+        source_filename = _get_local_source_filename(local_source)
 
         if not os.path.exists(source_filename):
             with open(source_filename, 'w') as out_fp:
@@ -110,6 +231,573 @@ def _open_local_sources(local_sources):
             fp.close()
 
 
+def get_parser(info):
+    """Return the parser for a dataset.
+
+    Args:
+        info (dict):
+            The dataset information.
+
+    Returns:
+        callable:
+        The parser, or ``None`` if one was not specified and there is no
+        default for the dataset's format.
+    """
+    parser = info.get('parser')
+
+    if parser is None and info['format'] == 'csv':
+        parser = parse_csv
+
+    return parser
+
+
+def _parse_local_sources(info, out_filename):
+    """Run a dataset's parser on its local sources.
+
+    Args:
+        info (dict):
+            The dataset information. This must contain a ``local_source`` or
+            ``local_sources`` key.
+
+        out_filename (str):
+            The filename for the file to write.
+
+    Returns:
+        object:
+        The result of the parser.
+
+    Raises:
+        bc19live.errors.ParseError:
+            The parser failed to parse the data.
+    """
+    parser = get_parser(info)
+
+    with _open_local_sources(get_named_local_sources(info)) as fps:
+        if 'local_source' in info:
+            return parser(info=info,
+                          in_fp=fps['main'],
+                          out_filename=out_filename)
+        else:
+            return parser(info=info,
+                          in_fps=fps,
+                          out_filename=out_filename)
+
+
+def _parse_local_sources_in_process(module_name, filename):
+    """Run a dataset's parser on its local sources in a worker process.
+
+    The dataset information is looked up again in the worker process, since
+    it may contain functions that can't be passed between processes.
+
+    Args:
+        module_name (str):
+            The name of the dataset module containing the dataset.
+
+        filename (str):
+            The filename of the dataset.
+
+    Returns:
+        tuple:
+        A tuple of:
+
+        1. The result of the parser.
+        2. A mapping of filenames to the number of rows written to them (see
+           :py:func:`~bc19live.utils.collect_output_rows`).
+
+    Raises:
+        bc19live.errors.ParseError:
+            The parser failed to parse the data.
+
+        KeyError:
+            The dataset could not be found.
+    """
+    info = DatasetRegistry([module_name]).get_dataset(filename)
+
+    with collect_output_rows({}) as output_rows:
+        result = _parse_local_sources(info, _get_out_filename(info))
+
+    return result, output_rows
+
+
+def _build_dataset(entry, registry, prefetcher=None, report=None,
+                   process_pool=None, use_build_cache=True):
+    """Build a single dataset.
+
+    This will handle loading the dataset's module, pulling down files via
+    HTTP(S) or opening local sources, running them through a parser, and
+    then listing the state of the dataset.
+
+    Datasets with a ``url`` that are flagged as ``append_only`` are fetched
+    incrementally where possible (see :py:mod:`bc19live.incremental`). Only
+    the content appended since the last build is requested, and the new rows
+    are merged into the existing output.
+
+    Datasets with a ``ckan`` source are queried from a CKAN datastore (see
+    :py:mod:`bc19live.ckan`), with filtering done by the server. Once built,
+    only records with dates after the latest one seen are fetched and merged
+    into the existing output.
+
+    Any errors will be logged, and will not be raised to the caller.
+
+    Args:
+        entry (dict):
+            The dataset's manifest entry.
+
+        registry (bc19live.registry.DatasetRegistry):
+            The registry used to load the dataset information.
+
+        prefetcher (bc19live.http.HTTPPrefetcher, optional):
+            The prefetcher that may contain responses for the dataset's URLs.
+
+        report (bc19live.report.RunReport, optional):
+            The run report to record timings and sizes in.
+
+        process_pool (concurrent.futures.ProcessPoolExecutor, optional):
+            A process pool used to run parsers for datasets with local sources
+            that are flagged as ``cpu_bound``.
+
+        use_build_cache (bool, optional):
+            Whether to skip running the parser if its inputs, dataset
+            information, and code all match the last successful build.
+
+            Parsers may make follow-up requests of their own (as Tableau
+            parsers do) or include the current date or time in their
+            results, so they're only skipped if they're known to depend on
+            nothing but their inputs. This is the case for
+            :py:func:`~bc19live.utils.parse_csv`, and for datasets that set
+            ``build_cache`` to ``True``.
+    """
+    filename = entry['filename']
+    out_filename = _get_out_filename(entry)
+    out_dir = os.path.dirname(out_filename)
+
+    if report is None:
+        dataset_report = DatasetReport(filename)
+    else:
+        dataset_report = report.add_dataset(filename)
+
+    dataset_report.start()
+
+    try:
+        info = registry.get_dataset(filename)
+    except Exception as e:
+        sys.stderr.write('Unable to load dataset %s: %s\n' % (filename, e))
+        dataset_report.finish('error')
+        return
+
+    if not os.path.exists(out_dir):
+        os.makedirs(out_dir, exist_ok=True)
+
+    allow_cache = _has_outputs(info)
+    parser = get_parser(info)
+    build_key = None
+    result = None
+    up_to_date = False
+    skipped = False
+    output_rows = {}
+    skip_unchanged_inputs = info.get('build_cache', parser is parse_csv)
+
+    def _check_build_cache(input_hashes, allow_skip=True):
+        # Compute a key for this build, and check if the last build used the
+        # same inputs, dataset information, and parser code. If so, and the
+        # output still exists, there's nothing to do.
+        nonlocal build_key
+
+        build_key = get_build_key(info, parser, input_hashes)
+
+        return (allow_skip and
+                use_build_cache and
+                allow_cache and
+                is_build_current(filename, build_key))
+
+    def _run_parser(**kwargs):
+        start_time = time.monotonic()
+
+        try:
+            with collect_output_rows(output_rows):
+                return parser(info=info,
+                              out_filename=out_filename,
+                              **kwargs)
+        finally:
+            dataset_report.parse_time += time.monotonic() - start_time
+
+    try:
+        if 'url' in info:
+            url = info['url']
+            can_append = can_fetch_appended(info, parser)
+            append_state = None
+            new_content = None
+            url_result = None
+            session = None
+
+            if can_append:
+                # Only content appended since the last build is fetched, and
+                # the new rows are merged into the existing output. The
+                # parser and dataset information must not have changed since
+                # the last full fetch, and a full fetch is made periodically
+                # to pick up changes to older rows.
+                parser_key = get_build_key(info, parser, {})
+
+                if allow_cache and use_build_cache:
+                    append_state = get_append_state(filename, url,
+                                                    parser_key)
+
+            if append_state is not None:
+                start_time = time.monotonic()
+                session, response, new_content = fetch_appended(
+                    url, append_state)
+                dataset_report.add_response(response,
+                                            time.monotonic() - start_time)
+
+                if new_content is None:
+                    if response.status_code == 200:
+                        # The server sent the full content instead.
+                        url_result = {
+                            'response': response,
+                            'up_to_date': False,
+                        }
+                elif new_content:
+                    result = _run_parser(
+                        response=build_appended_response(url, append_state,
+                                                         new_content),
+                        session=session,
+                        merge_existing=True)
+
+                    append_state = advance_append_state(append_state,
+                                                        response,
+                                                        new_content)
+                    save_append_state(filename, append_state)
+                    build_key = get_build_key(info, parser, {
+                        'main': append_state['tail_hash'],
+                        'offset': str(append_state['offset']),
+                    })
+                else:
+                    up_to_date = True
+
+            if new_content is None:
+                if url_result is None:
+                    url_results, session = _get_urls(
+                        urls={
+                            'main': url,
+                        },
+                        allow_cache=allow_cache,
+                        prefetcher=prefetcher,
+                        dataset_report=dataset_report,
+                        stream=info.get('stream', False))
+                    url_result = url_results.get('main')
+
+                    if not url_result:
+                        dataset_report.finish('error')
+                        return
+
+                response = url_result['response']
+                streamed_body = getattr(response, 'streamed_body', None)
+
+                if streamed_body is None:
+                    content_hash = hash_bytes(response.content)
+                else:
+                    # The body hasn't been loaded. If it's coming from the
+                    # cache, its hash is already known. Otherwise, it's new
+                    # content.
+                    content_hash = streamed_body.hash
+
+                if url_result['up_to_date']:
+                    up_to_date = True
+                else:
+                    if _check_build_cache(
+                            {
+                                'main': content_hash,
+                            },
+                            allow_skip=skip_unchanged_inputs):
+                        up_to_date = True
+                    else:
+                        result = _run_parser(response=response,
+                                             session=session)
+
+                        if streamed_body is not None:
+                            # The hash is available now that the body has
+                            # been read.
+                            build_key = get_build_key(info, parser, {
+                                'main': streamed_body.hash,
+                            })
+
+                            if response.status_code == 200:
+                                dataset_report.response_bytes += \
+                                    streamed_body.size
+
+                    if can_append and result is not False:
+                        # The output matches the full content, so later
+                        # builds can fetch only what's appended to it.
+                        save_append_state(
+                            filename,
+                            build_full_append_state(info, response,
+                                                    parser_key))
+        elif 'ckan' in info:
+            ckan_info = info['ckan']
+            can_fetch_incrementally = can_fetch_ckan_incrementally(info,
+                                                                   parser)
+            ckan_state = None
+
+            if can_fetch_incrementally:
+                # Only records from the latest date seen by the last build
+                # onward are fetched, and then merged into the existing
+                # output, replacing the rows for that date. The parser and
+                # dataset information must not have changed since the last
+                # full fetch, and a full fetch is made periodically to pick
+                # up revisions to older records.
+                parser_key = get_build_key(info, parser, {})
+
+                if allow_cache and use_build_cache:
+                    ckan_state = get_ckan_state(filename, ckan_info,
+                                                parser_key)
+
+            if ckan_state is None:
+                since = None
+            else:
+                since = ckan_state['last_seen']
+
+            session, fields, records = fetch_ckan_records(
+                ckan_info,
+                since=since,
+                on_response=dataset_report.add_response)
+            response = build_ckan_csv_response(ckan_info, fields, records)
+            input_hashes = {
+                'main': hash_bytes(response.content),
+            }
+
+            if since is not None:
+                input_hashes['since'] = since
+
+            if _check_build_cache(input_hashes,
+                                  allow_skip=skip_unchanged_inputs):
+                up_to_date = True
+            elif since is not None:
+                result = _run_parser(
+                    response=response,
+                    session=session,
+                    merge_existing=True,
+                    replace_from=(get_ckan_date_column(info),
+                                  normalize_ckan_date(since)))
+            else:
+                result = _run_parser(response=response,
+                                     session=session)
+
+            if can_fetch_incrementally:
+                save_ckan_state(filename, ckan_info, parser_key, records,
+                                state=ckan_state)
+        elif 'urls' in info:
+            urls = info['urls']
+            url_results, session = _get_urls(
+                urls=urls,
+                allow_cache=allow_cache,
+                prefetcher=prefetcher,
+                dataset_report=dataset_report)
+
+            if len(url_results) != len(urls):
+                # One of them failed. Bail.
+                dataset_report.finish('error')
+                return
+
+            all_up_to_date = all(
+                _url_result['up_to_date']
+                for _url_result in url_results.values()
+            )
+
+            responses = {
+                _key: _value['response']
+                for _key, _value in url_results.items()
+            }
+
+            if (all_up_to_date or
+                _check_build_cache(
+                    {
+                        _key: hash_bytes(_response.content)
+                        for _key, _response in responses.items()
+                    },
+                    allow_skip=skip_unchanged_inputs)):
+                up_to_date = True
+            else:
+                result = _run_parser(responses=responses,
+                                     session=session)
+        elif 'local_source' in info or 'local_sources' in info:
+            input_hashes = {
+                _local_source['filename']: hash_file(
+                    _get_local_source_filename(_local_source))
+                for _local_source in get_local_sources(info)
+            }
+
+            if _check_build_cache(input_hashes,
+                                  allow_skip=skip_unchanged_inputs):
+                up_to_date = True
+            else:
+                start_time = time.monotonic()
+
+                try:
+                    if process_pool is not None and info.get('cpu_bound'):
+                        # Run this in a separate process, so that it can
+                        # make use of another CPU core.
+                        result, process_output_rows = process_pool.submit(
+                            _parse_local_sources_in_process,
+                            registry.get_module_name(filename),
+                            filename).result()
+                        output_rows.update(process_output_rows)
+                    else:
+                        with collect_output_rows(output_rows):
+                            result = _parse_local_sources(info,
+                                                          out_filename)
+                finally:
+                    dataset_report.parse_time += (time.monotonic() -
+                                                  start_time)
+        else:
+            sys.stderr.write('Invalid feed entry: %r\n' % info)
+            dataset_report.finish('error')
+            return
+
+        if not up_to_date and result is not False:
+            # Datasets built a date row at a time only update their stored
+            # rows. Write out the JSON file, for publishing and for other
+            # datasets.
+            with collect_output_rows(output_rows):
+                materialize_json_date_rows(out_filename)
+    except CKANError as e:
+        sys.stderr.write('%s\n' % e)
+        dataset_report.finish('error')
+        return
+    except ParseError as e:
+        sys.stderr.write('Data parse error while building %s: %s\n'
+                         % (filename, e))
+
+        if e.row is not None:
+            sys.stderr.write('Row: %r\n' % e.row)
+
+        dataset_report.finish('error')
+        return
+    except Exception as e:
+        sys.stderr.write('Unexpected error while building %s: %s\n'
+                         % (filename, e))
+        traceback.print_exc()
+        dataset_report.finish('error')
+        return
+
+    skipped = (result is False)
+
+    if up_to_date:
+        print('Up-to-date: %s' % out_filename)
+        dataset_report.finish('up-to-date')
+    elif skipped:
+        print('Skipped %s' % out_filename)
+        dataset_report.finish('skipped')
+    else:
+        print('Wrote %s' % out_filename)
+        record_build(filename, build_key)
+        dataset_report.add_output(out_filename,
+                                  rows=output_rows.get(out_filename))
+        dataset_report.finish('written')
+
+
+def build_datasets(datasets, registry, jobs=DEFAULT_MAX_WORKERS,
+                   prefetch=True, process_pool=None, use_build_cache=True,
+                   quiet=False):
+    """Build a list of datasets.
+
+    This will build a dependency graph of the datasets (based on their local
+    sources), and build them concurrently. A dataset is only built once all
+    the datasets it depends on have been built.
+
+    Once finished, a report of HTTP, parse, and write timings and sizes for
+    each dataset is written to :py:data:`~bc19live.dirs.REPORT_FILE`. (HTTP
+    cache entries and build keys are written as responses arrive and builds
+    finish.)
+
+    Dataset modules are loaded from the registry only as they're needed.
+
+    Args:
+        datasets (list of dict):
+            The manifest entries for the datasets to build.
+
+        registry (bc19live.registry.DatasetRegistry):
+            The registry used to load dataset information.
+
+        jobs (int, optional):
+            The maximum number of datasets to build at once.
+
+        prefetch (bool, optional):
+            Whether to fetch all URLs up-front and concurrently.
+
+        process_pool (concurrent.futures.ProcessPoolExecutor, optional):
+            A process pool used to run CPU-bound parsers.
+
+        use_build_cache (bool, optional):
+            Whether to skip datasets whose inputs, dataset information, and
+            parser code all match the last successful build.
+
+        quiet (bool, optional):
+            Whether to skip printing the table of timings and sizes.
+
+    Returns:
+        bc19live.report.RunReport:
+        The report for the build.
+    """
+    # Begin fetching every URL we'll need. Datasets will claim these
+    # responses as they're built.
+    prefetcher = HTTPPrefetcher()
+
+    if prefetch:
+        prefetch_urls = []
+
+        for entry in datasets:
+            try:
+                info = registry.get_dataset(entry['filename'])
+            except Exception:
+                # This will be reported when building the dataset.
+                continue
+
+            allow_cache = _has_outputs(info)
+
+            if info.get('stream'):
+                # These are fetched when built, so that the connection isn't
+                # held open until the body is read.
+                continue
+            elif can_fetch_appended(info, get_parser(info)):
+                # These may only need the content appended since the last
+                # build, which is fetched when built.
+                continue
+            elif 'url' in info:
+                prefetch_urls.append((info['url'], allow_cache))
+            elif 'urls' in info:
+                prefetch_urls += [
+                    (_url, allow_cache)
+                    for _url in info['urls'].values()
+                ]
+
+        prefetcher.start(prefetch_urls)
+
+    report = RunReport()
+
+    try:
+        run_scheduled(
+            datasets=datasets,
+            build_func=partial(_build_dataset,
+                               registry=registry,
+                               prefetcher=prefetcher,
+                               report=report,
+                               process_pool=process_pool,
+                               use_build_cache=use_build_cache),
+            max_workers=max(jobs, 1))
+    finally:
+        prefetcher.shutdown()
+
+    # Record how long everything took.
+    report.finish()
+    report.write(REPORT_FILE)
+
+    if not quiet:
+        print()
+        report.print_table()
+
+    return report
+
+
 def main():
     """Main function for building datasets.
 
@@ -117,165 +805,217 @@ def main():
     special ``--not-timeline`` argument that excludes the ``timeline.csv``,
     ``timeline.json``, and ``timeline.min.json`` files.
 
-    Once the options are chosen, this will run through :py:data:`DATASETS` and
-    handle pulling down files via HTTP(S), running them through a parser,
-    possibly building exports, and then listing the states of that feed.
+    Once the options are chosen, this will build the selected datasets
+    concurrently (see :py:func:`build_datasets`). Each dataset is built by
+    pulling down files via HTTP(S), running them through a parser, possibly
+    building exports, and then listing the states of that feed.
+
+    The number of datasets built at once can be controlled with ``--jobs``.
+    Passing ``--jobs=1`` will build them one at a time.
+
+    All URLs needed by the datasets are fetched up-front and concurrently
+    (with a limit on requests per host), unless ``--no-prefetch`` is passed.
+
+    Parsers for datasets with local sources that are flagged as ``cpu_bound``
+    can be run in a pool of worker processes by passing ``--processes``.
+
+    Parsers are skipped if the hashes of their inputs (local sources, or
+    response payloads for parsers that don't make requests of their own),
+    dataset information, and code all match the last successful build, and
+    the output still exists. Passing ``--force`` will always run them.
+
+    Once finished, a report of HTTP, parse, and write timings and sizes for
+    each dataset is written to :py:data:`~bc19live.dirs.REPORT_FILE` and
+    printed as a table (unless ``--quiet`` is passed).
+
+    Passing ``--daemon`` will keep the process running, rebuilding all
+    datasets every ``--interval`` seconds, and rebuilding datasets whenever
+    their local sources change.
 
-    HTTP responses are cached, to minimize traffic.
+    HTTP requests time out, are retried with backoff on temporary failures,
+    and are rate-limited per host. Hosts that keep failing are skipped for a
+    time. See ``--connect-timeout``, ``--read-timeout``, ``--retries``, and
+    ``--host-rate``.
+
+    HTTP responses (including their bodies) are cached, to minimize
+    traffic. Passing ``--offline`` will serve every request from that cache,
+    without contacting any servers.
+
+    Passing ``--url-map`` will send requests to other servers, such as the
+    stand-in server in :py:mod:`bc19live.standin`, for testing.
     """
-    DATASETS_BY_MODULE = {
-        _module_name: import_module('bc19live.datasets.%s'
-                                    % _module_name).DATASETS
-        for _module_name in DATASET_MODULE_NAMES
-    }
-
-    DATASETS = list(chain.from_iterable(
-        _dataset
-        for _dataset in DATASETS_BY_MODULE.values()
-    ))
-
-    DATASET_FILENAMES = {
-        _dataset['filename']
-        for _dataset in DATASETS
-    }
-
-    if '--not-timeline' in sys.argv:
-        feeds_to_build = DATASET_FILENAMES - {
+    argparser = argparse.ArgumentParser(
+        description='Build datasets for the bc19.live dashboard.')
+    argparser.add_argument(
+        '--not-timeline',
+        action='store_true',
+        help='Exclude the timeline and dashboard datasets.')
+    argparser.add_argument(
+        '-j',
+        '--jobs',
+        type=int,
+        default=DEFAULT_MAX_WORKERS,
+        help='The maximum number of datasets to build at once.')
+    argparser.add_argument(
+        '-p',
+        '--processes',
+        type=int,
+        default=0,
+        help='The number of worker processes used to run CPU-bound parsers. '
+             'By default, all parsers run in the main process.')
+    argparser.add_argument(
+        '-f',
+        '--force',
+        action='store_true',
+        help='Run parsers even if their inputs and code have not changed '
+             'since the last build.')
+    argparser.add_argument(
+        '--no-prefetch',
+        action='store_true',
+        help="Fetch each dataset's URLs only when the dataset is built.")
+    argparser.add_argument(
+        '--offline',
+        action='store_true',
+        help='Serve all HTTP requests from the HTTP cache, without '
+             'contacting any servers.')
+    argparser.add_argument(
+        '--connect-timeout',
+        type=float,
+        default=DEFAULT_CONNECT_TIMEOUT,
+        help='The number of seconds to wait to connect to a server.')
+    argparser.add_argument(
+        '--read-timeout',
+        type=float,
+        default=DEFAULT_READ_TIMEOUT,
+        help='The number of seconds to wait for data from a server.')
+    argparser.add_argument(
+        '--retries',
+        type=int,
+        default=DEFAULT_MAX_RETRIES,
+        help='The number of times a failed HTTP request will be retried.')
+    argparser.add_argument(
+        '--host-rate',
+        type=float,
+        default=DEFAULT_HOST_RATE,
+        help='The maximum number of HTTP requests per second to any single '
+             'host, or 0 for no limit.')
+    argparser.add_argument(
+        '--url-map',
+        metavar='FILENAME',
+        help='A JSON file mapping URL prefixes to replacement prefixes, used '
+             'to send requests to other servers (such as a stand-in server '
+             'for testing).')
+    argparser.add_argument(
+        '--daemon',
+        action='store_true',
+        help='Keep running, rebuilding datasets periodically and when '
+             'local sources change.')
+    argparser.add_argument(
+        '--interval',
+        type=int,
+        default=DEFAULT_REBUILD_INTERVAL,
+        help='The number of seconds between full rebuilds in daemon mode.')
+    argparser.add_argument(
+        '--poll-interval',
+        type=int,
+        default=DEFAULT_POLL_INTERVAL,
+        help='The number of seconds between checks for changed local '
+             'sources in daemon mode.')
+    argparser.add_argument(
+        '-q',
+        '--quiet',
+        action='store_true',
+        help='Do not print the table of build timings and sizes.')
+    argparser.add_argument(
+        'feeds',
+        nargs='*',
+        help='Dataset module names or filenames to build.')
+    options = argparser.parse_args()
+
+    if options.host_rate < 0:
+        sys.stderr.write('--host-rate must be 0 or higher.\n')
+        sys.exit(1)
+
+    registry = DatasetRegistry(DATASET_MODULE_NAMES)
+    dataset_filenames = registry.filenames
+
+    if options.not_timeline:
+        feeds_to_build = dataset_filenames - {
             'timeline.csv',
             'timeline.json',
             'bc19-dashboard.json',
         }
-    elif len(sys.argv) > 1:
+    elif options.feeds:
         # Include any filenames or dataset names specified in the arguments.
         feeds_to_build = set()
 
-        for feed_name in sys.argv[1:]:
-            if feed_name in DATASET_FILENAMES:
+        for feed_name in options.feeds:
+            if feed_name in dataset_filenames:
                 # This is an explicit filename.
                 feeds_to_build.add(feed_name)
-            elif feed_name in DATASETS_BY_MODULE:
+            elif feed_name in registry.entries_by_module:
                 # This is a dataset name. Add each filename within it.
                 feeds_to_build.update(
-                    _dataset['filename']
-                    for _dataset in DATASETS_BY_MODULE[feed_name]
+                    _entry['filename']
+                    for _entry in registry.entries_by_module[feed_name]
                 )
             else:
                 sys.stderr.write('Invalid dataset/filename specified: "%s"\n'
                                  % feed_name)
                 sys.exit(1)
     else:
-        feeds_to_build = DATASET_FILENAMES
+        feeds_to_build = dataset_filenames
 
-    # Load in the stored HTTP cache, if it exists.
+    # Prepare the HTTP cache.
     load_http_cache()
 
-    for info in DATASETS:
-        filename = info['filename']
-
-        if filename not in feeds_to_build:
-            continue
-
-        out_dir = os.path.join(DATA_DIR, info['format'])
-
-        if not os.path.exists(out_dir):
-            os.makedirs(out_dir)
-
-        out_filename = os.path.join(out_dir, filename)
-        allow_cache = os.path.exists(out_filename)
-        parser = info.get('parser')
-        result = None
-        up_to_date = False
-        skipped = False
-
-        if parser is None and info['format'] == 'csv':
-            parser = parse_csv
-
-        try:
-            if 'url' in info:
-                url_results, session = _get_urls(
-                    urls={
-                        'main': info['url'],
-                    },
-                    allow_cache=allow_cache)
-                url_result = url_results.get('main')
-
-                if not url_result:
-                    continue
-
-                if url_result['up_to_date']:
-                    up_to_date = True
-                else:
-                    result = parser(info=info,
-                                    response=url_result['response'],
-                                    out_filename=out_filename,
-                                    session=session)
-            elif 'urls' in info:
-                urls = info['urls']
-                urls_results, session = _get_urls(
-                    urls=urls,
-                    allow_cache=allow_cache)
-
-                if len(url_results) != len(urls):
-                    # One of them failed. Bail.
-                    continue
-
-                all_up_to_date = all(
-                    _url_response['up_to_date']
-                    for _url_response in url_responses.values()
-                )
-
-                if all_up_to_date:
-                    up_to_date = True
-                else:
-                    responses = {
-                        _key: _value['response']
-                        for _key, _value in urls_results.items()
-                    }
-
-                    result = parser(info=info,
-                                    responses=responses,
-                                    out_filename=out_filename,
-                                    session=session)
-            elif 'local_source' in info:
-                local_sources = {
-                    'main': info['local_source'],
-                }
-
-                with _open_local_sources(local_sources) as fps:
-                    result = parser(info=info,
-                                    in_fp=fps['main'],
-                                    out_filename=out_filename)
-            elif 'local_sources' in info:
-                with _open_local_sources(info['local_sources']) as fps:
-                    result = parser(info=info,
-                                    in_fps=fps,
-                                    out_filename=out_filename)
-            else:
-                sys.stderr.write('Invalid feed entry: %r\n' % info)
-                continue
-        except ParseError as e:
-            sys.stderr.write('Data parse error while building %s: %s\n'
-                             % (filename, e))
-
-            if e.row is not None:
-                sys.stderr.write('Row: %r\n' % e.row)
-
-            continue
-        except Exception as e:
-            sys.stderr.write('Unexpected error while building %s: %s\n'
-                             % (filename, e))
-            traceback.print_exc()
-            continue
+    if options.url_map:
+        with open(options.url_map, 'r') as fp:
+            url_map = json.load(fp)
+    else:
+        url_map = None
+
+    configure_http(connect_timeout=options.connect_timeout,
+                   read_timeout=options.read_timeout,
+                   max_retries=options.retries,
+                   host_rate=options.host_rate,
+                   url_map=url_map)
+
+    if options.offline:
+        enable_offline_mode()
+
+    datasets = [
+        _entry
+        for _entry in registry.entries
+        if _entry['filename'] in feeds_to_build
+    ]
+
+    # Set up a pool of processes for any CPU-bound parsers, if requested.
+    if options.processes > 0:
+        process_pool = ProcessPoolExecutor(
+            max_workers=options.processes,
+            mp_context=multiprocessing.get_context('spawn'))
+    else:
+        process_pool = None
 
-        skipped = (result is False)
+    build_func = partial(
+        build_datasets,
+        registry=registry,
+        jobs=options.jobs,
+        prefetch=not options.no_prefetch,
+        process_pool=process_pool,
+        use_build_cache=not options.force,
+        quiet=options.quiet)
 
-        if up_to_date:
-            print('Up-to-date: %s' % out_filename)
-        elif skipped:
-            print('Skipped %s' % out_filename)
+    try:
+        if options.daemon:
+            enable_shared_connections()
+            run_daemon(datasets=datasets,
+                       build_func=build_func,
+                       interval=options.interval,
+                       poll_interval=options.poll_interval)
         else:
-            print('Wrote %s' % out_filename)
-
-
-    # Write the new HTTP cache.
-    write_http_cache()
+            build_func(datasets)
+    finally:
+        if process_pool is not None:
+            process_pool.shutdown()
@@ -0,0 +1,471 @@
+import threading
+from importlib import import_module
+
+from bc19live.scheduler import get_local_sources
+
+
+#: A lightweight manifest of every dataset, grouped by module.
+#:
+#: Each entry lists a dataset's filename and format, along with the
+#: ``(format, filename)`` of each local source it depends on. This can be
+#: read without importing any dataset modules, allowing datasets to be
+#: selected and scheduled while only importing the modules that are actually
+#: being built.
+#:
+#: This must be kept in sync with each module's ``DATASETS``. Mismatches are
+#: reported when a module is loaded.
+DATASET_MANIFEST = {
+    'adult_and_senior_care': [
+        {
+            'filename': 'adult-and-senior-care.csv',
+            'format': 'csv',
+        },
+    ],
+    'bc19_dashboard': [
+        {
+            'filename': 'bc19-dashboard.json',
+            'format': 'json',
+            'depends': [
+                ('json', 'schools.json'),
+                ('json', 'timeline.json'),
+                ('csv', 'wastewater-levels.csv'),
+            ],
+        },
+    ],
+    'butte_county_jail': [
+        {
+            'filename': 'butte-county-jail.json',
+            'format': 'json',
+        },
+        {
+            'filename': 'butte-county-jail.csv',
+            'format': 'csv',
+            'depends': [
+                ('json', 'butte-county-jail.json'),
+            ],
+        },
+    ],
+    'butte_dashboard': [
+        {
+            'filename': 'butte-dashboard.json',
+            'format': 'json',
+        },
+        {
+            'filename': 'butte-dashboard-v4.csv',
+            'format': 'csv',
+            'depends': [
+                ('json', 'butte-dashboard.json'),
+            ],
+        },
+        {
+            'filename': 'butte-dashboard-history.csv',
+            'format': 'csv',
+            'depends': [
+                ('json', 'butte-dashboard.json'),
+            ],
+        },
+        {
+            'filename': 'butte-dashboard-sequenced-variants.csv',
+            'format': 'csv',
+            'depends': [
+                ('json', 'butte-dashboard.json'),
+            ],
+        },
+    ],
+    'cusd': [
+        {
+            'filename': 'cusd.json',
+            'format': 'json',
+        },
+        {
+            'filename': 'cusd.csv',
+            'format': 'csv',
+            'depends': [
+                ('json', 'cusd.json'),
+            ],
+        },
+    ],
+    'hospital_cases': [
+        {
+            'filename': 'hospital-cases.json',
+            'format': 'json',
+        },
+        {
+            'filename': 'hospital-cases.csv',
+            'format': 'csv',
+            'depends': [
+                ('json', 'hospital-cases.json'),
+            ],
+        },
+    ],
+    'oroville_union_high_district': [
+        {
+            'filename': 'oroville-union-high-school-district.json',
+            'format': 'json',
+        },
+        {
+            'filename': 'oroville-union-high-school-district.csv',
+            'format': 'csv',
+            'depends': [
+                ('json', 'oroville-union-high-school-district.json'),
+            ],
+        },
+    ],
+    'schools': [
+        {
+            'filename': 'schools-status.json',
+            'format': 'json',
+        },
+        {
+            'filename': 'schools-blueoak.json',
+            'format': 'json',
+        },
+        {
+            'filename': 'schools-busd.json',
+            'format': 'json',
+        },
+        {
+            'filename': 'schools-buttecollege.json',
+            'format': 'json',
+        },
+        {
+            'filename': 'schools-ccds.json',
+            'format': 'json',
+        },
+        {
+            'filename': 'schools-csuchico.json',
+            'format': 'json',
+        },
+        {
+            'filename': 'schools-cusd.json',
+            'format': 'json',
+        },
+        {
+            'filename': 'schools-corebutte.json',
+            'format': 'json',
+        },
+        {
+            'filename': 'schools-dusd.json',
+            'format': 'json',
+        },
+        {
+            'filename': 'schools-inspire.json',
+            'format': 'json',
+        },
+        {
+            'filename': 'schools-nordcountryschool.json',
+            'format': 'json',
+        },
+        {
+            'filename': 'schools-ocesd.json',
+            'format': 'json',
+        },
+        {
+            'filename': 'schools-ouhsd.json',
+            'format': 'json',
+        },
+        {
+            'filename': 'schools-puesd.json',
+            'format': 'json',
+        },
+        {
+            'filename': 'schools-pusd.json',
+            'format': 'json',
+        },
+        {
+            'filename': 'schools.json',
+            'format': 'json',
+            'depends': [
+                ('json', 'schools-blueoak.json'),
+                ('json', 'schools-busd.json'),
+                ('json', 'schools-buttecollege.json'),
+                ('json', 'schools-ccds.json'),
+                ('json', 'schools-csuchico.json'),
+                ('json', 'schools-cusd.json'),
+                ('json', 'schools-corebutte.json'),
+                ('json', 'schools-dusd.json'),
+                ('json', 'schools-inspire.json'),
+                ('json', 'schools-nordcountryschool.json'),
+                ('json', 'schools-ocesd.json'),
+                ('json', 'schools-ouhsd.json'),
+                ('json', 'schools-puesd.json'),
+                ('json', 'schools-pusd.json'),
+            ],
+        },
+    ],
+    'skilled_nursing_facilities': [
+        {
+            'filename': 'skilled-nursing-facilities-v3.csv',
+            'format': 'csv',
+        },
+    ],
+    'state_cases': [
+        {
+            'filename': 'state-cases-v2.csv',
+            'format': 'csv',
+        },
+    ],
+    'state_hospitals': [
+        {
+            'filename': 'state-hospitals-v3.csv',
+            'format': 'csv',
+        },
+    ],
+    'state_region_icu_pct': [
+        {
+            'filename': 'state-region-icu-pct.csv',
+            'format': 'csv',
+            'depends': [
+                ('json', 'stay-at-home.json'),
+            ],
+        },
+    ],
+    'state_resources': [
+        {
+            'filename': 'state-resources.json',
+            'format': 'json',
+        },
+        {
+            'filename': 'state-resources.csv',
+            'format': 'csv',
+            'depends': [
+                ('json', 'state-resources.json'),
+            ],
+        },
+    ],
+    'state_tests': [
+        {
+            'filename': 'state-tests.csv',
+            'format': 'csv',
+        },
+    ],
+    'state_tiers': [
+        {
+            'filename': 'state-tiers.json',
+            'format': 'json',
+        },
+        {
+            'filename': 'state-tiers-v2.csv',
+            'format': 'csv',
+            'depends': [
+                ('json', 'state-tiers.json'),
+            ],
+        },
+    ],
+    'stay_at_home': [
+        {
+            'filename': 'stay-at-home.json',
+            'format': 'json',
+        },
+    ],
+    'timeline': [
+        {
+            'filename': 'timeline.csv',
+            'format': 'csv',
+        },
+        {
+            'filename': 'timeline.json',
+            'format': 'json',
+            'depends': [
+                ('csv', 'timeline.csv'),
+            ],
+        },
+    ],
+    'vaccination_stats': [
+        {
+            'filename': 'chhs-vaccinations-administered.csv',
+            'format': 'csv',
+        },
+        {
+            'filename': 'vaccination-demographics-v3.json',
+            'format': 'json',
+        },
+        {
+            'filename': 'vaccination-demographics-ages.csv',
+            'format': 'csv',
+            'depends': [
+                ('json', 'vaccination-demographics-v3.json'),
+            ],
+        },
+        {
+            'filename': 'vaccination-demographics-ethnicity.csv',
+            'format': 'csv',
+            'depends': [
+                ('json', 'vaccination-demographics-v3.json'),
+            ],
+        },
+        {
+            'filename': 'vaccination-demographics-vem-quartiles.csv',
+            'format': 'csv',
+            'depends': [
+                ('json', 'vaccination-demographics-v3.json'),
+            ],
+        },
+    ],
+    'wastewater': [
+        {
+            'filename': 'wastewater-v2.json',
+            'format': 'json',
+        },
+        {
+            'filename': 'wastewater-v2.csv',
+            'format': 'csv',
+            'depends': [
+                ('json', 'wastewater-v2.json'),
+            ],
+        },
+        {
+            'filename': 'wastewater-levels.csv',
+            'format': 'csv',
+            'depends': [
+                ('csv', 'wastewater-v2.csv'),
+            ],
+        },
+        {
+            'filename': 'cdc-wastewater-levels.csv',
+            'format': 'csv',
+        },
+    ],
+}
+
+
+class DatasetRegistry(object):
+    """A registry of datasets that loads dataset modules on demand.
+
+    The registry is built from :py:data:`DATASET_MANIFEST`. Dataset modules
+    are only imported when the full information for one of their datasets
+    is requested through :py:meth:`get_dataset`.
+
+    Attributes:
+        entries (list of dict):
+            The manifest entries for all registered datasets, in order.
+
+        entries_by_module (dict):
+            A mapping of module names to lists of manifest entries.
+    """
+
+    def __init__(self, module_names, manifest=DATASET_MANIFEST):
+        """Initialize the registry.
+
+        Args:
+            module_names (list of str):
+                The names of the dataset modules to register.
+
+            manifest (dict, optional):
+                The manifest to build the registry from.
+
+        Raises:
+            KeyError:
+                A module was not found in the manifest.
+        """
+        self.entries_by_module = {
+            _module_name: manifest[_module_name]
+            for _module_name in module_names
+        }
+        self.entries = [
+            _entry
+            for _module_name in module_names
+            for _entry in manifest[_module_name]
+        ]
+
+        self._module_names = {
+            _entry['filename']: _module_name
+            for _module_name, _entries in self.entries_by_module.items()
+            for _entry in _entries
+        }
+        self._datasets = {}
+        self._lock = threading.Lock()
+
+    @property
+    def filenames(self):
+        """The set of filenames for all registered datasets.
+
+        Type:
+            set of str
+        """
+        return set(self._module_names.keys())
+
+    def get_module_name(self, filename):
+        """Return the name of the module defining a dataset.
+
+        Args:
+            filename (str):
+                The filename of the dataset.
+
+        Returns:
+            str:
+            The module name.
+
+        Raises:
+            KeyError:
+                The dataset is not registered.
+        """
+        return self._module_names[filename]
+
+    def get_dataset(self, filename):
+        """Return the full information for a dataset.
+
+        This will import the dataset's module, if it hasn't already been
+        imported.
+
+        Args:
+            filename (str):
+                The filename of the dataset.
+
+        Returns:
+            dict:
+            The dataset information, as defined in the module's ``DATASETS``.
+
+        Raises:
+            KeyError:
+                The dataset is not registered.
+
+            ValueError:
+                The module's datasets don't match the manifest.
+        """
+        module_name = self._module_names[filename]
+
+        with self._lock:
+            if filename not in self._datasets:
+                self._load_module(module_name)
+
+            return self._datasets[filename]
+
+    def _load_module(self, module_name):
+        """Import a dataset module and register its datasets.
+
+        The module's datasets are checked against the manifest.
+
+        Args:
+            module_name (str):
+                The name of the dataset module.
+
+        Raises:
+            ValueError:
+                The module's datasets don't match the manifest.
+        """
+        datasets = import_module('bc19live.datasets.%s'
+                                 % module_name).DATASETS
+
+        expected = [
+            (_entry['filename'], _entry['format'],
+             list(_entry.get('depends', [])))
+            for _entry in self.entries_by_module[module_name]
+        ]
+        found = [
+            (_info['filename'], _info['format'],
+             [
+                 (_local_source['format'], _local_source['filename'])
+                 for _local_source in get_local_sources(_info)
+             ])
+            for _info in datasets
+        ]
+
+        if expected != found:
+            raise ValueError(
+                'The datasets in module "%s" do not match the dataset '
+                'manifest. Update DATASET_MANIFEST in bc19live/registry.py.'
+                % module_name)
+
+        for info in datasets:
+            self._datasets[info['filename']] = info
@@ -0,0 +1,262 @@
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+
+from bc19live.utils import safe_open_for_write
+
+
+class DatasetReport(object):
+    """Timing and size information collected while building a dataset.
+
+    Attributes:
+        filename (str):
+            The filename of the dataset.
+
+        status (str):
+            The resulting state of the dataset. This is one of ``written``,
+            ``up-to-date``, ``skipped``, or ``error``.
+
+        http_time (float):
+            The total number of seconds spent performing HTTP requests.
+
+        http_statuses (list of int):
+            The HTTP status codes for each URL fetched for the dataset.
+
+        response_bytes (int):
+            The total size of all HTTP response payloads.
+
+        parse_time (float):
+            The number of seconds spent in the parser.
+
+        rows (int):
+            The number of rows written to the resulting dataset, if reported
+            by its writer.
+
+        output_bytes (int):
+            The size of the resulting file.
+
+        duration (float):
+            The total number of seconds spent building the dataset.
+    """
+
+    def __init__(self, filename):
+        """Initialize the report.
+
+        Args:
+            filename (str):
+                The filename of the dataset.
+        """
+        self.filename = filename
+        self.status = None
+        self.http_time = 0.0
+        self.http_statuses = []
+        self.response_bytes = 0
+        self.parse_time = 0.0
+        self.rows = None
+        self.output_bytes = None
+        self.duration = 0.0
+
+        self._start_time = None
+
+    def start(self):
+        """Mark the start of the dataset build."""
+        self._start_time = time.monotonic()
+
+    def finish(self, status):
+        """Mark the end of the dataset build.
+
+        Args:
+            status (str):
+                The resulting state of the dataset.
+        """
+        self.status = status
+
+        if self._start_time is not None:
+            self.duration = time.monotonic() - self._start_time
+
+    def add_response(self, response, elapsed):
+        """Record information on a HTTP response.
+
+        The size of streamed response bodies is not recorded here, since they
+        haven't been read yet.
+
+        Args:
+            response (requests.Response):
+                The HTTP response.
+
+            elapsed (float):
+                The number of seconds spent fetching the response.
+        """
+        self.http_time += elapsed
+        self.http_statuses.append(response.status_code)
+
+        if (response.status_code == 200 and
+            getattr(response, 'streamed_body', None) is None):
+            self.response_bytes += len(response.content)
+
+    def add_output(self, out_filename, rows=None):
+        """Record information on the resulting file.
+
+        Args:
+            out_filename (str):
+                The path to the resulting file.
+
+            rows (int, optional):
+                The number of rows the writer reported writing to the file
+                (see :py:func:`~bc19live.utils.collect_output_rows`), if
+                known.
+        """
+        try:
+            self.output_bytes = os.path.getsize(out_filename)
+        except OSError:
+            return
+
+        self.rows = rows
+
+    def to_dict(self):
+        """Return a serializable dictionary for the report.
+
+        Returns:
+            dict:
+            The report data.
+        """
+        return {
+            'filename': self.filename,
+            'status': self.status,
+            'http_time': round(self.http_time, 3),
+            'http_statuses': self.http_statuses,
+            'response_bytes': self.response_bytes,
+            'parse_time': round(self.parse_time, 3),
+            'rows': self.rows,
+            'output_bytes': self.output_bytes,
+            'duration': round(self.duration, 3),
+        }
+
+
+class RunReport(object):
+    """A report on all datasets built during a run.
+
+    Dataset reports may be added from multiple threads.
+    """
+
+    def __init__(self):
+        """Initialize the report."""
+        self.datasets = {}
+        self.started = datetime.now()
+        self.duration = 0.0
+
+        self._start_time = time.monotonic()
+        self._lock = threading.Lock()
+
+    def add_dataset(self, filename):
+        """Add and return a new report for a dataset.
+
+        Args:
+            filename (str):
+                The filename of the dataset.
+
+        Returns:
+            DatasetReport:
+            The new dataset report.
+        """
+        dataset_report = DatasetReport(filename)
+
+        with self._lock:
+            self.datasets[filename] = dataset_report
+
+        return dataset_report
+
+    def finish(self):
+        """Mark the end of the run."""
+        self.duration = time.monotonic() - self._start_time
+
+    def to_dict(self):
+        """Return a serializable dictionary for the report.
+
+        Returns:
+            dict:
+            The report data.
+        """
+        return {
+            'started': self.started.strftime('%Y-%m-%d %H:%M:%S'),
+            'duration': round(self.duration, 3),
+            'datasets': [
+                _dataset_report.to_dict()
+                for _dataset_report in self._get_sorted_datasets()
+            ],
+        }
+
+    def write(self, filename):
+        """Write the report as JSON.
+
+        Args:
+            filename (str):
+                The path to the file to write.
+        """
+        with safe_open_for_write(filename) as fp:
+            json.dump(self.to_dict(),
+                      fp,
+                      indent=2,
+                      sort_keys=True)
+
+    def print_table(self, fp=sys.stdout):
+        """Print the report as a table.
+
+        Datasets are listed in order of total build duration, longest first.
+
+        Args:
+            fp (file, optional):
+                The file to print to.
+        """
+        headers = ('Dataset', 'Status', 'HTTP', 'HTTP s', 'Resp bytes',
+                   'Parse s', 'Rows', 'Out bytes', 'Total s')
+        rows = [
+            (
+                _report.filename,
+                _report.status or '',
+                ','.join(str(_code) for _code in _report.http_statuses),
+                '%.2f' % _report.http_time,
+                '%d' % _report.response_bytes,
+                '%.2f' % _report.parse_time,
+                '' if _report.rows is None else '%d' % _report.rows,
+                ('' if _report.output_bytes is None
+                 else '%d' % _report.output_bytes),
+                '%.2f' % _report.duration,
+            )
+            for _report in self._get_sorted_datasets()
+        ]
+
+        widths = [
+            max(len(_value) for _value in _col)
+            for _col in zip(headers, *rows)
+        ]
+
+        def _format_row(row):
+            return '  '.join(
+                (_value.ljust(_width) if _i < 2 else _value.rjust(_width))
+                for _i, (_value, _width) in enumerate(zip(row, widths))
+            ).rstrip()
+
+        fp.write('%s\n' % _format_row(headers))
+        fp.write('%s\n' % '  '.join('-' * _width for _width in widths))
+
+        for row in rows:
+            fp.write('%s\n' % _format_row(row))
+
+        fp.write('\nTotal time: %.2fs\n' % self.duration)
+
+    def _get_sorted_datasets(self):
+        """Return dataset reports sorted by duration, longest first.
+
+        Returns:
+            list of DatasetReport:
+            The sorted dataset reports.
+        """
+        with self._lock:
+            return sorted(self.datasets.values(),
+                          key=lambda report: report.duration,
+                          reverse=True)
+
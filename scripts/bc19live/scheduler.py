@@ -0,0 +1,207 @@
+import sys
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+
+#: The default number of datasets that can be built at once.
+DEFAULT_MAX_WORKERS = 4
+
+
+def get_local_sources(info):
+    """Return all local sources used by a dataset.
+
+    This normalizes the ``local_source`` and ``local_sources`` keys of
+    dataset information, and the ``depends`` key of manifest entries (see
+    :py:data:`bc19live.registry.DATASET_MANIFEST`).
+
+    Args:
+        info (dict):
+            The dataset information or manifest entry.
+
+    Returns:
+        list of dict:
+        The list of local source information, in the order they're defined.
+    """
+    if 'depends' in info:
+        return [
+            {
+                'filename': _filename,
+                'format': _format,
+            }
+            for _format, _filename in info['depends']
+        ]
+    elif 'local_source' in info:
+        return [info['local_source']]
+
+    return list(info.get('local_sources', {}).values())
+
+
+def get_named_local_sources(info):
+    """Return the local sources a dataset's parser reads, keyed by name.
+
+    Datasets with a single ``local_source`` use a name of ``main``, matching
+    how the parser receives it.
+
+    Args:
+        info (dict):
+            The dataset information.
+
+    Returns:
+        dict:
+        A mapping of local source names to local source information.
+    """
+    if 'local_source' in info:
+        return {
+            'main': info['local_source'],
+        }
+
+    return dict(info.get('local_sources', {}))
+
+
+def build_dependency_graph(datasets):
+    """Return a dependency graph for a list of datasets.
+
+    Each dataset is a node in the graph, identified by its filename. A dataset
+    depends on another if one of its local sources matches the filename and
+    format of the other dataset.
+
+    Only dependencies within the provided list of datasets are considered.
+    Any local sources outside of that list are assumed to already be built.
+
+    Args:
+        datasets (list of dict):
+            The list of datasets to build a graph for.
+
+    Returns:
+        dict:
+        A dictionary mapping each dataset filename to a set of filenames it
+        depends on.
+
+    Raises:
+        ValueError:
+            The datasets contain a dependency cycle.
+    """
+    formats = {
+        _info['filename']: _info['format']
+        for _info in datasets
+    }
+
+    graph = {}
+
+    for info in datasets:
+        graph[info['filename']] = {
+            _local_source['filename']
+            for _local_source in get_local_sources(info)
+            if formats.get(_local_source['filename']) ==
+               _local_source['format']
+        }
+
+    # Make sure there aren't any cycles. These would cause the scheduler to
+    # wait forever.
+    visited = set()
+    visiting = set()
+
+    def _check(filename):
+        if filename in visiting:
+            raise ValueError('Dependency cycle found for dataset "%s"'
+                             % filename)
+
+        if filename not in visited:
+            visiting.add(filename)
+
+            for dep_filename in graph[filename]:
+                _check(dep_filename)
+
+            visiting.remove(filename)
+            visited.add(filename)
+
+    for filename in graph:
+        _check(filename)
+
+    return graph
+
+
+def run_scheduled(datasets, build_func, max_workers=DEFAULT_MAX_WORKERS):
+    """Build datasets concurrently, respecting their dependencies.
+
+    Datasets with no dependencies between them will be built concurrently in
+    a bounded pool of worker threads. A dataset is started as soon as all the
+    datasets it depends on have finished (successfully or not).
+
+    When multiple datasets are ready at once, they're started in the order
+    in which they appear in the list.
+
+    Args:
+        datasets (list of dict):
+            The list of datasets to build.
+
+        build_func (callable):
+            The function used to build a dataset. This takes the dataset
+            information as its only argument.
+
+        max_workers (int, optional):
+            The maximum number of datasets to build at once. Passing ``1``
+            will build datasets serially, in dependency order.
+
+    Raises:
+        ValueError:
+            The datasets contain a dependency cycle.
+    """
+    graph = build_dependency_graph(datasets)
+    infos = {
+        _info['filename']: _info
+        for _info in datasets
+    }
+    order = {
+        _info['filename']: _i
+        for _i, _info in enumerate(datasets)
+    }
+    remaining = {
+        _filename: len(_deps)
+        for _filename, _deps in graph.items()
+    }
+    dependents = {
+        _filename: []
+        for _filename in graph
+    }
+
+    for filename, deps in graph.items():
+        for dep_filename in deps:
+            dependents[dep_filename].append(filename)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {}
+
+        def _submit(filenames):
+            for filename in sorted(filenames, key=order.get):
+                future = executor.submit(build_func, infos[filename])
+                futures[future] = filename
+
+        _submit(
+            _filename
+            for _filename, _count in remaining.items()
+            if _count == 0
+        )
+
+        while futures:
+            done, not_done = wait(futures, return_when=FIRST_COMPLETED)
+            ready = []
+
+            for future in done:
+                filename = futures.pop(future)
+
+                try:
+                    future.result()
+                except Exception as e:
+                    sys.stderr.write('Unexpected error while building %s: '
+                                     '%s\n'
+                                     % (filename, e))
+                    traceback.print_exc()
+
+                for dep_filename in dependents[filename]:
+                    remaining[dep_filename] -= 1
+
+                    if remaining[dep_filename] == 0:
+                        ready.append(dep_filename)
+
+            _submit(ready)
@@ -0,0 +1,493 @@
+import argparse
+import gzip
+import hashlib
+import json
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlparse
+
+from bc19live.dirs import FIXTURES_DIR
+from bc19live.fixtures import FixtureStore
+
+
+#: The default address the stand-in server listens on.
+DEFAULT_HOST = '127.0.0.1'
+
+#: The default port the stand-in server listens on.
+DEFAULT_PORT = 8780
+
+#: The HTTP status code returned for injected errors.
+DEFAULT_ERROR_STATUS = 503
+
+#: The minimum payload size, in bytes, for gzip compression.
+GZIP_MIN_SIZE = 1024
+
+#: The CKAN API action that returns an empty result for unrecorded queries.
+#:
+#: Incremental CKAN queries depend on the last date seen, so they're rarely
+#: recorded. Treating them as having no new records lets builds run against
+#: a recorded snapshot.
+CKAN_SQL_ACTION = '/api/3/action/datastore_search_sql'
+
+
+def get_url_map(base_url):
+    """Return a URL rewrite map that sends all requests to a stand-in server.
+
+    Args:
+        base_url (str):
+            The base URL of the stand-in server.
+
+    Returns:
+        dict:
+        A mapping of upstream URL prefixes to stand-in URL prefixes, suitable
+        for :py:func:`bc19live.http.configure_http`.
+    """
+    base_url = base_url.rstrip('/')
+
+    return {
+        'https://': '%s/https/' % base_url,
+        'http://': '%s/http/' % base_url,
+    }
+
+
+class StandInServer(ThreadingHTTPServer):
+    """A local HTTP server that stands in for upstream servers.
+
+    Responses are served from a :py:class:`~bc19live.fixtures.FixtureStore`.
+    Requests are made to ``/<scheme>/<host>/<path>``, which is mapped back to
+    the upstream URL to look up the recorded response (see
+    :py:func:`get_url_map`).
+
+    Responses support conditional requests (through ``ETag`` and
+    ``Last-Modified``), byte ranges, and gzip compression. Latency and
+    errors can be injected to simulate slow or unreliable servers.
+
+    Attributes:
+        request_count (int):
+            The number of requests handled.
+
+        error_count (int):
+            The number of errors injected.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address, store, latency=0, latency_jitter=0,
+                 error_rate=0, error_status=DEFAULT_ERROR_STATUS,
+                 seed=None):
+        """Initialize the server.
+
+        Args:
+            address (tuple):
+                The host and port to listen on.
+
+            store (bc19live.fixtures.FixtureStore):
+                The store to serve responses from.
+
+            latency (float, optional):
+                The number of seconds to wait before responding.
+
+            latency_jitter (float, optional):
+                The maximum number of seconds randomly added to the latency.
+
+            error_rate (float, optional):
+                The fraction of requests (between 0 and 1) that will fail
+                with ``error_status``.
+
+            error_status (int, optional):
+                The HTTP status code for injected errors.
+
+            seed (int, optional):
+                The seed for random latency and errors, for repeatable runs.
+        """
+        super(StandInServer, self).__init__(address, StandInRequestHandler)
+
+        self.store = store
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.request_count = 0
+        self.error_count = 0
+
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        """The base URL for the server.
+
+        Type:
+            str
+        """
+        host, port = self.server_address[:2]
+
+        return 'http://%s:%s' % (host, port)
+
+    def begin_request(self):
+        """Record a request, and apply latency and error injection.
+
+        Returns:
+            bool:
+            ``True`` if an error should be returned for the request.
+        """
+        with self._lock:
+            self.request_count += 1
+            delay = self.latency
+
+            if self.latency_jitter:
+                delay += self._random.uniform(0, self.latency_jitter)
+
+            fail = (self.error_rate > 0 and
+                    self._random.random() < self.error_rate)
+
+            if fail:
+                self.error_count += 1
+
+        if delay > 0:
+            time.sleep(delay)
+
+        return fail
+
+
+class StandInRequestHandler(BaseHTTPRequestHandler):
+    """Handles requests to a :py:class:`StandInServer`."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        """Handle a HTTP GET request."""
+        self._handle_request('GET')
+
+    def do_HEAD(self):
+        """Handle a HTTP HEAD request."""
+        self._handle_request('HEAD')
+
+    def do_POST(self):
+        """Handle a HTTP POST request."""
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length).decode('utf-8')
+
+        self._handle_request('POST',
+                             data=dict(parse_qsl(body,
+                                                 keep_blank_values=True)))
+
+    def log_request(self, code='-', size='-'):
+        """Log a request.
+
+        Only failed requests are logged.
+
+        Args:
+            code (int or str, optional):
+                The HTTP status code.
+
+            size (int or str, optional):
+                The size of the response.
+        """
+        if isinstance(code, int) and code >= 400:
+            super(StandInRequestHandler, self).log_request(code, size)
+
+    def _handle_request(self, method, data=None):
+        """Handle a request for a recorded response.
+
+        Args:
+            method (str):
+                The HTTP method.
+
+            data (dict, optional):
+                The form data sent with the request.
+        """
+        server = self.server
+
+        if server.begin_request():
+            self._send_payload(server.error_status,
+                               b'Injected error\n',
+                               headers={
+                                   'Content-Type': 'text/plain',
+                               },
+                               method=method)
+            return
+
+        url = self._get_upstream_url()
+
+        if url is None:
+            self._send_payload(404,
+                               b'Request paths must be /<scheme>/<host>/...\n',
+                               headers={
+                                   'Content-Type': 'text/plain',
+                               },
+                               method=method)
+            return
+
+        # HEAD requests are answered using the recorded GET response.
+        response = server.store.get_response(
+            'GET' if method == 'HEAD' else method, url, data)
+
+        if response is None:
+            if urlparse(url).path == CKAN_SQL_ACTION:
+                self._send_payload(
+                    200,
+                    json.dumps({
+                        'success': True,
+                        'result': {
+                            'fields': [],
+                            'records': [],
+                        },
+                    }).encode('utf-8'),
+                    headers={
+                        'Content-Type': 'application/json',
+                    },
+                    method=method)
+            else:
+                self._send_payload(404,
+                                   b'No fixture recorded for this request\n',
+                                   headers={
+                                       'Content-Type': 'text/plain',
+                                   },
+                                   method=method)
+
+            return
+
+        content = response.content
+        headers = {
+            _key: _value
+            for _key, _value in response.headers.items()
+            if _key.lower() not in ('etag', 'accept-ranges',
+                                    'content-range')
+        }
+        etag = response.headers.get(
+            'ETag',
+            '"%s"' % hashlib.sha256(content).hexdigest()[:32])
+        last_modified = response.headers.get('Last-Modified')
+
+        headers.update({
+            'ETag': etag,
+            'Accept-Ranges': 'bytes',
+        })
+
+        if response.status_code == 200:
+            if_none_match = self.headers.get('If-None-Match')
+
+            if ((if_none_match and etag in (
+                     _value.strip()
+                     for _value in if_none_match.split(','))) or
+                (not if_none_match and
+                 last_modified and
+                 self.headers.get('If-Modified-Since') == last_modified)):
+                self._send_payload(304, b'', headers=headers,
+                                   method=method)
+                return
+
+            byte_range = self._get_byte_range(len(content))
+
+            if byte_range is False:
+                self._send_payload(416,
+                                   b'',
+                                   headers={
+                                       'Content-Range': 'bytes */%d'
+                                                        % len(content),
+                                   },
+                                   method=method)
+                return
+            elif byte_range is not None:
+                start, end = byte_range
+                headers['Content-Range'] = 'bytes %d-%d/%d' % (
+                    start, end, len(content))
+                self._send_payload(206, content[start:end + 1],
+                                   headers=headers,
+                                   method=method)
+                return
+
+        self._send_payload(response.status_code, content,
+                           headers=headers,
+                           method=method,
+                           allow_gzip=True)
+
+    def _get_upstream_url(self):
+        """Return the upstream URL for the request.
+
+        Returns:
+            str:
+            The upstream URL, or ``None`` if the request path is invalid.
+        """
+        m = re.match(r'^/(https?)/([^/?#]+)(.*)$', self.path)
+
+        if not m:
+            return None
+
+        path = m.group(3)
+
+        if not path.startswith('/'):
+            path = '/' + path
+
+        return '%s://%s%s' % (m.group(1), m.group(2), path)
+
+    def _get_byte_range(self, size):
+        """Return the byte range requested.
+
+        Only single ranges are supported.
+
+        Args:
+            size (int):
+                The size of the payload.
+
+        Returns:
+            tuple:
+            A 2-tuple of the first and last byte positions (inclusive),
+            ``None`` if a range wasn't requested, or ``False`` if the range
+            can't be satisfied.
+        """
+        range_header = self.headers.get('Range')
+
+        if not range_header:
+            return None
+
+        m = re.match(r'^bytes=(\d*)-(\d*)$', range_header.strip())
+
+        if not m or not (m.group(1) or m.group(2)):
+            return None
+
+        if m.group(1):
+            start = int(m.group(1))
+            end = min(int(m.group(2) or size - 1), size - 1)
+        else:
+            # This is a suffix range, covering the last N bytes.
+            start = max(size - int(m.group(2)), 0)
+            end = size - 1
+
+        if start >= size or start > end:
+            return False
+
+        return start, end
+
+    def _send_payload(self, status_code, content, headers, method,
+                      allow_gzip=False):
+        """Send a response.
+
+        Args:
+            status_code (int):
+                The HTTP status code.
+
+            content (bytes):
+                The payload.
+
+            headers (dict):
+                The response headers.
+
+            method (str):
+                The HTTP method of the request. No payload is sent for
+                ``HEAD`` requests.
+
+            allow_gzip (bool, optional):
+                Whether the payload may be compressed, if the client accepts
+                gzip.
+        """
+        if (allow_gzip and
+            len(content) >= GZIP_MIN_SIZE and
+            'gzip' in self.headers.get('Accept-Encoding', '')):
+            content = gzip.compress(content, compresslevel=5)
+            headers = dict(headers, **{
+                'Content-Encoding': 'gzip',
+                'Vary': 'Accept-Encoding',
+            })
+
+        self.send_response(status_code)
+
+        for key, value in headers.items():
+            self.send_header(key, value)
+
+        if status_code != 304:
+            self.send_header('Content-Length', str(len(content)))
+
+        self.end_headers()
+
+        if method != 'HEAD' and status_code != 304:
+            self.wfile.write(content)
+
+
+def main():
+    """Main function for running the stand-in server.
+
+    This serves recorded fixtures (see :py:mod:`bc19live.benchmark`) in place
+    of the upstream servers. Builds can be pointed at the server by passing
+    the URL map it prints to ``--url-map``.
+    """
+    parser = argparse.ArgumentParser(
+        description=(
+            'Serve recorded upstream payloads from a local HTTP server, for '
+            'integration and load testing.'
+        ))
+    parser.add_argument(
+        '--fixtures-dir',
+        default=FIXTURES_DIR,
+        help='The directory containing recorded fixtures.')
+    parser.add_argument(
+        '--host',
+        default=DEFAULT_HOST,
+        help='The address to listen on.')
+    parser.add_argument(
+        '--port',
+        type=int,
+        default=DEFAULT_PORT,
+        help='The port to listen on.')
+    parser.add_argument(
+        '--latency',
+        type=float,
+        default=0,
+        help='The number of seconds to wait before each response.')
+    parser.add_argument(
+        '--latency-jitter',
+        type=float,
+        default=0,
+        help='The maximum number of random seconds added to the latency.')
+    parser.add_argument(
+        '--error-rate',
+        type=float,
+        default=0,
+        help='The fraction of requests (0-1) that fail.')
+    parser.add_argument(
+        '--error-status',
+        type=int,
+        default=DEFAULT_ERROR_STATUS,
+        help='The HTTP status code returned for failed requests.')
+    parser.add_argument(
+        '--seed',
+        type=int,
+        help='The random seed used for latency and errors.')
+    parser.add_argument(
+        '--write-url-map',
+        metavar='FILENAME',
+        help='Write the URL map for --url-map to this file.')
+
+    options = parser.parse_args()
+
+    server = StandInServer((options.host, options.port),
+                           store=FixtureStore(options.fixtures_dir),
+                           latency=options.latency,
+                           latency_jitter=options.latency_jitter,
+                           error_rate=options.error_rate,
+                           error_status=options.error_status,
+                           seed=options.seed)
+    url_map = get_url_map(server.base_url)
+
+    if options.write_url_map:
+        with open(options.write_url_map, 'w') as fp:
+            json.dump(url_map, fp, indent=2, sort_keys=True)
+
+    print('Serving fixtures from %s on %s'
+          % (options.fixtures_dir, server.base_url))
+    print('URL map: %s' % json.dumps(url_map, sort_keys=True))
+    sys.stdout.flush()
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print('Handled %d requests (%d injected errors)'
+              % (server.request_count, server.error_count))
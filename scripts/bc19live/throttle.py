@@ -0,0 +1,126 @@
+import threading
+import time
+
+from bc19live.errors import HostUnavailableError
+
+
+class TokenBucket(object):
+    """A token bucket used to limit the rate of requests.
+
+    The bucket holds up to ``capacity`` tokens, and is refilled at ``rate``
+    tokens per second. Each request takes a token, waiting for one to become
+    available if needed. This allows short bursts of requests, while
+    limiting the sustained rate.
+
+    A ``rate`` of 0 disables the limit.
+    """
+
+    def __init__(self, rate, capacity):
+        """Initialize the bucket.
+
+        Args:
+            rate (float):
+                The number of tokens added per second, or 0 for no limit.
+
+            capacity (int):
+                The maximum number of tokens in the bucket.
+        """
+        self.rate = rate
+        self.capacity = capacity
+
+        self._tokens = float(capacity)
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Take a token from the bucket, waiting for one if needed."""
+        if self.rate <= 0:
+            return
+
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.capacity,
+                    self._tokens + (now - self._last_refill) * self.rate)
+                self._last_refill = now
+
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+
+                wait = (1 - self._tokens) / self.rate
+
+            time.sleep(wait)
+
+
+class CircuitBreaker(object):
+    """A circuit breaker used to fail fast when a host is down.
+
+    After ``failure_threshold`` consecutive failures, the circuit opens, and
+    requests fail immediately with
+    :py:class:`~bc19live.errors.HostUnavailableError`. Once ``reset_timeout``
+    seconds have passed, a single trial request is allowed through. If it
+    succeeds, the circuit closes again. Otherwise, it stays open for another
+    ``reset_timeout`` seconds.
+    """
+
+    def __init__(self, host, failure_threshold, reset_timeout):
+        """Initialize the circuit breaker.
+
+        Args:
+            host (str):
+                The host the circuit breaker is for.
+
+            failure_threshold (int):
+                The number of consecutive failures before the circuit opens.
+
+            reset_timeout (float):
+                The number of seconds before a trial request is allowed
+                through an open circuit.
+        """
+        self.host = host
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self._failures = 0
+        self._opened_at = None
+        self._trial_pending = False
+        self._lock = threading.Lock()
+
+    def before_request(self):
+        """Check whether a request may be made.
+
+        Raises:
+            bc19live.errors.HostUnavailableError:
+                The circuit is open.
+        """
+        with self._lock:
+            if self._opened_at is None:
+                return
+
+            if (not self._trial_pending and
+                time.monotonic() - self._opened_at >= self.reset_timeout):
+                # Let a single request through to see if the host is back.
+                self._trial_pending = True
+                return
+
+        raise HostUnavailableError(
+            '%s has failed %d times in a row. Not sending requests for now.'
+            % (self.host, self._failures))
+
+    def record_success(self):
+        """Record a successful request, closing the circuit."""
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_pending = False
+
+    def record_failure(self):
+        """Record a failed request, opening the circuit if needed."""
+        with self._lock:
+            self._failures += 1
+            self._trial_pending = False
+
+            if self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
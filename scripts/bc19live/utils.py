@@ -2,18 +2,27 @@ from __future__ import annotations
 
 import codecs
 import csv
+import itertools
 import json
+import operator
 import os
 import re
-from contextlib import contextmanager
-from datetime import datetime, timedelta
+import sys
+import threading
+from array import array
+from contextlib import ExitStack, contextmanager
+from datetime import datetime
+from functools import lru_cache, partial
 from typing import TYPE_CHECKING, overload
 
+from bc19live.daterows import DateRowStore
+from bc19live.dirs import DATE_ROWS_DB
 from bc19live.errors import ParseError
+from bc19live.http import iter_response_lines
 
 if TYPE_CHECKING:
     import io
-    from collections.abc import Iterator, Mapping, Sequence
+    from collections.abc import Callable, Iterator, Mapping, Sequence
     from typing import Any, Literal, Union
 
     import requests
@@ -26,9 +35,78 @@ if TYPE_CHECKING:
     ]]
 
 
+#: The maximum number of parsed dates to remember.
+#:
+#: Feeds tend to repeat the same small set of dates many times (once per
+#: county, area, or category), so this only needs to cover the distinct
+#: dates seen during a build.
+DATE_CACHE_SIZE = 8192
+
+#: Comparison operators supported in ``filters`` for CSV files.
+#:
+#: Each takes a value from the source file and the value from the filter.
+CSV_FILTER_OPERATORS = {
+    '==': operator.eq,
+    '!=': operator.ne,
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+    'in': lambda value, values: value in values,
+    'not in': lambda value, values: value not in values,
+}
+
+#: The number of source rows filtered at a time by the columnar CSV engine.
+CSV_COLUMNAR_BATCH_SIZE = 2000
+
+#: The Parquet column types for CSV column data types.
+#:
+#: These are names of :py:mod:`pyarrow` type factories. Columns of any other
+#: data type are written as strings.
+PARQUET_COLUMN_TYPES = {
+    'date': 'date32',
+    'int': 'int64',
+    'int_or_blank': 'int64',
+    'pct': 'float64',
+    'real': 'float64',
+}
+
+#: Types used to read back values written for CSV column data types.
+#:
+#: Values of any other data type (including dates, which are written in
+#: their parsed ``YYYY-MM-DD`` form) are read back as strings. Blank values
+#: are always read back as blank.
+WRITTEN_CSV_VALUE_TYPES = {
+    'int': int,
+    'int_or_blank': int,
+    'pct': float,
+    'real': float,
+}
+
+#: The number of rows written to each row group in Parquet files.
+PARQUET_ROW_GROUP_SIZE = 65536
+
+#: The number of raw lines checked at a time by :py:func:`prefilter_csv_lines`.
+PREFILTER_BATCH_SIZE = 5000
+
+#: The store for datasets built by :py:func:`add_or_update_json_date_row`.
+#:
+#: This can be overridden for the current thread through
+#: :py:func:`use_date_row_store`. Callers should use
+#: :py:func:`get_date_row_store` to find the store in use.
+date_row_store = DateRowStore(DATE_ROWS_DB)
+
+#: Per-thread state for :py:func:`collect_output_rows`.
+_output_rows_state = threading.local()
+
+#: Per-thread state for :py:func:`use_date_row_store`.
+_date_row_store_state = threading.local()
+
+
 @contextmanager
 def safe_open_for_write(
     filename: str,
+    mode: str = 'w',
 ) -> Iterator[io.IOBase]:
     """Safely open a file for writing.
 
@@ -40,38 +118,531 @@ def safe_open_for_write(
         filename (str):
             The name of the file to write.
 
+        mode (str, optional):
+            The mode to open the file in.
+
     Context:
         object:
         The file pointer.
     """
     temp_filename = '%s.tmp' % filename
 
-    with open(temp_filename, 'w') as fp:
-        yield fp
+    try:
+        with open(temp_filename, mode) as fp:
+            yield fp
+    except BaseException:
+        # Don't leave a partially-written file behind.
+        os.unlink(temp_filename)
+        raise
 
     os.rename(temp_filename, filename)
 
 
-def convert_csv_to_tsv(
+@contextmanager
+def use_date_row_store(
+    store: DateRowStore,
+) -> Iterator[DateRowStore]:
+    """Use another store for datasets built a date row at a time.
+
+    While in this context, parsers on the current thread use the given store
+    in place of :py:data:`date_row_store` (see :py:func:`get_date_row_store`).
+    This lets parsers be run against files outside of the data directory
+    (such as when benchmarking) without recording their rows in the main
+    store. Other threads are unaffected.
+
+    Args:
+        store (bc19live.daterows.DateRowStore):
+            The store to use.
+
+    Context:
+        bc19live.daterows.DateRowStore:
+        The store passed in.
+    """
+    old_store = getattr(_date_row_store_state, 'store', None)
+    _date_row_store_state.store = store
+
+    try:
+        yield store
+    finally:
+        _date_row_store_state.store = old_store
+
+
+def get_date_row_store() -> DateRowStore:
+    """Return the store for datasets built a date row at a time.
+
+    Returns:
+        bc19live.daterows.DateRowStore:
+        The store set for the current thread by :py:func:`use_date_row_store`,
+        or :py:data:`date_row_store` if none was set.
+    """
+    store = getattr(_date_row_store_state, 'store', None)
+
+    if store is None:
+        store = date_row_store
+
+    return store
+
+
+@contextmanager
+def collect_output_rows(
+    output_rows: dict[str, int],
+) -> Iterator[dict[str, int]]:
+    """Collect the number of rows written to dataset files.
+
+    While in this context, writers on the current thread record the number
+    of rows written to each file (see :py:func:`record_output_rows`), so
+    that callers don't have to read the files back in to find out.
+
+    Args:
+        output_rows (dict):
+            The dictionary to record row counts in, keyed by filename.
+
+    Context:
+        dict:
+        The dictionary passed in.
+    """
+    old_output_rows = getattr(_output_rows_state, 'output_rows', None)
+    _output_rows_state.output_rows = output_rows
+
+    try:
+        yield output_rows
+    finally:
+        _output_rows_state.output_rows = old_output_rows
+
+
+def record_output_rows(
     filename: str,
+    count: int,
 ) -> None:
-    """Convert a CSV file to TSV.
+    """Record the number of rows written to a dataset file.
+
+    This does nothing unless called within :py:func:`collect_output_rows`.
+
+    Args:
+        filename (str):
+            The name of the file that was written.
+
+        count (int):
+            The number of rows written, not including any header.
+    """
+    output_rows = getattr(_output_rows_state, 'output_rows', None)
+
+    if output_rows is not None:
+        output_rows[filename] = count
+
+
+def get_tsv_filename(
+    filename: str,
+) -> str:
+    """Return the filename of the TSV file paired with a CSV file.
+
+    Args:
+        filename (str):
+            The filename of the CSV file.
+
+    Returns:
+        str:
+        The filename of the TSV file.
+    """
+    return filename.replace('.csv', '.tsv')
 
-    This provides an alternative feed in the event that Google Sheets cannot
-    read from a CSV file (a bug that seems to have been introduced the
-    week of December 7).
+
+def get_parquet_filename(
+    filename: str,
+) -> str:
+    """Return the filename of the Parquet file paired with a CSV file.
 
     Args:
         filename (str):
             The filename of the CSV file.
+
+    Returns:
+        str:
+        The filename of the Parquet file.
+    """
+    return filename.replace('.csv', '.parquet')
+
+
+def get_output_filenames(
+    filename: str,
+    info: Mapping[str, Any],
+) -> list[str]:
+    """Return the filenames of every file written for a dataset.
+
+    This includes the Parquet file if the dataset sets ``parquet`` and
+    :py:mod:`pyarrow` is installed. A dataset's output is only complete if
+    all of these files exist.
+
+    TSV files aren't included, since not every parser writes them.
+
+    Args:
+        filename (str):
+            The filename of the dataset's main output file.
+
+        info (dict):
+            The dataset information.
+
+    Returns:
+        list of str:
+        The filenames, starting with ``filename``.
+    """
+    filenames = [filename]
+
+    if info.get('parquet') and _get_pyarrow() is not None:
+        filenames.append(get_parquet_filename(filename))
+
+    return filenames
+
+
+@lru_cache(maxsize=None)
+def _get_pyarrow() -> Any:
+    """Return the pyarrow module, if installed.
+
+    Parquet output is optional (see ``requirements-parquet.txt``), and
+    pyarrow is slow to import, so it's only imported when first needed.
+
+    Returns:
+        module:
+        The :py:mod:`pyarrow` module, with :py:mod:`pyarrow.parquet` loaded,
+        or ``None`` if it isn't installed.
+    """
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        return None
+
+    return pyarrow
+
+
+class ParquetRowWriter(object):
+    """Writes rows to a Parquet file.
+
+    Rows are collected into columns, and written out as a row group once
+    :py:data:`PARQUET_ROW_GROUP_SIZE` rows have been collected. Values are
+    converted to the column's type when written. Blank values are written as
+    nulls for all but string columns.
+
+    If a row group can't be written, the writer stops writing rows and
+    records the error, rather than failing the other files being written.
+
+    This requires :py:mod:`pyarrow`.
+
+    Attributes:
+        error (str):
+            The error that stopped the file from being written, or ``None``.
+    """
+
+    def __init__(
+        self,
+        fp: io.IOBase,
+        columns: Sequence[tuple[str, str | None]],
+    ) -> None:
+        """Initialize the writer.
+
+        Args:
+            fp (file):
+                The file pointer to write to. This must be opened in binary
+                mode.
+
+            columns (list of tuple):
+                The name and data type of each column, in order (see
+                :py:data:`PARQUET_COLUMN_TYPES`).
+        """
+        pyarrow = _get_pyarrow()
+
+        self.columns = columns
+        self.error = None
+        self.schema = pyarrow.schema([
+            (_name, getattr(pyarrow,
+                            PARQUET_COLUMN_TYPES.get(_data_type, 'string'))())
+            for _name, _data_type in columns
+        ])
+
+        self._writer = pyarrow.parquet.ParquetWriter(fp, self.schema)
+        self._rows = []
+
+    def writerow(
+        self,
+        values: Sequence[Any],
+    ) -> None:
+        """Write a row.
+
+        Args:
+            values (list):
+                The values for each column, in order.
+        """
+        if self.error is not None:
+            return
+
+        self._rows.append(values)
+
+        if len(self._rows) >= PARQUET_ROW_GROUP_SIZE:
+            self._flush()
+
+    def close(self) -> None:
+        """Write any remaining rows and finish the file."""
+        if self._rows and self.error is None:
+            self._flush()
+
+        try:
+            self._writer.close()
+        except (OSError, _get_pyarrow().ArrowException) as e:
+            if self.error is None:
+                self.error = str(e)
+
+    def _flush(self) -> None:
+        """Write the collected rows as a row group.
+
+        If a value can't be converted to its column's type, or the rows
+        can't be written, :py:attr:`error` is set instead.
+        """
+        pyarrow = _get_pyarrow()
+        rows = self._rows
+        self._rows = []
+        arrays = []
+
+        for (name, data_type), field, values in zip(self.columns,
+                                                    self.schema,
+                                                    zip(*rows)):
+            arrow_type = PARQUET_COLUMN_TYPES.get(data_type)
+
+            try:
+                if arrow_type is None:
+                    column_array = pyarrow.array(
+                        [
+                            None if _value is None else str(_value)
+                            for _value in values
+                        ],
+                        type=field.type)
+                elif arrow_type == 'date32':
+                    column_array = pyarrow.array(
+                        [
+                            _value or None
+                            for _value in values
+                        ],
+                        type=pyarrow.string()).cast(field.type)
+                else:
+                    convert = int if arrow_type == 'int64' else float
+                    column_array = pyarrow.array(
+                        [
+                            (None
+                             if _value is None or _value == ''
+                             else convert(_value))
+                            for _value in values
+                        ],
+                        type=field.type)
+            except (ValueError, TypeError, pyarrow.ArrowException) as e:
+                self.error = 'Unable to write column "%s": %s' % (name, e)
+                return
+
+            arrays.append(column_array)
+
+        try:
+            self._writer.write_table(pyarrow.Table.from_arrays(
+                arrays,
+                schema=self.schema))
+        except (OSError, pyarrow.ArrowException) as e:
+            self.error = str(e)
+
+
+class CSVRowWriter(object):
+    """Writes rows to several CSV files at once.
+
+    Each row is converted to a list of values once, and then written to every
+    file, each with its own dialect. Rows can also be written to other
+    writers (such as a :py:class:`ParquetRowWriter`), which don't receive
+    the header.
+
+    Attributes:
+        row_count (int):
+            The number of rows written, not including the header.
+    """
+
+    def __init__(
+        self,
+        fieldnames: Sequence[str],
+        writers: Sequence[Any],
+        typed_writers: Sequence[Any] = (),
+    ) -> None:
+        """Initialize the writer.
+
+        Args:
+            fieldnames (list of str):
+                The names of the columns, in order.
+
+            writers (list of object):
+                The :py:func:`csv.writer` objects to write to.
+
+            typed_writers (list of object, optional):
+                Additional writers that take rows of values, but no header.
+        """
+        self.fieldnames = fieldnames
+        self.row_count = 0
+
+        self._fieldnames_set = frozenset(fieldnames)
+
+        self._header_writerows = [
+            _writer.writerow
+            for _writer in writers
+        ]
+        self._writerows = self._header_writerows + [
+            _writer.writerow
+            for _writer in typed_writers
+        ]
+
+    def writeheader(self) -> None:
+        """Write the header row."""
+        for writerow in self._header_writerows:
+            writerow(self.fieldnames)
+
+    def writerow(
+        self,
+        row: Mapping[str, Any],
+    ) -> None:
+        """Write a row.
+
+        Args:
+            row (dict):
+                The row to write. Missing columns are written as blank.
+
+        Raises:
+            ValueError:
+                The row contains keys that aren't in the field names. As
+                with :py:class:`csv.DictWriter`, this is an error rather than
+                silently dropping data.
+        """
+        extra_keys = row.keys() - self._fieldnames_set
+
+        if extra_keys:
+            raise ValueError('dict contains fields not in fieldnames: %s'
+                             % ', '.join(
+                                 repr(_key)
+                                 for _key in sorted(extra_keys, key=str)
+                             ))
+
+        values = [
+            row.get(_name, '')
+            for _name in self.fieldnames
+        ]
+
+        for writerow in self._writerows:
+            writerow(values)
+
+        self.row_count += 1
+
+
+@contextmanager
+def _safe_open_parquet_for_write(
+    filename: str,
+    columns: Sequence[tuple[str, str | None]],
+) -> Iterator[ParquetRowWriter]:
+    """Safely open a Parquet file for writing.
+
+    As with :py:func:`safe_open_for_write`, the file is only moved into place
+    once writing has completed. If the writer fails (see
+    :py:class:`ParquetRowWriter`), the error is logged and the file is
+    discarded, along with any older copy, so that it isn't left out of date.
+
+    Args:
+        filename (str):
+            The name of the Parquet file to write.
+
+        columns (list of tuple):
+            The name and data type of each column, in order.
+
+    Context:
+        ParquetRowWriter:
+        The writer for the rows.
+    """
+    temp_filename = '%s.tmp' % filename
+
+    try:
+        with open(temp_filename, 'wb') as fp:
+            writer = ParquetRowWriter(fp, columns=columns)
+
+            try:
+                yield writer
+            finally:
+                writer.close()
+    except BaseException:
+        # Don't leave a partially-written file behind.
+        os.unlink(temp_filename)
+        raise
+
+    if writer.error is None:
+        os.rename(temp_filename, filename)
+    else:
+        sys.stderr.write('Unable to write %s, so it will be skipped: %s\n'
+                         % (filename, writer.error))
+        os.unlink(temp_filename)
+
+        if os.path.exists(filename):
+            os.unlink(filename)
+
+
+@contextmanager
+def safe_open_csv_for_write(
+    filename: str,
+    fieldnames: Sequence[str],
+    tsv: bool = True,
+    parquet_columns: (Sequence[tuple[str, str | None]] | None) = None,
+) -> Iterator[CSVRowWriter]:
+    """Safely open CSV, TSV, and Parquet files for writing.
+
+    Rows are written to all files in one pass. As with
+    :py:func:`safe_open_for_write`, the files are only moved into place once
+    writing has completed.
+
+    The number of rows written is recorded once the files are in place (see
+    :py:func:`record_output_rows`).
+
+    Args:
+        filename (str):
+            The name of the CSV file to write.
+
+        fieldnames (list of str):
+            The names of the columns, in order.
+
+        tsv (bool, optional):
+            Whether to write a TSV file alongside the CSV file (see
+            :py:func:`get_tsv_filename`). This provides an alternative feed
+            in the event that Google Sheets cannot read from a CSV file (a
+            bug that seems to have been introduced the week of December 7).
+
+        parquet_columns (list of tuple, optional):
+            The name and data type of each column, if a Parquet file should
+            be written alongside the CSV file (see
+            :py:func:`get_parquet_filename`). This is ignored if
+            :py:mod:`pyarrow` is not installed. If the Parquet file can't be
+            written, it's skipped, and the other files are still written.
+
+    Context:
+        CSVRowWriter:
+        The writer for the rows.
     """
-    out_filename = filename.replace('.csv', '.tsv')
+    with ExitStack() as stack:
+        writers = [
+            csv.writer(stack.enter_context(safe_open_for_write(filename))),
+        ]
+        typed_writers = []
+
+        if tsv:
+            writers.append(csv.writer(
+                stack.enter_context(safe_open_for_write(
+                    get_tsv_filename(filename))),
+                dialect='excel-tab'))
+
+        if parquet_columns is not None and _get_pyarrow() is not None:
+            typed_writers.append(stack.enter_context(
+                _safe_open_parquet_for_write(get_parquet_filename(filename),
+                                             columns=parquet_columns)))
+
+        writer = CSVRowWriter(fieldnames, writers, typed_writers)
 
-    with open(filename, 'r') as in_fp:
-        rows = csv.reader(in_fp)
+        yield writer
 
-        with safe_open_for_write(out_filename) as out_fp:
-            csv.writer(out_fp, dialect='excel-tab').writerows(rows)
+    record_output_rows(filename, writer.row_count)
 
 
 def slugify(
@@ -315,6 +886,185 @@ def parse_pct(
                       allow_blank=True)
 
 
+def _parse_known_date(
+    value: str,
+    date_format: str,
+) -> datetime | None:
+    """Quickly parse a date in a common, fixed-width format.
+
+    This handles the zero-padded forms of ``%Y-%m-%d``, ``%m/%d/%Y``, and
+    ``%Y-%m-%dT%H:%M:%S.%fZ``, without going through
+    :py:meth:`datetime.datetime.strptime`.
+
+    Args:
+        value (str):
+            The value to parse.
+
+        date_format (str):
+            The format of the value.
+
+    Returns:
+        datetime.datetime:
+        The parsed date, or ``None`` if the value or format isn't handled
+        here and must be parsed by :py:meth:`~datetime.datetime.strptime`.
+    """
+    if not isinstance(value, str) or not value.isascii():
+        return None
+
+    try:
+        if date_format == '%Y-%m-%d':
+            if (len(value) == 10 and
+                value[4] == '-' and
+                value[7] == '-' and
+                value[:4].isdigit() and
+                value[5:7].isdigit() and
+                value[8:].isdigit()):
+                return datetime(int(value[:4]),
+                                int(value[5:7]),
+                                int(value[8:]))
+        elif date_format == '%m/%d/%Y':
+            if (len(value) == 10 and
+                value[2] == '/' and
+                value[5] == '/' and
+                value[:2].isdigit() and
+                value[3:5].isdigit() and
+                value[6:].isdigit()):
+                return datetime(int(value[6:]),
+                                int(value[:2]),
+                                int(value[3:5]))
+        elif date_format == '%Y-%m-%dT%H:%M:%S.%fZ':
+            fraction = value[20:-1]
+
+            if (21 < len(value) <= 27 and
+                value[4] == '-' and
+                value[7] == '-' and
+                value[10] == 'T' and
+                value[13] == ':' and
+                value[16] == ':' and
+                value[19] == '.' and
+                value[-1] == 'Z' and
+                value[:4].isdigit() and
+                value[5:7].isdigit() and
+                value[8:10].isdigit() and
+                value[11:13].isdigit() and
+                value[14:16].isdigit() and
+                value[17:19].isdigit() and
+                fraction.isdigit()):
+                return datetime(int(value[:4]),
+                                int(value[5:7]),
+                                int(value[8:10]),
+                                int(value[11:13]),
+                                int(value[14:16]),
+                                int(value[17:19]),
+                                int(fraction.ljust(6, '0')))
+    except ValueError:
+        # Let strptime() report the error.
+        pass
+
+    return None
+
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def parse_date(
+    value: str,
+    date_format: str,
+) -> datetime:
+    """Parse a date from a string.
+
+    Common formats are parsed directly, and anything else is parsed by
+    :py:meth:`datetime.datetime.strptime`. Results are remembered, so
+    repeated dates are only parsed once.
+
+    Args:
+        value (str):
+            The value to parse.
+
+        date_format (str):
+            The :py:meth:`~datetime.datetime.strptime` format of the value.
+
+    Returns:
+        datetime.datetime:
+        The parsed date.
+
+    Raises:
+        ValueError:
+            The value did not match the format.
+    """
+    date = _parse_known_date(value, date_format)
+
+    if date is None:
+        date = datetime.strptime(value, date_format)
+
+    return date
+
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def format_date(
+    date: datetime,
+) -> str:
+    """Return a date in ``YYYY-MM-DD`` form.
+
+    Results are remembered, so repeated dates are only formatted once.
+
+    Args:
+        date (datetime.datetime):
+            The date to format.
+
+    Returns:
+        str:
+        The formatted date.
+    """
+    return date.strftime('%Y-%m-%d')
+
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def get_date_ordinal(
+    value: str,
+    date_format: str = '%Y-%m-%d',
+) -> int:
+    """Return the day ordinal for a date string.
+
+    Ordinals are integers that increase by one each day (see
+    :py:meth:`datetime.datetime.toordinal`), making them cheap to compare
+    and step through. Results are remembered.
+
+    Args:
+        value (str):
+            The value to parse.
+
+        date_format (str, optional):
+            The :py:meth:`~datetime.datetime.strptime` format of the value.
+
+    Returns:
+        int:
+        The day ordinal.
+
+    Raises:
+        ValueError:
+            The value did not match the format.
+    """
+    return parse_date(value, date_format).toordinal()
+
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def format_date_ordinal(
+    day: int,
+) -> str:
+    """Return a day ordinal as a date in ``YYYY-MM-DD`` form.
+
+    Results are remembered.
+
+    Args:
+        day (int):
+            The day ordinal.
+
+    Returns:
+        str:
+        The formatted date.
+    """
+    return format_date(datetime.fromordinal(day))
+
+
 def parse_csv_value(
     value: Any,
     *,
@@ -371,86 +1121,791 @@ def parse_csv_value(
             The data could not be parsed correctly. Details are in the error
             message.
     """
-    if data_type == 'date':
-        try:
-            value = (
-                datetime.strptime(value, col_info['format'])
-                .strftime('%Y-%m-%d')
-            )
-        except Exception:
-            raise ParseError(
-                f'Unable to parse date "{value}" using format '
-                f'"{col_info["format"]}"'
-            )
-    elif data_type == 'int_or_blank':
-        try:
-            value = parse_int(value, allow_blank=True)
-        except ValueError:
-            raise ParseError(
-                f'Expected {value!r} to be an integer or empty string.'
-            )
-    elif data_type == 'int':
-        try:
-            value = parse_int(value)
-        except ValueError:
-            raise ParseError(f'Expected {value!r} to be an integer.')
-    elif data_type == 'real':
-        try:
-            value = parse_real(value)
-        except ValueError:
-            raise ParseError(f'Expected {value!r} to be an integer.')
-    elif data_type == 'pct':
-        try:
-            value = parse_pct(value)
-        except ValueError:
-            raise ParseError(f'Expected {value!r} to be a percentage.')
-    elif data_type == 'string' or data_type is None:
-        pass
-    else:
-        raise ParseError(f'Unexpected data type {data_type}')
+    parse_value = get_csv_value_parser(data_type, col_info)
 
-    return value
+    if parse_value is None:
+        return value
 
+    return parse_value(value)
 
-def build_missing_date_rows(
-    cur_date: datetime,
-    latest_date: datetime,
-    date_field: str = 'date',
-    empty_row_data: dict[str, Any] = {},
-) -> list[dict[str, Any]]:
-    """Build empty rows for a span of dates.
 
-    Args:
-        cur_date (datetime.datetime):
-            The current date.
+def get_csv_value_parser(
+    data_type: str | None,
+    col_info: Mapping[str, Any],
+) -> Callable[[Any], Any] | None:
+    """Return a function that parses values of a data type from a CSV file.
 
-        latest_date (datetime.datetime):
-            The latest date in the dataset.
+    This looks up the data type and options once, so that the returned
+    function can be applied to many values. See :py:func:`parse_csv_value`
+    for the supported data types.
 
-        date_field (str, optional):
-            The name of the field to add to generated rows for the row date.
+    Args:
+        data_type (str):
+            The data type to parse.
 
-        empty_row_data (dict, optional):
-            Data to add to each empty row.
+        col_info (dict):
+            The column information, used to specify additional options for
+            a data type.
 
     Returns:
-        list of dict:
-        The generated list of rows.
+        callable:
+        A function that takes a value and returns the parsed value, raising
+        :py:class:`~bc19live.errors.ParseError` if it can't be parsed. This
+        will be ``None`` if values are returned as-is.
     """
-    assert cur_date >= latest_date, (
-        f'Current date ({cur_date}) should be >= latest date ({latest_date})'
-    )
+    if data_type == 'date':
+        date_format = col_info.get('format')
 
-    return [
-        {
-            **empty_row_data,
-            date_field: (latest_date +
-                         timedelta(days=day)).strftime('%Y-%m-%d'),
-        }
-        for day in range(1, (cur_date - latest_date).days)
+        def _parse_date(value):
+            try:
+                return format_date(parse_date(value, date_format))
+            except Exception:
+                raise ParseError(
+                    f'Unable to parse date "{value}" using format '
+                    f'"{date_format}"'
+                )
+
+        return _parse_date
+    elif data_type == 'int_or_blank':
+        # These inline parse_int(), parse_real(), and parse_pct(), since
+        # they're called for most values in most files.
+        def _parse_int_or_blank(value):
+            if value == '' or isinstance(value, int):
+                return value
+
+            try:
+                return int(value.replace(',', '') or 0)
+            except ValueError:
+                raise ParseError(
+                    f'Expected {value!r} to be an integer or empty string.'
+                )
+
+        return _parse_int_or_blank
+    elif data_type == 'int':
+        def _parse_int(value):
+            if isinstance(value, int):
+                return value
+
+            try:
+                return int(value.replace(',', '') or 0)
+            except ValueError:
+                raise ParseError(f'Expected {value!r} to be an integer.')
+
+        return _parse_int
+    elif data_type == 'real':
+        def _parse_real(value):
+            if isinstance(value, (int, float)):
+                return value
+
+            try:
+                return float(value.replace(',', '') or 0)
+            except ValueError:
+                raise ParseError(f'Expected {value!r} to be an integer.')
+
+        return _parse_real
+    elif data_type == 'pct':
+        def _parse_pct(value):
+            norm_value = value.replace('%', '')
+
+            if norm_value == '':
+                return norm_value
+
+            try:
+                return float(norm_value.replace(',', '') or 0)
+            except ValueError:
+                raise ParseError(f'Expected {value!r} to be a percentage.')
+
+        return _parse_pct
+    elif data_type == 'string' or data_type is None:
+        return None
+    else:
+        def _parse_unknown(value):
+            raise ParseError(f'Unexpected data type {data_type}')
+
+        return _parse_unknown
+
+
+def compile_csv_columns(
+    csv_info: Mapping[str, Any],
+) -> list[tuple[str, Callable[[dict[str, str], Any, int], Any]]]:
+    """Compile the column definitions for parsing a CSV file.
+
+    Each column definition in ``csv_info['columns']`` is turned into a
+    function specialized for that column's source, type, and options, so
+    that they don't need to be looked up again for every row. See
+    :py:func:`parse_csv` for the supported options.
+
+    Args:
+        csv_info (dict):
+            The CSV parser options.
+
+    Returns:
+        list of tuple:
+        A list of 2-tuples, in column order, containing:
+
+        1. The destination column name.
+        2. A function taking the source row, the previous source row (or
+           ``None``), and the row index, and returning the value for the
+           column.
+    """
+    default_type = csv_info.get('default_type')
+
+    return [
+        (_col_info['name'], _compile_csv_column(_col_info, default_type))
+        for _col_info in csv_info['columns']
     ]
 
 
+def get_csv_parquet_columns(
+    csv_info: Mapping[str, Any],
+) -> list[tuple[str, str | None]]:
+    """Return the Parquet columns for a parsed CSV file.
+
+    Args:
+        csv_info (dict):
+            The CSV parser options.
+
+    Returns:
+        list of tuple:
+        The name and data type of each column, for
+        :py:func:`safe_open_csv_for_write`. ``delta`` columns use their
+        ``delta_type``.
+    """
+    default_type = csv_info.get('default_type')
+    columns = []
+
+    for col_info in csv_info['columns']:
+        data_type = col_info.get('type', default_type)
+
+        if data_type == 'delta':
+            data_type = col_info.get('delta_type', default_type)
+
+        columns.append((col_info['name'], data_type))
+
+    return columns
+
+
+def _compile_csv_column(
+    col_info: Mapping[str, Any],
+    default_type: str | None,
+) -> Callable[[dict[str, str], Any, int], Any]:
+    """Compile a column definition for parsing a CSV file.
+
+    Args:
+        col_info (dict):
+            The column definition.
+
+        default_type (str):
+            The default type for columns without a type.
+
+    Returns:
+        callable:
+        A function taking the source row, the previous source row (or
+        ``None``), and the row index, and returning the value for the column.
+    """
+    dest_name = col_info['name']
+    src_name = col_info.get('source_column', dest_name)
+    data_type = col_info.get('type', default_type)
+    func = col_info.get('transform_func')
+    default = col_info.get('default')
+
+    def _get_value(row, row_i):
+        if callable(func):
+            return func(row=row,
+                        src_name=src_name,
+                        data_type=data_type,
+                        col_info=col_info)
+
+        try:
+            value = row[src_name]
+        except KeyError:
+            if default is None:
+                raise ParseError('Missing column in CSV file: %s'
+                                 % src_name)
+
+            value = default
+
+        if value == '#DIV/0!':
+            raise ParseError('Got DIV/0 for row=%s, column=%s'
+                             % (row_i, src_name),
+                             row=row)
+
+        return value
+
+    if data_type == 'delta':
+        delta_from = col_info['delta_from']
+        parse_delta = get_csv_value_parser(
+            col_info.get('delta_type', default_type),
+            col_info)
+
+        def _convert_delta(row, prev_row, row_i):
+            value = _get_value(row, row_i)
+
+            if (row[delta_from] == '' or
+                prev_row is None or
+                prev_row[delta_from] == ''):
+                return ''
+            elif parse_delta is None:
+                return value
+            else:
+                return parse_delta(value)
+
+        return _convert_delta
+
+    parse_value = get_csv_value_parser(data_type, col_info)
+
+    if callable(func):
+        def _convert(row, prev_row, row_i):
+            value = _get_value(row, row_i)
+
+            if parse_value is None:
+                return value
+
+            return parse_value(value)
+    elif parse_value is None:
+        # This is the most common case, so the lookup is done inline.
+        def _convert(row, prev_row, row_i):
+            value = row.get(src_name, _get_value)
+
+            if value is _get_value or value == '#DIV/0!':
+                return _get_value(row, row_i)
+
+            return value
+    else:
+        def _convert(row, prev_row, row_i):
+            value = row.get(src_name, _get_value)
+
+            if value is _get_value or value == '#DIV/0!':
+                value = _get_value(row, row_i)
+
+            return parse_value(value)
+
+    return _convert
+
+
+def prefilter_csv_lines(
+    lines: Iterator[bytes],
+    needles: bytes | str | Sequence[bytes | str],
+) -> Iterator[bytes]:
+    """Yield the raw lines of CSV records that contain any of the needles.
+
+    This is a cheap check done before lines are decoded and parsed, to
+    quickly discard most records in large files. Records with quoted values
+    spanning multiple lines are kept or discarded as a whole, based on
+    whether any of their lines contain a needle.
+
+    Lines are checked in batches. Batches without multi-line records are
+    searched all at once, and only the matching lines are pulled out.
+
+    Args:
+        lines (iterator of bytes):
+            The raw lines of the CSV file, without the header.
+
+        needles (bytes or str or list):
+            The needle or list of needles to look for. Strings are encoded
+            as UTF-8.
+
+    Yields:
+        bytes:
+        Each line belonging to a record that contains a needle.
+    """
+    if isinstance(needles, (bytes, str)):
+        needles = [needles]
+
+    needles = [
+        _needle.encode('utf-8') if isinstance(_needle, str) else _needle
+        for _needle in needles
+    ]
+    assert needles and all(needles), 'Prefilter needles must not be empty'
+
+    if len(needles) == 1:
+        needle = needles[0]
+
+        def _find(block, pos=0):
+            return block.find(needle, pos)
+
+        def search(line):
+            return needle in line
+    else:
+        search_needles = re.compile(b'|'.join(
+            re.escape(_needle)
+            for _needle in needles
+        )).search
+
+        def _find(block, pos=0):
+            m = search_needles(block, pos)
+
+            if m is None:
+                return -1
+
+            return m.start()
+
+        search = search_needles
+
+    record = []
+    in_quotes = False
+
+    while True:
+        batch = list(itertools.islice(lines, PREFILTER_BATCH_SIZE))
+
+        if not batch:
+            break
+
+        if not in_quotes:
+            block = b'\n'.join(batch)
+
+            if (b'"' not in block or
+                not any(_line.count(b'"') % 2 for _line in batch)):
+                # Every record in this batch is on a single line, so the
+                # whole batch can be searched at once.
+                i = _find(block)
+
+                while i != -1:
+                    line_start = block.rfind(b'\n', 0, i) + 1
+                    line_end = block.find(b'\n', i)
+
+                    if line_end == -1:
+                        line_end = len(block)
+
+                    yield block[line_start:line_end]
+                    i = _find(block, line_end)
+
+                continue
+
+        for line in batch:
+            if not in_quotes and b'"' not in line:
+                if search(line):
+                    yield line
+
+                continue
+
+            # Escaped quotes come in pairs, so an odd number of quotes means
+            # a quoted value was opened or closed.
+            if line.count(b'"') % 2:
+                in_quotes = not in_quotes
+
+            record.append(line)
+
+            if not in_quotes:
+                if any(map(search, record)):
+                    yield from record
+
+                record = []
+
+    if record:
+        # The file ended inside a quoted value. Leave it to the CSV parser
+        # to report.
+        yield from record
+
+
+def compile_csv_filters(
+    csv_info: Mapping[str, Any],
+) -> list[tuple[str, Callable[[Any, Any], bool], Any]]:
+    """Compile the declarative row filters for parsing a CSV file.
+
+    Filters are listed in ``csv_info['filters']`` as ``(column, operator,
+    value)`` tuples, where ``column`` is a column in the source file and
+    ``operator`` is one of :py:data:`CSV_FILTER_OPERATORS`. Source values are
+    compared as strings.
+
+    Args:
+        csv_info (dict):
+            The CSV parser options.
+
+    Returns:
+        list of tuple:
+        A list of 3-tuples containing:
+
+        1. The source column name.
+        2. The comparison function.
+        3. The value to compare against.
+
+    Raises:
+        ParseError:
+            A filter used an unsupported operator.
+    """
+    filters = []
+
+    for src_name, op, value in csv_info.get('filters', []):
+        try:
+            test = CSV_FILTER_OPERATORS[op]
+        except KeyError:
+            raise ParseError('Unsupported operator "%s" in filter for column '
+                             '"%s"'
+                             % (op, src_name))
+
+        filters.append((src_name, test, value))
+
+    return filters
+
+
+def _get_csv_row_matcher(
+    csv_info: Mapping[str, Any],
+) -> Callable[[dict[str, str]], bool] | None:
+    """Return a function that determines whether to process a source row.
+
+    This combines the ``filters`` and ``match_row`` options.
+
+    Args:
+        csv_info (dict):
+            The CSV parser options.
+
+    Returns:
+        callable:
+        A function taking a source row and returning whether it should be
+        processed, or ``None`` if all rows should be processed.
+    """
+    filters = compile_csv_filters(csv_info)
+    match = csv_info.get('match_row')
+
+    if not filters:
+        return match
+
+    def _match(row):
+        for src_name, test, value in filters:
+            try:
+                row_value = row[src_name]
+            except KeyError:
+                raise ParseError('Missing column in CSV file: %s'
+                                 % src_name)
+
+            if not test(row_value, value):
+                return False
+
+        return match is None or match(row)
+
+    return _match
+
+
+def _iter_csv_rows(
+    csv_info: Mapping[str, Any],
+    column_plan: Sequence[tuple[str, Callable[..., Any]]],
+    lines: Iterator[str],
+    state: dict[str, Any],
+) -> Iterator[dict[str, Any]]:
+    """Parse rows from a CSV file, one row at a time.
+
+    This is the default engine for :py:func:`parse_csv`. Rows are yielded
+    as they're parsed.
+
+    Args:
+        csv_info (dict):
+            The CSV parser options.
+
+        column_plan (list of tuple):
+            The compiled columns, from :py:func:`compile_csv_columns`.
+
+        lines (iterator of str):
+            The lines of the CSV file, starting with the header.
+
+        state (dict):
+            The parsing state. ``prev_row`` contains the source row before
+            the first row in the file, if any. Once all rows have been
+            parsed, this is set to the last source row that was processed.
+
+    Yields:
+        dict:
+        Each parsed row.
+
+    Raises:
+        ParseError:
+            Expected data was missing or was in an unexpected format.
+    """
+    match = _get_csv_row_matcher(csv_info)
+    end_if = csv_info.get('end_if')
+    prev_row = state.get('prev_row')
+
+    reader = csv.DictReader(lines, delimiter=',')
+
+    for row_i, row in enumerate(reader):
+        if match is not None and not match(row):
+            continue
+
+        if end_if is not None and end_if(row):
+            break
+
+        yield {
+            _dest_name: _convert(row, prev_row, row_i)
+            for _dest_name, _convert in column_plan
+        }
+
+        prev_row = row
+
+    state['prev_row'] = prev_row
+
+
+def _iter_csv_rows_columnar(
+    csv_info: Mapping[str, Any],
+    column_plan: Sequence[tuple[str, Callable[..., Any]]],
+    lines: Iterator[str],
+    state: dict[str, Any],
+) -> Iterator[dict[str, Any]]:
+    """Parse rows from a CSV file, one column at a time.
+
+    Source rows are read as lists in batches, and ``filters`` are evaluated
+    against whole columns of each batch. Only the rows that remain are kept.
+    Once the file has been read, each destination column is converted in one
+    pass, and rows are assembled from the converted columns and yielded.
+
+    Source rows are only built as dictionaries when needed for
+    ``match_row``, ``transform_func``, or ``delta`` columns, and then only
+    for rows that passed the filters.
+
+    This is enabled by setting ``engine`` to ``columnar`` in the CSV parser
+    options.
+
+    Args:
+        csv_info (dict):
+            The CSV parser options.
+
+        column_plan (list of tuple):
+            The compiled columns, from :py:func:`compile_csv_columns`.
+
+        lines (iterator of str):
+            The lines of the CSV file, starting with the header.
+
+        state (dict):
+            The parsing state. ``prev_row`` contains the source row before
+            the first row in the file, if any. Once all rows have been
+            parsed, this is set to the last source row that was processed.
+
+    Yields:
+        dict:
+        Each parsed row.
+
+    Raises:
+        ParseError:
+            Expected data was missing or was in an unexpected format.
+    """
+    reader = csv.reader(lines, delimiter=',')
+
+    try:
+        header = next(reader)
+    except StopIteration:
+        return
+
+    num_fields = len(header)
+    default_type = csv_info.get('default_type')
+    match = csv_info.get('match_row')
+
+    # As with csv.DictReader, later columns take precedence over earlier
+    # columns with the same name.
+    field_indexes = {
+        _name: _i
+        for _i, _name in enumerate(header)
+    }
+
+    filters = []
+
+    for src_name, test, value in compile_csv_filters(csv_info):
+        try:
+            getter = operator.itemgetter(field_indexes[src_name])
+        except KeyError:
+            raise ParseError('Missing column in CSV file: %s' % src_name)
+
+        filters.append((getter, test, value))
+
+    needs_rows = (
+        match is not None or
+        any(
+            (callable(_col_info.get('transform_func')) or
+             _col_info.get('type', default_type) == 'delta')
+            for _col_info in csv_info['columns']
+        )
+    )
+
+    records = []
+    rows = []
+    row_indexes = array('q')
+    row_i = 0
+
+    while True:
+        chunk = list(itertools.islice(reader, CSV_COLUMNAR_BATCH_SIZE))
+
+        if not chunk:
+            break
+
+        if min(map(len, chunk)) >= num_fields:
+            batch = chunk
+        else:
+            # Blank lines are skipped, and short rows padded, as they are by
+            # csv.DictReader.
+            batch = [
+                (_record
+                 if len(_record) >= num_fields
+                 else _record + [None] * (num_fields - len(_record)))
+                for _record in chunk
+                if _record
+            ]
+
+        batch_indexes = range(row_i, row_i + len(batch))
+        row_i += len(batch)
+
+        for getter, test, value in filters:
+            if not batch:
+                break
+
+            mask = list(map(test,
+                            map(getter, batch),
+                            itertools.repeat(value)))
+            batch = list(itertools.compress(batch, mask))
+            batch_indexes = list(itertools.compress(batch_indexes, mask))
+
+        if needs_rows and batch:
+            batch_rows = [
+                dict(zip(header, _record))
+                for _record in batch
+            ]
+
+            if match is not None:
+                mask = list(map(match, batch_rows))
+                batch = list(itertools.compress(batch, mask))
+                batch_rows = list(itertools.compress(batch_rows, mask))
+                batch_indexes = list(itertools.compress(batch_indexes, mask))
+
+            rows += batch_rows
+
+        records += batch
+        row_indexes.extend(batch_indexes)
+
+    if not records:
+        return
+
+    prev_row = state.get('prev_row')
+    columns = []
+
+    for (dest_name, convert), col_info in zip(column_plan,
+                                              csv_info['columns']):
+        data_type = col_info.get('type', default_type)
+
+        if (callable(col_info.get('transform_func')) or
+            data_type == 'delta'):
+            # These need the full source row (and the previous one).
+            values = list(map(convert,
+                              rows,
+                              itertools.chain([prev_row], rows),
+                              row_indexes))
+        else:
+            src_name = col_info.get('source_column', dest_name)
+
+            try:
+                values = list(map(
+                    operator.itemgetter(field_indexes[src_name]),
+                    records))
+            except KeyError:
+                default = col_info.get('default')
+
+                if default is None:
+                    raise ParseError('Missing column in CSV file: %s'
+                                     % src_name)
+
+                values = [default] * len(records)
+
+            if '#DIV/0!' in values:
+                i = values.index('#DIV/0!')
+
+                raise ParseError('Got DIV/0 for row=%s, column=%s'
+                                 % (row_indexes[i], src_name),
+                                 row=dict(zip(header, records[i])))
+
+            parse_value = get_csv_value_parser(data_type, col_info)
+
+            if parse_value is not None:
+                values = list(map(parse_value, values))
+
+        columns.append(values)
+
+    dest_names = [
+        _dest_name
+        for _dest_name, _convert in column_plan
+    ]
+
+    if rows:
+        state['prev_row'] = rows[-1]
+    else:
+        state['prev_row'] = dict(zip(header, records[-1]))
+
+    for values in zip(*columns):
+        yield dict(zip(dest_names, values))
+
+
+def build_missing_date_rows(
+    cur_date: datetime,
+    latest_date: datetime,
+    date_field: str = 'date',
+    empty_row_data: dict[str, Any] = {},
+) -> list[dict[str, Any]]:
+    """Build empty rows for a span of dates.
+
+    Args:
+        cur_date (datetime.datetime):
+            The current date.
+
+        latest_date (datetime.datetime):
+            The latest date in the dataset.
+
+        date_field (str, optional):
+            The name of the field to add to generated rows for the row date.
+
+        empty_row_data (dict, optional):
+            Data to add to each empty row.
+
+    Returns:
+        list of dict:
+        The generated list of rows.
+    """
+    assert cur_date >= latest_date, (
+        f'Current date ({cur_date}) should be >= latest date ({latest_date})'
+    )
+
+    latest_day = latest_date.toordinal()
+
+    return list(iter_missing_date_rows(
+        cur_day=latest_day + (cur_date - latest_date).days,
+        latest_day=latest_day,
+        date_field=date_field,
+        empty_row_data=empty_row_data))
+
+
+def iter_missing_date_rows(
+    cur_day: int,
+    latest_day: int,
+    date_field: str = 'date',
+    empty_row_data: Mapping[str, Any] = {},
+) -> Iterator[dict[str, Any]]:
+    """Yield empty rows for the days between two day ordinals.
+
+    Rows are generated as they're needed, and each date is only formatted
+    once (see :py:func:`format_date_ordinal`).
+
+    Args:
+        cur_day (int):
+            The day ordinal of the current date.
+
+        latest_day (int):
+            The day ordinal of the latest date in the dataset.
+
+        date_field (str, optional):
+            The name of the field to add to generated rows for the row date.
+
+        empty_row_data (dict, optional):
+            Data to add to each empty row.
+
+    Yields:
+        dict:
+        Each generated row.
+    """
+    assert cur_day >= latest_day, (
+        f'Current day ({cur_day}) should be >= latest day ({latest_day})'
+    )
+
+    for day in range(latest_day + 1, cur_day):
+        row = dict(empty_row_data)
+        row[date_field] = format_date_ordinal(day)
+
+        yield row
+
+
 def add_or_update_json_date_row(
     filename: str,
     row_data: dict[str, Any],
@@ -461,60 +1916,111 @@ def add_or_update_json_date_row(
     This will effectively append a new date row to a new or existing JSON file,
     or update the last row if it matches the given date.
 
-    The JSON file must be a dictionary with a ``dates`` key, mapping to a list
-    of rows. Dates must be in YYYY-MM-DD format.
+    The row is stored in the date row store (see
+    :py:func:`get_date_row_store`), rather than rewriting the JSON file. The
+    file is written by :py:func:`materialize_json_date_rows` when it's next
+    needed. It will be a dictionary with a ``dates`` key, mapping to a list of
+    rows. Dates must be in YYYY-MM-DD format.
 
     If rows were missing for dates between the last row's date and the current
     date, they will be added as blank rows with only the date field set.
 
     Args:
         filename (str):
-            The name of the file to write to.
+            The name of the JSON file for the dataset.
 
         row_data (dict):
             Data for the row.
 
         date_field (str, optional):
             The name of the field in the row data that references the date.
+
+    Raises:
+        bc19live.errors.ParseError:
+            The existing JSON file could not be loaded.
     """
+    store = get_date_row_store()
     date_key = row_data[date_field]
-
-    if os.path.exists(filename):
-        with open(filename, 'r') as fp:
-            try:
-                dataset = json.load(fp)
-            except Exception as e:
-                raise ParseError('Unable to load existing dataset: %s', e)
-    else:
-        dataset = {
-            'dates': [],
-        }
-
-    dates_data = dataset['dates']
-
-    try:
-        latest_date_key = dates_data[-1][date_field]
-    except (IndexError, KeyError):
-        latest_date_key = None
+    latest_date_key = store.get_last_date(filename, date_field)
 
     if latest_date_key == date_key:
-        dates_data[-1] = row_data
+        store.add_rows(filename, [row_data],
+                       date_field=date_field,
+                       replace_last=True)
     else:
         # See if we have days we're missing. If so, we need to fill in the
         # gaps. This is mainly to keep the spreadsheet rows aligned.
-        if latest_date_key is not None:
-            dates_data += build_missing_date_rows(
-                cur_date=datetime.strptime(date_key, '%Y-%m-%d'),
-                latest_date=datetime.strptime(latest_date_key, '%Y-%m-%d'),
-                date_field=date_field)
+        if latest_date_key is None:
+            rows = [row_data]
+        else:
+            rows = itertools.chain(
+                iter_missing_date_rows(
+                    cur_day=get_date_ordinal(date_key),
+                    latest_day=get_date_ordinal(latest_date_key),
+                    date_field=date_field),
+                [row_data])
+
+        store.add_rows(filename, rows,
+                       date_field=date_field)
+
+
+def materialize_json_date_rows(
+    filename: str,
+) -> bool:
+    """Write the JSON file for a dataset built a date row at a time.
+
+    This writes out the rows stored by :py:func:`add_or_update_json_date_row`
+    as a dictionary with a ``dates`` key, formatted the same way as
+    :py:func:`json.dump` with ``indent=2`` and ``sort_keys=True``. Rows are
+    stored pre-serialized, so only their indentation needs to change.
+
+    Nothing is written if the file is already current, or if it's not
+    managed by the date row store (see :py:func:`get_date_row_store`). The
+    number of rows is recorded
+    either way for managed files (see :py:func:`record_output_rows`).
+
+    Args:
+        filename (str):
+            The name of the JSON file for the dataset.
+
+    Returns:
+        bool:
+        ``True`` if the file was written.
+    """
+    store = get_date_row_store()
+
+    if not store.needs_write(filename):
+        row_count = store.get_row_count(filename)
+
+        if row_count is not None:
+            record_output_rows(filename, row_count)
+
+        return False
 
-        dates_data.append(row_data)
+    row_texts = store.iter_row_texts(filename)
+    row_count = 0
 
     with safe_open_for_write(filename) as fp:
-        json.dump(dataset,
-                  fp,
-                  indent=2,
-                  sort_keys=True)
+        try:
+            row_text = next(row_texts)
+        except StopIteration:
+            fp.write('{\n  "dates": []\n}')
+        else:
+            fp.write('{\n  "dates": [\n    ')
+            fp.write(row_text.replace('\n', '\n    '))
+            row_count = 1
+
+            for row_text in row_texts:
+                fp.write(',\n    ')
+                fp.write(row_text.replace('\n', '\n    '))
+                row_count += 1
+
+            fp.write('\n  ]\n}')
+
+    store.mark_written(filename)
+    record_output_rows(filename, row_count)
+
+    return True
 
 
 def convert_json_to_csv(
@@ -534,7 +2040,10 @@ def convert_json_to_csv(
 
     Args:
         info (dict):
-            Parser option information. This must define ``key_map``.
+            Parser option information. This must define ``key_map``. A
+            TSV file is written alongside the CSV file unless ``tsv`` is
+            ``False``, and a Parquet file is written if ``parquet`` is
+            ``True`` (using the ``type`` of each key, if any).
 
         in_fp (file):
             A file pointer to the JSON file being read.
@@ -550,14 +2059,27 @@ def convert_json_to_csv(
     dataset = json.load(in_fp) or {}
     match = info.get('match_row')
 
-    with safe_open_for_write(out_filename) as fp:
-        csv_writer = csv.DictWriter(
-            fp,
-            fieldnames=[
-                key_entry[0]
-                for key_entry in key_map
-            ])
-        csv_writer.writeheader()
+    fieldnames = [
+        key_entry[0]
+        for key_entry in key_map
+    ]
+
+    if info.get('parquet'):
+        parquet_columns = [
+            (_key,
+             _paths_or_info.get('type')
+             if isinstance(_paths_or_info, dict)
+             else None)
+            for _key, _paths_or_info in key_map
+        ]
+    else:
+        parquet_columns = None
+
+    with safe_open_csv_for_write(out_filename,
+                                 fieldnames=fieldnames,
+                                 tsv=info.get('tsv', True),
+                                 parquet_columns=parquet_columns) as writer:
+        writer.writeheader()
 
         if isinstance(dataset, list):
             rows = dataset
@@ -599,21 +2121,254 @@ def convert_json_to_csv(
 
                 row_data[key] = value
 
-            csv_writer.writerow(row_data)
+            writer.writerow(row_data)
+
+
+def _get_unique_key(
+    row: Mapping[str, Any],
+    unique_col: str | tuple[str, ...],
+) -> Any:
+    """Return the value identifying a unique row.
+
+    Values are compared as they would be written to a CSV file, so that
+    parsed rows can be compared against rows read from an existing file.
+
+    Args:
+        row (dict):
+            The row data.
+
+        unique_col (str or tuple of str):
+            The column or columns identifying a unique row.
+
+    Returns:
+        object:
+        The value or tuple of values identifying the row.
+    """
+    def _normalize(value):
+        if value is None:
+            return ''
+
+        return str(value)
+
+    if isinstance(unique_col, tuple):
+        return tuple(
+            _normalize(row[_col])
+            for _col in unique_col
+        )
+    else:
+        return _normalize(row[unique_col])
+
+
+def _iter_unique_csv_rows(
+    rows: Iterator[dict[str, Any]],
+    unique_col: str | tuple[str, ...],
+    unique_found: set[Any],
+) -> Iterator[dict[str, Any]]:
+    """Yield rows, skipping any that were already encountered.
 
-    convert_csv_to_tsv(out_filename)
+    Args:
+        rows (iterator of dict):
+            The rows to filter.
+
+        unique_col (str or tuple of str):
+            The column or columns identifying a unique row.
+
+        unique_found (set):
+            The unique keys for rows already encountered. This will be
+            updated as rows are yielded.
+
+    Yields:
+        dict:
+        Each row not previously encountered.
+    """
+    for row in rows:
+        unique_key = _get_unique_key(row, unique_col)
+
+        if unique_key not in unique_found:
+            # We haven't encountered this row before.
+            unique_found.add(unique_key)
+
+            yield row
+
+
+def _iter_csv_rows_with_missing_dates(
+    rows: Iterator[dict[str, Any]],
+    columns: Sequence[Mapping[str, Any]],
+) -> Iterator[dict[str, Any]]:
+    """Yield rows, adding empty rows for any dates that are skipped.
+
+    Args:
+        rows (iterator of dict):
+            The parsed rows, in date order.
+
+        columns (list of dict):
+            The column definitions. Exactly one must be a ``date`` column.
+
+    Yields:
+        dict:
+        Each row, along with any generated rows for missing dates.
+    """
+    # Make sure that the source feed doesn't skip any days. If they do, we
+    # need to pad them out.
+    #
+    # This has been an on-going problem with state vaccine data.
+    date_source_col: (str | None) = None
+    date_dest_col: (str | None) = None
+    date_fmt: (str | None) = None
+    empty_row_data: dict[str, Any] = {}
+
+    for col_info in columns:
+        col_name = col_info['name']
+
+        if col_info.get('type') == 'date':
+            assert not date_source_col
+            assert not date_dest_col
+            date_dest_col = col_name
+            date_source_col = col_info.get('source_column', date_dest_col)
+            date_fmt = col_info.get('format', '%Y-%m-%d')
+        else:
+            empty_row_data[col_name] = None
+
+    assert date_source_col, 'Could not determine date column'
+    assert date_fmt, (
+        'Could not determine format for date column "%s"'
+        % date_source_col)
+    assert date_dest_col
+
+    prev_day = None
+
+    for row in rows:
+        day = get_date_ordinal(row[date_dest_col])
+
+        if prev_day is not None and day - prev_day != 1:
+            yield from iter_missing_date_rows(cur_day=day,
+                                              latest_day=prev_day,
+                                              date_field=date_dest_col,
+                                              empty_row_data=empty_row_data)
+
+        yield row
+        prev_day = day
+
+
+def _validate_csv_rows(
+    rows: Sequence[dict[str, Any]],
+    validators: (Callable[..., Any] | list[Callable[..., Any]] | None),
+) -> None:
+    """Validate the rows generated for a CSV file.
+
+    Args:
+        rows (list of dict):
+            The rows.
+
+        validators (callable or list of callable):
+            The validator or list of validators to run.
+
+    Raises:
+        ParseError:
+            A validator failed.
+    """
+    # Validate that we have the data we expect. We don't want to be offset by
+    # a row or have garbage or something.
+    if validators is None:
+        return
+
+    if not isinstance(validators, list):
+        validators = [validators]
+
+    for validate_func in validators:
+        result = validate_func(rows)
+
+        if isinstance(result, tuple):
+            result, reason = result
+        else:
+            reason = None
+
+        if not result:
+            raise ParseError('Resulting CSV file did not pass '
+                             'validation: %s'
+                             % (reason or 'Checks failed'))
+
+
+def _read_written_csv_rows(
+    filename: str,
+    csv_info: Mapping[str, Any],
+) -> list[dict[str, Any]]:
+    """Read the rows of a CSV file previously written by parse_csv.
+
+    Values are converted back to the types they were parsed as (see
+    :py:data:`WRITTEN_CSV_VALUE_TYPES`), so that they can be sorted,
+    compared, and validated alongside newly-parsed rows.
+
+    Args:
+        filename (str):
+            The CSV file to read.
+
+        csv_info (dict):
+            The CSV parser options used to write the file.
+
+    Returns:
+        list of dict:
+        The rows in the file.
+
+    Raises:
+        ParseError:
+            A value could not be converted to its column's type.
+    """
+    default_type = csv_info.get('default_type')
+    value_types = {}
+
+    for col_info in csv_info['columns']:
+        data_type = col_info.get('type', default_type)
+
+        if data_type == 'delta':
+            data_type = col_info.get('delta_type', default_type)
+
+        value_type = WRITTEN_CSV_VALUE_TYPES.get(data_type)
+
+        if value_type is not None:
+            value_types[col_info['name']] = value_type
+
+    with open(filename, 'r') as fp:
+        rows = list(csv.DictReader(fp))
+
+    for row in rows:
+        for name, value_type in value_types.items():
+            value = row.get(name)
+
+            if value:
+                try:
+                    row[name] = value_type(value)
+                except ValueError:
+                    raise ParseError(
+                        'Unable to read existing value %r for column "%s" '
+                        'in %s'
+                        % (value, name, filename),
+                        row=row)
+
+    return rows
 
 
 def parse_csv(
     info: Mapping[str, Any],
     response: requests.Response,
     out_filename: str,
+    merge_existing: bool = False,
+    replace_from: (tuple[str, str] | None) = None,
     **kwargs,
 ) -> None:
     """Parse a CSV file, building a new CSV file based on its information.
 
     This takes information on the columns in a source CSV file and how they
-    should be transformed into a destination CSV File.
+    should be transformed into a destination CSV File. The column definitions
+    are compiled once up-front (see :py:func:`compile_csv_columns`), rather
+    than being looked up again for every row.
+
+    If the rows don't need to be sorted or merged into an existing file,
+    they're written as they're parsed, rather than being held in memory.
+    Duplicate rows and missing dates are handled as rows are written. If
+    there are validators, the written rows are also collected into a list for
+    them, and they're run once the file is written but before it's moved into
+    place.
 
     These options live in ``info['csv']``, and contain:
 
@@ -649,12 +2404,33 @@ def parse_csv(
 
     ``end_if`` (callable, optional):
         An optional function that takes a row's data and returns whether
-        parsing should stop for the file.
+        parsing should stop for the file. This is not supported by the
+        ``columnar`` engine, so files using it are always parsed a row at a
+        time.
+
+    ``engine`` (str, optional):
+        The engine used to read the source file. This defaults to ``rows``,
+        which reads one row at a time. ``columnar`` reads the file in batches
+        and filters and converts it a column at a time, which is faster for
+        large files where ``filters`` discard most rows.
+
+    ``filters`` (list of tuple, optional):
+        A list of ``(column, operator, value)`` filters that rows in the
+        source CSV file must match in order to be processed. See
+        :py:func:`compile_csv_filters`. These are checked before
+        ``match_row``.
 
     ``match_row`` (callable, optional):
         An optional function that determines whether a row should be processed
         from the source CSV file. This takes the parsed row dictionary.
 
+    ``prefilter`` (bytes or str or list, optional):
+        A needle or list of needles that a record's raw line must contain in
+        order to be parsed. Records without any are discarded before being
+        decoded (see :py:func:`prefilter_csv_lines`). This must only discard
+        records that ``filters`` or ``match_row`` would also reject. The row
+        indexes in error messages only count records that pass.
+
     ``skip_rows`` (int, optional):
         An optional number of rows to skip in the source file.
 
@@ -672,6 +2448,9 @@ def parse_csv(
     Args:
         info (dict):
             The parser options information. This must contain a ``csv`` key.
+            A TSV file is written alongside the CSV file unless ``tsv`` is
+            ``False``, and a Parquet file is written if ``parquet`` is
+            ``True`` (see :py:func:`get_csv_parquet_columns`).
 
         response (requests.Respone):
             The HTTP response containing the CSV file.
@@ -679,6 +2458,18 @@ def parse_csv(
         out_filename (str):
             The filename for the CSV file to write.
 
+        merge_existing (bool, optional):
+            Whether to merge the parsed rows into the existing rows in
+            ``out_filename``, rather than replacing them. Uniqueness, sorting,
+            missing dates, and validation are applied to the merged rows.
+            Existing rows are read back with their columns' types (see
+            :py:func:`_read_written_csv_rows`).
+
+        replace_from (tuple, optional):
+            A tuple of a column name and a value. When merging, existing rows
+            with a value in that column on or after this one are removed
+            first, to be replaced by the parsed rows.
+
         **kwargs (dict, unused):
             Unused keyword arguments passed to this parser.
 
@@ -689,202 +2480,128 @@ def parse_csv(
     """
     csv_info = info.get('csv', {})
     columns = csv_info['columns']
-    match = csv_info.get('match_row')
+    column_plan = compile_csv_columns(csv_info)
+    engine = csv_info.get('engine', 'rows')
     sort_by = csv_info.get('sort_by')
     validators = csv_info.get('validators', csv_info.get('validator'))
     unique_col = csv_info.get('unique_col')
     skip_rows = csv_info.get('skip_rows', 0)
-    default_type = csv_info.get('default_type')
     end_if = csv_info.get('end_if')
     add_missing_dates = csv_info.get('add_missing_dates', False)
+    prefilter = csv_info.get('prefilter')
+
+    if info.get('parquet'):
+        parquet_columns = get_csv_parquet_columns(csv_info)
+    else:
+        parquet_columns = None
 
     unique_found = set()
     results = []
 
-    lines = response.iter_lines()
-
-    for i in range(skip_rows):
-        next(lines)
-
-    reader = csv.DictReader(codecs.iterdecode(lines, 'utf-8'),
-                            delimiter=',')
-    prev_row = None
-
-    for row_i, row in enumerate(reader):
-        if match is not None and not match(row):
-            continue
-
-        if end_if is not None and end_if(row):
-            break
+    if merge_existing:
+        results = _read_written_csv_rows(out_filename, csv_info)
+
+        if replace_from is not None:
+            replace_col, replace_value = replace_from
+            results = [
+                _row
+                for _row in results
+                if _row[replace_col] < replace_value
+            ]
+
+        if unique_col is not None:
+            unique_found = {
+                _get_unique_key(_row, unique_col)
+                for _row in results
+            }
+
+    if engine == 'columnar' and end_if is None:
+        iter_rows = _iter_csv_rows_columnar
+    elif engine in ('rows', 'columnar'):
+        iter_rows = _iter_csv_rows
+    else:
+        raise ParseError('Unknown CSV engine: %s' % engine)
+
+    lines = iter_response_lines(response)
+    header_lines = list(itertools.islice(lines, skip_rows + 1))
+
+    if prefilter:
+        lines = prefilter_csv_lines(lines, prefilter)
+
+    parse_state = {
+        'prev_row': None,
+    }
+
+    row_results = iter_rows(
+        csv_info=csv_info,
+        column_plan=column_plan,
+        lines=codecs.iterdecode(
+            itertools.chain(header_lines[skip_rows:], lines),
+            'utf-8'),
+        state=parse_state)
+
+    if unique_col is not None:
+        row_results = _iter_unique_csv_rows(row_results,
+                                            unique_col=unique_col,
+                                            unique_found=unique_found)
+
+    fieldnames = [
+        col_info['name']
+        for col_info in columns
+    ]
+    open_writer = partial(safe_open_csv_for_write,
+                          out_filename,
+                          fieldnames=fieldnames,
+                          tsv=info.get('tsv', True),
+                          parquet_columns=parquet_columns)
+
+    if sort_by is None and not merge_existing:
+        # Nothing here needs the full set of rows at once, so rows are
+        # written as they're parsed.
+        if add_missing_dates:
+            row_results = _iter_csv_rows_with_missing_dates(row_results,
+                                                            columns)
 
-        row_result = {}
+        with open_writer() as writer:
+            writer.writeheader()
 
-        for col_info in columns:
-            dest_name = col_info['name']
-            src_name = col_info.get('source_column', dest_name)
-            data_type = col_info.get('type', default_type)
-            func = col_info.get('transform_func')
-            default = col_info.get('default')
-
-            if callable(func):
-                value = func(row=row,
-                             src_name=src_name,
-                             data_type=data_type,
-                             col_info=col_info)
+            if validators is None:
+                for row_result in row_results:
+                    writer.writerow(row_result)
             else:
-                try:
-                    value = row[src_name]
-                except KeyError:
-                    if default is None:
-                        raise ParseError('Missing column in CSV file: %s'
-                                         % src_name)
-
-                    value = default
-
-                if value == '#DIV/0!':
-                    raise ParseError('Got DIV/0 for row=%s, column=%s'
-                                     % (row_i, src_name),
-                                     row=row)
-
-            if data_type == 'delta':
-                delta_from = col_info['delta_from']
-
-                if (row[delta_from] == '' or
-                    prev_row is None or
-                    prev_row[delta_from] == ''):
-                    value = ''
-                else:
-                    value = parse_csv_value(
-                        value=value,
-                        data_type=col_info.get('delta_type', default_type),
-                        col_info=col_info)
+                # Validators may look at any of the rows, so they're kept
+                # while they're written.
+                for row_result in row_results:
+                    writer.writerow(row_result)
+                    results.append(row_result)
+
+                # This must happen before the file is moved into place.
+                _validate_csv_rows(results, validators)
+    else:
+        results += row_results
+
+        # Some datasets are unordered or not in an expected order. If needed,
+        # sort.
+        if sort_by is not None:
+            if isinstance(sort_by, tuple):
+                results = sorted(
+                    results,
+                    key=lambda row: tuple(
+                        row[_key]
+                        for _key in sort_by
+                    ))
             else:
-                value = parse_csv_value(value=value,
-                                        data_type=data_type,
-                                        col_info=col_info)
-
-            row_result[dest_name] = value
-
-        if unique_col is None:
-            results.append(row_result)
-        elif isinstance(unique_col, tuple):
-            unique_values = tuple(
-                row_result[_col]
-                for _col in unique_col
-            )
-
-            if unique_values not in unique_found:
-                # We haven't encountered this row before. Add it to the
-                # results.
-                results.append(row_result)
-                unique_found.add(unique_values)
-        else:
-            unique_value = row_result[unique_col]
-
-            if unique_value not in unique_found:
-                # We haven't encountered this row before. Add it to the
-                # results.
-                results.append(row_result)
-                unique_found.add(unique_value)
-
-        prev_row = row
-
-    # Some datasets are unordered or not in an expected order. If needed, sort.
-    if sort_by is not None:
-        if isinstance(sort_by, tuple):
-            results = sorted(
-                results,
-                key=lambda row: tuple(
-                    row[_key]
-                    for _key in sort_by
-                ))
-        else:
-            results = sorted(results, key=lambda row: row[sort_by])
-
-    if add_missing_dates:
-        # Make sure that the source feed doesn't skip any days. If they
-        # do, we need to pad them out.
-        #
-        # This has been an on-going problem with state vaccine data.
-        date_source_col: (str | None) = None
-        date_dest_col: (str | None) = None
-        empty_row_data: (dict[str, Any] | None) = None
-        date_fmt: (str | None) = None
+                results = sorted(results, key=lambda row: row[sort_by])
 
         if add_missing_dates:
-            empty_row_data = {}
-
-            for col_info in columns:
-                col_name = col_info['name']
-
-                if col_info.get('type') == 'date':
-                    assert not date_source_col
-                    assert not date_dest_col
-                    date_dest_col = col_name
-                    date_source_col = col_info.get('source_column',
-                                                   date_dest_col)
-                    date_fmt = col_info.get('format', '%Y-%m-%d')
-                else:
-                    empty_row_data[col_name] = None
+            results = list(_iter_csv_rows_with_missing_dates(results,
+                                                             columns))
 
-            assert date_source_col, 'Could not determine date column'
-            assert date_fmt, (
-                'Could not determine format for date column "%s"'
-                % date_source_col)
+        _validate_csv_rows(results, validators)
 
-        prev_date = None
-        new_results = []
-
-        assert date_dest_col
-        assert empty_row_data is not None
-
-        for row in results:
-            date = datetime.strptime(row[date_dest_col], '%Y-%m-%d')
-
-            if prev_date is not None:
-                missing_rows = build_missing_date_rows(
-                    cur_date=date,
-                    latest_date=prev_date,
-                    date_field=date_dest_col,
-                    empty_row_data=empty_row_data)
-
-                if missing_rows:
-                    new_results += missing_rows
-
-            new_results.append(row)
-            prev_date = date
-
-        results = new_results
-
-    # Validate that we have the data we expect. We don't want to be offset by
-    # a row or have garbage or something.
-    if validators is not None:
-        if not isinstance(validators, list):
-            validators = [validators]
-
-        for validate_func in validators:
-            result = validate_func(results)
-
-            if isinstance(result, tuple):
-                result, reason = result
-            else:
-                reason = None
-
-            if not result:
-                raise ParseError('Resulting CSV file did not pass '
-                                 'validation: %s'
-                                 % (reason or 'Checks failed'))
-
-    with safe_open_for_write(out_filename) as out_fp:
-        writer = csv.DictWriter(
-            out_fp,
-            fieldnames=[
-                col_info['name']
-                for col_info in columns
-            ])
-        writer.writeheader()
+        with open_writer() as writer:
+            writer.writeheader()
 
-        for row_result in results:
-            writer.writerow(row_result)
+            for row_result in results:
+                writer.writerow(row_result)
 
-    convert_csv_to_tsv(out_filename)
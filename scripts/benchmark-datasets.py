@@ -0,0 +1,16 @@
+#!/usr/bin/env python3
+"""Benchmarks the dataset parsers for the bc19.live dashboard.
+
+This script replays recorded upstream payloads (CSV exports, web pages,
+Tableau bootstrap payloads, and JSON feeds) through each dataset's parser,
+without any network access, reporting the time and peak memory used by each
+parser as the payloads are scaled up.
+
+Payloads are recorded by running this with ``--record``.
+"""
+
+from bc19live.benchmark import main
+
+
+if __name__ == '__main__':
+    main()
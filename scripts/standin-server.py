@@ -0,0 +1,18 @@
+#!/usr/bin/env python3
+"""Runs a local stand-in for the bc19.live dashboard's upstream servers.
+
+This serves recorded upstream payloads (recorded with
+``benchmark-datasets.py --record``) over HTTP, with support for conditional
+requests, byte ranges, and gzip compression. Latency and errors can be
+injected to test builds under load.
+
+Builds can be pointed at the server by writing its URL map with
+``--write-url-map`` and passing that file to ``build-datasets.py
+--url-map``.
+"""
+
+from bc19live.standin import main
+
+
+if __name__ == '__main__':
+    main()
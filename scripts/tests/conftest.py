@@ -0,0 +1,101 @@
+import os
+import threading
+
+import pytest
+
+from bc19live.daterows import DateRowStore
+from bc19live.fixtures import FixtureStore
+from bc19live.http import _http_settings
+from bc19live.httpcache import HTTPCacheStore
+from bc19live.standin import StandInServer, get_url_map
+from bc19live.utils import use_date_row_store
+
+
+@pytest.fixture
+def http_cache_store(tmp_path, monkeypatch):
+    """Return a temporary HTTP cache store, used in place of the real one.
+
+    Cached response bodies are also stored in the temporary directory.
+
+    Args:
+        tmp_path (pathlib.Path):
+            A temporary directory for the test.
+
+        monkeypatch (pytest.MonkeyPatch):
+            The fixture used to replace the stores.
+
+    Yields:
+        bc19live.httpcache.HTTPCacheStore:
+        The store.
+    """
+    store = HTTPCacheStore(os.path.join(tmp_path, 'http-cache.sqlite3'))
+
+    monkeypatch.setattr('bc19live.buildcache.http_cache', store)
+    monkeypatch.setattr('bc19live.ckan.http_cache', store)
+    monkeypatch.setattr('bc19live.http.http_cache', store)
+    monkeypatch.setattr('bc19live.http.HTTP_BODY_CACHE_DIR',
+                        os.path.join(tmp_path, 'http-cache-bodies'))
+
+    yield store
+
+    store.close()
+
+
+@pytest.fixture
+def date_row_store(tmp_path):
+    """Return a temporary date row store, used in place of the real one.
+
+    Args:
+        tmp_path (pathlib.Path):
+            A temporary directory for the test.
+
+    Yields:
+        bc19live.daterows.DateRowStore:
+        The store.
+    """
+    store = DateRowStore(os.path.join(tmp_path, 'date-rows.sqlite3'))
+
+    with use_date_row_store(store):
+        yield store
+
+    store.close()
+
+
+@pytest.fixture
+def standin_server(tmp_path, monkeypatch, http_cache_store):
+    """Return a running stand-in server that all HTTP requests are sent to.
+
+    Responses are served from a temporary fixture store, available as the
+    server's ``store`` attribute. Requests aren't retried, and each test
+    starts with fresh rate limiters and circuit breakers.
+
+    Args:
+        tmp_path (pathlib.Path):
+            A temporary directory for the test.
+
+        monkeypatch (pytest.MonkeyPatch):
+            The fixture used to replace the HTTP settings.
+
+        http_cache_store (bc19live.httpcache.HTTPCacheStore):
+            The temporary HTTP cache store.
+
+    Yields:
+        bc19live.standin.StandInServer:
+        The server.
+    """
+    server = StandInServer(('127.0.0.1', 0),
+                           FixtureStore(os.path.join(tmp_path, 'fixtures')))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    monkeypatch.setattr('bc19live.http._http_settings',
+                        dict(_http_settings,
+                             max_retries=0,
+                             url_map=get_url_map(server.base_url)))
+    monkeypatch.setattr('bc19live.http._host_controls', {})
+
+    yield server
+
+    server.shutdown()
+    server.server_close()
+    thread.join()
@@ -0,0 +1,117 @@
+import io
+import json
+import os
+
+import pytest
+
+from bc19live.benchmark import (_scale_csv, _scale_json, benchmark_dataset,
+                                print_results)
+from bc19live.fixtures import FixtureMissingError, FixtureStore
+from bc19live.http import build_response
+
+
+URL = 'https://example.com/a.csv'
+
+INFO = {
+    'filename': 'a.csv',
+    'format': 'csv',
+    'tsv': False,
+    'url': URL,
+    'csv': {
+        'columns': [
+            {
+                'name': 'date',
+                'type': 'date',
+                'format': '%Y-%m-%d',
+            },
+            {
+                'name': 'cases',
+                'type': 'int',
+            },
+        ],
+    },
+}
+
+
+def test_scale_csv():
+    """Testing _scale_csv"""
+    assert _scale_csv(b'x\na,b\n1,2\n3,4', 2, header_lines=2) == (
+        b'x\na,b\n'
+        b'1,2\n3,4\n'
+        b'1,2\n3,4\n'
+    )
+
+
+def test_scale_json():
+    """Testing _scale_json repeating the largest list"""
+    data = _scale_json(json.dumps({
+        'a': [1],
+        'b': {
+            'c': [1, 2],
+        },
+    }).encode('utf-8'), 3)
+
+    assert json.loads(data) == {
+        'a': [1],
+        'b': {
+            'c': [1, 2, 1, 2, 1, 2],
+        },
+    }
+
+
+def test_benchmark_dataset(tmp_path):
+    """Testing benchmark_dataset against recorded payloads"""
+    store = FixtureStore(os.path.join(tmp_path, 'fixtures'))
+    store.add_response('GET', URL, build_response(
+        URL,
+        b'date,cases\n2021-01-01,1\n2021-01-02,2\n'))
+    store.set_dataset_urls('a.csv', {
+        'main': URL,
+    })
+
+    results = benchmark_dataset(INFO, store, scales=[1, 10])
+
+    assert [
+        (_result['scale'], _result['status'], _result['rows'],
+         _result['input_bytes'])
+        for _result in results
+    ] == [
+        (1, 'ok', 2, 37),
+        (10, 'ok', 20, 271),
+    ]
+    assert all(
+        _result['seconds'] >= 0 and _result['peak_bytes'] > 0
+        for _result in results
+    )
+
+    fp = io.StringIO()
+    print_results(results, fp)
+    lines = fp.getvalue().splitlines()
+
+    assert lines[0].split() == ['Dataset', 'Scale', 'Status', 'Input',
+                                'bytes', 'Rows', 'Time', 's', 'Peak', 'MiB']
+    assert lines[3].split()[:5] == ['a.csv', '10x', 'ok', '271', '20']
+
+
+def test_benchmark_dataset_with_error(tmp_path):
+    """Testing benchmark_dataset with a failing parser"""
+    store = FixtureStore(os.path.join(tmp_path, 'fixtures'))
+    store.add_response('GET', URL, build_response(
+        URL,
+        b'date,cases\n2021-01-01,many\n'))
+    store.set_dataset_urls('a.csv', {
+        'main': URL,
+    })
+
+    results = benchmark_dataset(INFO, store, scales=[1])
+
+    assert results[0]['status'].startswith('error: ')
+    assert results[0]['rows'] is None
+
+
+def test_benchmark_dataset_missing_fixtures(tmp_path):
+    """Testing benchmark_dataset without recorded payloads"""
+    store = FixtureStore(os.path.join(tmp_path, 'fixtures'))
+
+    with pytest.raises(FixtureMissingError):
+        benchmark_dataset(INFO, store)
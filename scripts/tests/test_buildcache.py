@@ -0,0 +1,154 @@
+import inspect
+import os
+
+from bc19live.buildcache import (PACKAGE_DIR, _get_source_filenames,
+                                 _source_hashes, get_build_key)
+from bc19live.main import _build_dataset
+from bc19live.utils import parse_csv
+
+
+class _Registry(object):
+    """A registry containing a single dataset.
+
+    Attributes:
+        info (dict):
+            The dataset information.
+    """
+
+    def __init__(self, info):
+        """Initialize the registry.
+
+        Args:
+            info (dict):
+                The dataset information.
+        """
+        self.info = info
+
+    def get_dataset(self, filename):
+        """Return the dataset information.
+
+        Args:
+            filename (str):
+                The filename of the dataset.
+
+        Returns:
+            dict:
+            The dataset information.
+        """
+        assert filename == self.info['filename']
+
+        return self.info
+
+
+def _build_local_dataset(tmp_path, **info):
+    """Build a dataset from a local source twice.
+
+    Args:
+        tmp_path (pathlib.Path):
+            The data directory.
+
+        **info (dict):
+            Options to set in the dataset information.
+
+    Returns:
+        int:
+        The number of times the parser ran.
+    """
+    calls = []
+
+    def _parser(info, in_fp, out_filename):
+        calls.append(out_filename)
+
+        with open(out_filename, 'w') as fp:
+            fp.write(in_fp.read())
+
+    os.makedirs(os.path.join(tmp_path, 'csv'), exist_ok=True)
+
+    with open(os.path.join(tmp_path, 'csv', 'a.csv'), 'w') as fp:
+        fp.write('a,b\n1,2\n')
+
+    registry = _Registry(dict({
+        'filename': 'b.csv',
+        'format': 'csv',
+        'parser': _parser,
+        'local_source': {
+            'filename': 'a.csv',
+            'format': 'csv',
+        },
+    }, **info))
+
+    for i in range(2):
+        _build_dataset(
+            {
+                'filename': 'b.csv',
+                'format': 'csv',
+            },
+            registry)
+
+    return len(calls)
+
+
+def test_get_source_filenames():
+    """Testing _get_source_filenames only including imported modules"""
+    filenames = {
+        os.path.relpath(_filename, PACKAGE_DIR)
+        for _filename in _get_source_filenames(
+            inspect.getsourcefile(parse_csv))
+    }
+
+    assert {'__init__.py', 'daterows.py', 'utils.py'} <= filenames
+    assert not filenames & {'benchmark.py', 'main.py', 'report.py'}
+
+    filenames = {
+        os.path.relpath(_filename, PACKAGE_DIR)
+        for _filename in _get_source_filenames(
+            os.path.join(PACKAGE_DIR, 'datasets', 'hospital_cases.py'))
+    }
+
+    assert {'datasets/hospital_cases.py', 'tableau.py', 'utils.py'} <= \
+        filenames
+
+
+def test_build_key_source_changes(monkeypatch):
+    """Testing get_build_key with changes to source code"""
+    info = {
+        'filename': 'a.csv',
+        'format': 'csv',
+    }
+    input_hashes = {
+        'main': '1234',
+    }
+    key = get_build_key(info, parse_csv, input_hashes)
+
+    # Modules that the parser doesn't use don't affect the key.
+    monkeypatch.setitem(_source_hashes,
+                        os.path.join(PACKAGE_DIR, 'report.py'),
+                        'changed')
+
+    assert get_build_key(info, parse_csv, input_hashes) == key
+
+    # Modules that it does use do.
+    monkeypatch.setitem(_source_hashes,
+                        os.path.join(PACKAGE_DIR, 'daterows.py'),
+                        'changed')
+
+    assert get_build_key(info, parse_csv, input_hashes) != key
+
+
+def test_build_local_sources(http_cache_store, date_row_store, tmp_path,
+                             monkeypatch):
+    """Testing _build_dataset with unchanged local sources"""
+    monkeypatch.setattr('bc19live.main.DATA_DIR', str(tmp_path))
+
+    # The parser may depend on more than its inputs (such as the current
+    # date), so it must run every time.
+    assert _build_local_dataset(tmp_path) == 2
+
+
+def test_build_local_sources_with_build_cache(http_cache_store,
+                                              date_row_store, tmp_path,
+                                              monkeypatch):
+    """Testing _build_dataset with unchanged local sources and build_cache"""
+    monkeypatch.setattr('bc19live.main.DATA_DIR', str(tmp_path))
+
+    assert _build_local_dataset(tmp_path, build_cache=True) == 1
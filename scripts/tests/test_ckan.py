@@ -0,0 +1,259 @@
+import json
+import time
+
+import pytest
+
+from bc19live.ckan import (CKAN_FULL_FETCH_INTERVAL, build_ckan_csv_response,
+                           build_ckan_sql, can_fetch_ckan_incrementally,
+                           format_ckan_value, get_ckan_date_column,
+                           get_ckan_state, get_last_seen, parse_ckan_response,
+                           save_ckan_state)
+from bc19live.errors import CKANError
+from bc19live.http import build_response
+from bc19live.utils import parse_csv
+
+
+CKAN_INFO = {
+    'resource_id': 'abc-123',
+    'filters': {
+        'county': "Butte's",
+        'area_type': 'County',
+    },
+    'date_field': 'as_of_date',
+}
+
+
+def _make_info(**info):
+    """Return dataset information for a CKAN dataset.
+
+    Args:
+        **info (dict):
+            Options to set in the dataset information.
+
+    Returns:
+        dict:
+        The dataset information.
+    """
+    return dict({
+        'filename': 'test.csv',
+        'format': 'csv',
+        'append_only': True,
+        'ckan': CKAN_INFO,
+        'csv': {
+            'columns': [
+                {
+                    'name': 'date',
+                    'source_column': 'as_of_date',
+                    'type': 'date',
+                    'format': '%Y-%m-%d',
+                },
+                {
+                    'name': 'cases',
+                    'type': 'int',
+                },
+            ],
+        },
+    }, **info)
+
+
+def test_build_ckan_sql():
+    """Testing build_ckan_sql"""
+    assert build_ckan_sql(CKAN_INFO) == (
+        'SELECT * FROM "abc-123"'
+        ' WHERE "area_type" = \'County\' AND "county" = \'Butte\'\'s\''
+        ' ORDER BY "_id" LIMIT 10000 OFFSET 0'
+    )
+
+
+def test_build_ckan_sql_with_since():
+    """Testing build_ckan_sql with since, offset, and ignore_case"""
+    ckan_info = dict(CKAN_INFO, ignore_case=True)
+
+    assert build_ckan_sql(ckan_info, since='2021-01-02', offset=20000) == (
+        'SELECT * FROM "abc-123"'
+        ' WHERE UPPER("area_type") = UPPER(\'County\')'
+        ' AND UPPER("county") = UPPER(\'Butte\'\'s\')'
+        ' AND "as_of_date" >= \'2021-01-02\''
+        ' ORDER BY "_id" LIMIT 10000 OFFSET 20000'
+    )
+
+
+@pytest.mark.parametrize('value,expected', [
+    (None, ''),
+    (12, '12'),
+    (12.0, '12'),
+    (12.5, '12.5'),
+    (float('nan'), ''),
+    ('Butte', 'Butte'),
+])
+def test_format_ckan_value(value, expected):
+    """Testing format_ckan_value"""
+    assert format_ckan_value(value) == expected
+
+
+def test_parse_ckan_response():
+    """Testing parse_ckan_response"""
+    fields, records = parse_ckan_response(build_response(
+        'https://example.com/',
+        json.dumps({
+            'success': True,
+            'result': {
+                'fields': [
+                    {'id': '_id', 'type': 'int'},
+                    {'id': 'as_of_date', 'type': 'timestamp'},
+                    {'id': 'cases', 'type': 'numeric'},
+                    {'id': '_full_text', 'type': 'tsvector'},
+                ],
+                'records': [
+                    {'_id': 1, 'as_of_date': '2021-01-01', 'cases': 1},
+                ],
+            },
+        }).encode('utf-8')))
+
+    assert fields == [
+        {'id': 'as_of_date', 'type': 'timestamp'},
+        {'id': 'cases', 'type': 'numeric'},
+    ]
+    assert records == [
+        {'_id': 1, 'as_of_date': '2021-01-01', 'cases': 1},
+    ]
+
+
+def test_parse_ckan_response_with_error():
+    """Testing parse_ckan_response with an error response"""
+    with pytest.raises(CKANError, match='HTTP error 409'):
+        parse_ckan_response(build_response(
+            'https://example.com/',
+            json.dumps({
+                'success': False,
+                'error': 'Bad query',
+            }).encode('utf-8'),
+            status_code=409))
+
+
+def test_build_ckan_csv_response():
+    """Testing build_ckan_csv_response"""
+    response = build_ckan_csv_response(
+        CKAN_INFO,
+        [
+            {'id': 'as_of_date', 'type': 'text'},
+            {'id': 'cases', 'type': 'numeric'},
+            {'id': 'note', 'type': 'text'},
+        ],
+        [
+            {'as_of_date': '2021-01-01T00:00:00', 'cases': 12.0,
+             'note': 'a, b'},
+            {'as_of_date': '2021-01-02T00:00:00', 'cases': None,
+             'note': None},
+        ])
+
+    assert response.content == (
+        b'as_of_date,cases,note\n'
+        b'2021-01-01,12,"a, b"\n'
+        b'2021-01-02,,\n'
+    )
+
+
+def test_build_ckan_csv_response_with_timestamp_fields():
+    """Testing build_ckan_csv_response normalizing timestamp fields"""
+    response = build_ckan_csv_response(
+        CKAN_INFO,
+        [
+            {'id': 'as_of_date', 'type': 'timestamp'},
+            {'id': 'reported', 'type': 'timestamp'},
+            {'id': 'updated', 'type': 'date'},
+            {'id': 'note', 'type': 'text'},
+        ],
+        [
+            {'as_of_date': '2021-01-01T00:00:00',
+             'reported': '2021-01-03T12:30:00',
+             'updated': '2021-01-04',
+             'note': '2021-01-05T00:00:00'},
+            {'as_of_date': '2021-01-02T00:00:00',
+             'reported': None,
+             'updated': None,
+             'note': None},
+        ])
+
+    # Text fields are left alone, even if they look like timestamps.
+    assert response.content == (
+        b'as_of_date,reported,updated,note\n'
+        b'2021-01-01,2021-01-03,2021-01-04,2021-01-05T00:00:00\n'
+        b'2021-01-02,,,\n'
+    )
+
+
+def test_get_last_seen():
+    """Testing get_last_seen"""
+    records = [
+        {'as_of_date': '2021-01-02T00:00:00'},
+        {'as_of_date': '2021-01-03T00:00:00'},
+        {'as_of_date': None},
+    ]
+
+    assert get_last_seen(CKAN_INFO, records) == '2021-01-03T00:00:00'
+    assert get_last_seen(CKAN_INFO, records,
+                         '2021-01-04T00:00:00') == '2021-01-04T00:00:00'
+    assert get_last_seen(CKAN_INFO, []) is None
+
+
+def test_can_fetch_ckan_incrementally():
+    """Testing can_fetch_ckan_incrementally"""
+    info = _make_info()
+
+    assert get_ckan_date_column(info) == 'date'
+    assert can_fetch_ckan_incrementally(info, parse_csv)
+    assert not can_fetch_ckan_incrementally(info, lambda **kwargs: None)
+    assert not can_fetch_ckan_incrementally(_make_info(append_only=False),
+                                            parse_csv)
+
+    info = _make_info()
+    info['csv'] = dict(info['csv'], columns=info['csv']['columns'] + [
+        {
+            'name': 'new_cases',
+            'source_column': 'cases',
+            'type': 'delta',
+            'delta_from': 'cases',
+        },
+    ])
+
+    assert not can_fetch_ckan_incrementally(info, parse_csv)
+
+    info = _make_info()
+    info['csv'] = dict(info['csv'], columns=info['csv']['columns'][1:])
+
+    assert get_ckan_date_column(info) is None
+    assert not can_fetch_ckan_incrementally(info, parse_csv)
+
+
+def test_ckan_state(http_cache_store, monkeypatch):
+    """Testing get_ckan_state and save_ckan_state"""
+    assert get_ckan_state('test.csv', CKAN_INFO, 'key1') is None
+
+    save_ckan_state('test.csv', CKAN_INFO, 'key1', [])
+    assert get_ckan_state('test.csv', CKAN_INFO, 'key1') is None
+
+    save_ckan_state('test.csv', CKAN_INFO, 'key1', [
+        {'as_of_date': '2021-01-02T00:00:00'},
+    ])
+    state = get_ckan_state('test.csv', CKAN_INFO, 'key1')
+
+    assert state['last_seen'] == '2021-01-02T00:00:00'
+    assert get_ckan_state('test.csv', CKAN_INFO, 'key2') is None
+    assert get_ckan_state('test.csv', dict(CKAN_INFO, filters={}),
+                          'key1') is None
+
+    save_ckan_state('test.csv', CKAN_INFO, 'key1',
+                    [{'as_of_date': '2021-01-03T00:00:00'}],
+                    state=state)
+    new_state = get_ckan_state('test.csv', CKAN_INFO, 'key1')
+
+    assert new_state['last_seen'] == '2021-01-03T00:00:00'
+    assert new_state['full_fetched'] == state['full_fetched']
+
+    # A full fetch is needed once the interval has passed.
+    now = time.time()
+    monkeypatch.setattr('time.time',
+                        lambda: now + CKAN_FULL_FETCH_INTERVAL)
+
+    assert get_ckan_state('test.csv', CKAN_INFO, 'key1') is None
@@ -0,0 +1,502 @@
+import csv
+import io
+import os
+
+import pytest
+
+from bc19live.errors import ParseError
+from bc19live.http import build_response
+from bc19live.utils import (CSVRowWriter, collect_output_rows,
+                            compile_csv_columns, compile_csv_filters,
+                            parse_csv, prefilter_csv_lines)
+
+
+SOURCE_CSV = (
+    b'date,county,cases,tests,note\n'
+    b'2021-01-03,Butte,12,100,"a, b"\n'
+    b'2021-01-01,Butte,5,50,\n'
+    b'2021-01-01,Yuba,7,70,\n'
+    b'2021-01-02,Butte,,80,x\n'
+    b'2021-01-02,Glenn,9,90,"multi\nline"\n'
+)
+
+
+def _make_info(**csv_info):
+    """Return dataset information for parsing SOURCE_CSV.
+
+    Args:
+        **csv_info (dict):
+            Options to set in the CSV parser options.
+
+    Returns:
+        dict:
+        The dataset information.
+    """
+    return {
+        'filename': 'test.csv',
+        'format': 'csv',
+        'tsv': False,
+        'csv': dict({
+            'filters': [
+                ('county', '==', 'Butte'),
+            ],
+            'sort_by': 'date',
+            'columns': [
+                {
+                    'name': 'date',
+                    'type': 'date',
+                    'format': '%Y-%m-%d',
+                },
+                {
+                    'name': 'cases',
+                    'type': 'int_or_blank',
+                },
+                {
+                    'name': 'total_tests',
+                    'source_column': 'tests',
+                    'type': 'int',
+                },
+                {
+                    'name': 'note',
+                    'transform_func': (
+                        lambda row, src_name, data_type, col_info:
+                            row[src_name].upper()
+                    ),
+                },
+            ],
+        }, **csv_info),
+    }
+
+
+def _parse(tmp_path, info, content=SOURCE_CSV, **kwargs):
+    """Parse a CSV payload and return the written rows.
+
+    Args:
+        tmp_path (pathlib.Path):
+            The directory to write the file to.
+
+        info (dict):
+            The dataset information.
+
+        content (bytes, optional):
+            The CSV payload.
+
+        **kwargs (dict):
+            Additional arguments for the parser.
+
+    Returns:
+        tuple:
+        A 2-tuple containing the list of rows read back from the file, and
+        the number of rows recorded for it.
+    """
+    out_filename = os.path.join(tmp_path, 'test.csv')
+    output_rows = {}
+
+    with collect_output_rows(output_rows):
+        parse_csv(info=info,
+                  response=build_response('https://example.com/test.csv',
+                                          content),
+                  out_filename=out_filename,
+                  **kwargs)
+
+    with open(out_filename, 'r', newline='') as fp:
+        rows = list(csv.DictReader(fp))
+
+    return rows, output_rows[out_filename]
+
+
+@pytest.mark.parametrize('engine', ['rows', 'columnar'])
+def test_parse_csv(tmp_path, engine):
+    """Testing parse_csv"""
+    rows, row_count = _parse(tmp_path, _make_info(engine=engine))
+
+    assert rows == [
+        {
+            'date': '2021-01-01',
+            'cases': '5',
+            'total_tests': '50',
+            'note': '',
+        },
+        {
+            'date': '2021-01-02',
+            'cases': '',
+            'total_tests': '80',
+            'note': 'X',
+        },
+        {
+            'date': '2021-01-03',
+            'cases': '12',
+            'total_tests': '100',
+            'note': 'A, B',
+        },
+    ]
+    assert row_count == 3
+
+
+def test_parse_csv_engines_match(tmp_path):
+    """Testing parse_csv with the columnar engine matching the rows engine"""
+    info = _make_info(
+        filters=[
+            ('county', 'in', ('Butte', 'Glenn')),
+            ('date', '>=', '2021-01-02'),
+        ],
+        match_row=lambda row: row['tests'] != '100',
+        prefilter=[b'Butte', b'Glenn'],
+        sort_by=None,
+        add_missing_dates=True)
+
+    rows_results = _parse(tmp_path, dict(info,
+                                         csv=dict(info['csv'],
+                                                  engine='rows')))
+    columnar_results = _parse(tmp_path, dict(info,
+                                             csv=dict(info['csv'],
+                                                      engine='columnar')))
+
+    assert rows_results == columnar_results
+    assert [_row['date'] for _row in rows_results[0]] == [
+        '2021-01-02',
+        '2021-01-02',
+    ]
+
+
+@pytest.mark.parametrize('engine', ['rows', 'columnar'])
+def test_parse_csv_delta(tmp_path, engine):
+    """Testing parse_csv with delta columns"""
+    rows, row_count = _parse(
+        tmp_path,
+        _make_info(
+            engine=engine,
+            sort_by=None,
+            columns=[
+                {
+                    'name': 'date',
+                    'type': 'date',
+                    'format': '%Y-%m-%d',
+                },
+                {
+                    'name': 'total_tests',
+                    'source_column': 'tests',
+                    'type': 'int',
+                },
+                {
+                    'name': 'new_cases',
+                    'source_column': 'cases',
+                    'type': 'delta',
+                    'delta_from': 'cases',
+                    'delta_type': 'int',
+                },
+            ]))
+
+    # Deltas are blank for the first row, since there's no previous row,
+    # and for rows without a value to compare.
+    assert [
+        (_row['total_tests'], _row['new_cases'])
+        for _row in rows
+    ] == [
+        ('100', ''),
+        ('50', '5'),
+        ('80', ''),
+    ]
+
+
+
+def test_parse_csv_columnar_batches(tmp_path, monkeypatch):
+    """Testing parse_csv with the columnar engine across several batches"""
+    monkeypatch.setattr('bc19live.utils.CSV_COLUMNAR_BATCH_SIZE', 2)
+
+    # Blank lines are skipped, and short rows are padded.
+    content = SOURCE_CSV + (
+        b'\n'
+        b'2021-01-04,Butte,1,10\n'
+        b'2021-01-04,Yuba\n'
+        b'\n'
+        b'2021-01-05,Butte,2,20,y\n'
+    )
+    info = _make_info(columns=[
+        {
+            'name': 'date',
+            'type': 'date',
+            'format': '%Y-%m-%d',
+        },
+        {
+            'name': 'cases',
+            'type': 'int_or_blank',
+        },
+        {'name': 'note'},
+    ])
+
+    rows_results = _parse(tmp_path,
+                          dict(info, csv=dict(info['csv'], engine='rows')),
+                          content=content)
+    columnar_results = _parse(tmp_path,
+                              dict(info,
+                                   csv=dict(info['csv'], engine='columnar')),
+                              content=content)
+
+    assert rows_results == columnar_results
+    assert [
+        (_row['date'], _row['cases'], _row['note'])
+        for _row in columnar_results[0]
+    ] == [
+        ('2021-01-01', '5', ''),
+        ('2021-01-02', '', 'x'),
+        ('2021-01-03', '12', 'a, b'),
+        ('2021-01-04', '1', ''),
+        ('2021-01-05', '2', 'y'),
+    ]
+
+
+
+def test_compile_csv_columns():
+    """Testing compile_csv_columns"""
+    column_plan = compile_csv_columns({
+        'default_type': 'int_or_blank',
+        'columns': [
+            {
+                'name': 'date',
+                'type': 'date',
+                'format': '%m/%d/%Y',
+            },
+            {
+                'name': 'total',
+                'source_column': 'count',
+            },
+            {
+                'name': 'note',
+                'type': 'string',
+                'default': 'none',
+            },
+            {
+                'name': 'label',
+                'type': 'string',
+                'transform_func': (
+                    lambda row, src_name, data_type, col_info:
+                        '%s-%s' % (row['count'], data_type)
+                ),
+            },
+            {
+                'name': 'new_count',
+                'source_column': 'count',
+                'type': 'delta',
+                'delta_from': 'count',
+            },
+        ],
+    })
+
+    assert [_name for _name, _convert in column_plan] == [
+        'date',
+        'total',
+        'note',
+        'label',
+        'new_count',
+    ]
+
+    prev_row = {'date': '01/01/2021', 'count': '4'}
+    row = {'date': '01/02/2021', 'count': '1,234'}
+
+    assert [
+        _convert(row, prev_row, 1)
+        for _name, _convert in column_plan
+    ] == ['2021-01-02', 1234, 'none', '1,234-string', 1234]
+    assert [
+        _convert(row, None, 0)
+        for _name, _convert in column_plan
+    ][-1] == ''
+
+    with pytest.raises(ParseError, match='Got DIV/0 for row=3'):
+        column_plan[1][1]({'count': '#DIV/0!'}, None, 3)
+
+    with pytest.raises(ParseError, match='Missing column in CSV file: count'):
+        column_plan[1][1]({}, None, 0)
+
+
+def test_compile_csv_filters():
+    """Testing compile_csv_filters"""
+    filters = compile_csv_filters({
+        'filters': [
+            ('county', 'not in', ('Yuba', 'Glenn')),
+            ('date', '<', '2021-01-03'),
+        ],
+    })
+
+    assert [
+        (_src_name, _test('Butte', _value), _test('Yuba', _value))
+        for _src_name, _test, _value in filters
+    ] == [
+        ('county', True, False),
+        ('date', False, False),
+    ]
+
+    with pytest.raises(ParseError, match='Unsupported operator "~="'):
+        compile_csv_filters({
+            'filters': [
+                ('county', '~=', 'Butte'),
+            ],
+        })
+
+
+@pytest.mark.parametrize('engine', ['rows', 'columnar'])
+def test_parse_csv_filter_missing_column(tmp_path, engine):
+    """Testing parse_csv with a filter on a missing column"""
+    with pytest.raises(ParseError,
+                       match='Missing column in CSV file: state'):
+        _parse(tmp_path,
+               _make_info(engine=engine,
+                          filters=[
+                              ('state', '==', 'California'),
+                          ]))
+
+
+
+@pytest.mark.parametrize('sort_by', [None, 'date'])
+def test_parse_csv_add_missing_dates(tmp_path, sort_by):
+    """Testing parse_csv with add_missing_dates"""
+    rows, row_count = _parse(
+        tmp_path,
+        _make_info(sort_by=sort_by,
+                   add_missing_dates=True),
+        content=(
+            b'date,county,cases,tests,note\n'
+            b'2021-01-01,Butte,5,50,\n'
+            b'2021-01-04,Butte,12,100,\n'
+            b'2021-01-05,Butte,7,70,\n'
+        ))
+
+    assert [
+        (_row['date'], _row['cases'], _row['total_tests'])
+        for _row in rows
+    ] == [
+        ('2021-01-01', '5', '50'),
+        ('2021-01-02', '', ''),
+        ('2021-01-03', '', ''),
+        ('2021-01-04', '12', '100'),
+        ('2021-01-05', '7', '70'),
+    ]
+    assert row_count == 5
+
+
+def test_parse_csv_validators(tmp_path):
+    """Testing parse_csv with a failing validator"""
+    info = _make_info(validators=[
+        lambda results: (results[0]['date'] == '2020-01-01',
+                         'Bad start date'),
+    ])
+
+    with pytest.raises(ParseError, match='Bad start date'):
+        _parse(tmp_path, info)
+
+    assert not os.path.exists(os.path.join(tmp_path, 'test.csv'))
+
+
+def test_parse_csv_streamed_validators(tmp_path):
+    """Testing parse_csv with validators on streamed rows"""
+    info = _make_info(sort_by=None, validators=[
+        lambda results: len(results) == 3 and results[-1]['cases'] == '',
+        # Validators see every parsed row.
+        lambda results: [
+            _row['total_tests']
+            for _row in results
+        ] == [100, 50, 80],
+    ])
+
+    rows, row_count = _parse(tmp_path, info)
+
+    assert row_count == 3
+
+    info = _make_info(sort_by=None, validators=[
+        lambda results: (all(_row['cases'] for _row in results),
+                         'Missing cases'),
+    ])
+
+    with pytest.raises(ParseError, match='Missing cases'):
+        _parse(tmp_path, info)
+
+    # The file written before is left in place.
+    with open(os.path.join(tmp_path, 'test.csv'), 'r', newline='') as fp:
+        assert list(csv.DictReader(fp)) == rows
+
+
+def test_parse_csv_merge_existing(tmp_path):
+    """Testing parse_csv with merge_existing and replace_from"""
+    info = _make_info(
+        filters=[],
+        validators=[
+            # Merged rows keep their parsed types.
+            lambda results: all(
+                isinstance(_row['total_tests'], int)
+                for _row in results
+            ),
+        ])
+
+    _parse(tmp_path, info,
+           content=(
+               b'date,county,cases,tests,note\n'
+               b'2021-01-01,Butte,1,10,\n'
+               b'2021-01-02,Butte,2,20,\n'
+           ))
+    rows, row_count = _parse(tmp_path, info,
+                             content=(
+                                 b'date,county,cases,tests,note\n'
+                                 b'2021-01-03,Butte,4,40,\n'
+                                 b'2021-01-02,Butte,3,30,\n'
+                             ),
+                             merge_existing=True,
+                             replace_from=('date', '2021-01-02'))
+
+    assert [
+        (_row['date'], _row['total_tests'])
+        for _row in rows
+    ] == [
+        ('2021-01-01', '10'),
+        ('2021-01-02', '30'),
+        ('2021-01-03', '40'),
+    ]
+    assert row_count == 3
+
+
+def test_prefilter_csv_lines():
+    """Testing prefilter_csv_lines"""
+    lines = [
+        b'2021-01-01,Butte,1',
+        b'2021-01-01,Yuba,2',
+        b'2021-01-02,Yuba,"multi',
+        b'line Butte"',
+        b'2021-01-02,Glenn,"multi',
+        b'line"',
+        b'2021-01-03,Butte,3',
+    ]
+
+    assert list(prefilter_csv_lines(iter(lines), b'Butte')) == [
+        b'2021-01-01,Butte,1',
+        b'2021-01-02,Yuba,"multi',
+        b'line Butte"',
+        b'2021-01-03,Butte,3',
+    ]
+    assert list(prefilter_csv_lines(iter(lines), ['Glenn', 'Yuba'])) == \
+        lines[1:6]
+
+
+def test_csv_row_writer():
+    """Testing CSVRowWriter"""
+    class TypedWriter(object):
+        def __init__(self):
+            self.rows = []
+
+        def writerow(self, row):
+            self.rows.append(row)
+
+    fp = io.StringIO()
+    typed_writer = TypedWriter()
+    writer = CSVRowWriter(['a', 'b'], [csv.writer(fp)], [typed_writer])
+    writer.writeheader()
+    writer.writerow({'a': 1})
+    writer.writerow({'a': 2, 'b': 'x\ny'})
+
+    assert fp.getvalue() == 'a,b\r\n1,\r\n2,"x\ny"\r\n'
+    assert typed_writer.rows == [[1, ''], [2, 'x\ny']]
+    assert writer.row_count == 2
+
+    with pytest.raises(ValueError, match="'c'"):
+        writer.writerow({'a': 3, 'c': 4})
+
+    assert writer.row_count == 2
@@ -0,0 +1,136 @@
+import os
+
+from bc19live.daemon import (get_affected_datasets, get_local_source_mtimes,
+                             run_daemon)
+
+
+DATASETS = [
+    {
+        'filename': 'a.csv',
+        'format': 'csv',
+    },
+    {
+        'filename': 'b.json',
+        'format': 'json',
+        'local_source': {
+            'filename': 'a.csv',
+            'format': 'csv',
+        },
+    },
+    {
+        'filename': 'c.json',
+        'format': 'json',
+        'local_source': {
+            'filename': 'b.json',
+            'format': 'json',
+        },
+    },
+    {
+        'filename': 'd.json',
+        'format': 'json',
+        'local_source': {
+            'filename': 'e.csv',
+            'format': 'csv',
+        },
+    },
+]
+
+
+def _write_file(tmp_path, data_format, filename, mtime):
+    """Write a data file with a given modification time.
+
+    Args:
+        tmp_path (pathlib.Path):
+            The data directory.
+
+        data_format (str):
+            The format directory for the file.
+
+        filename (str):
+            The filename of the file.
+
+        mtime (int):
+            The modification time to set, in seconds.
+    """
+    path = os.path.join(tmp_path, data_format, filename)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    with open(path, 'w') as fp:
+        fp.write('[]')
+
+    os.utime(path, (mtime, mtime))
+
+
+def test_get_local_source_mtimes(tmp_path, monkeypatch):
+    """Testing get_local_source_mtimes"""
+    monkeypatch.setattr('bc19live.daemon.DATA_DIR', str(tmp_path))
+    _write_file(tmp_path, 'csv', 'a.csv', 1000)
+
+    assert get_local_source_mtimes(DATASETS) == {
+        'a.csv': 1000 * 10 ** 9,
+        'b.json': None,
+        'e.csv': None,
+    }
+
+
+def test_get_affected_datasets():
+    """Testing get_affected_datasets"""
+    assert [
+        _info['filename']
+        for _info in get_affected_datasets(DATASETS, {'a.csv'})
+    ] == ['b.json', 'c.json']
+    assert [
+        _info['filename']
+        for _info in get_affected_datasets(DATASETS, {'e.csv'})
+    ] == ['d.json']
+    assert get_affected_datasets(DATASETS, {'x.csv'}) == []
+
+
+def test_run_daemon(tmp_path, monkeypatch, capsys):
+    """Testing run_daemon rebuilding on a schedule and on changes"""
+    monkeypatch.setattr('bc19live.daemon.DATA_DIR', str(tmp_path))
+    _write_file(tmp_path, 'csv', 'a.csv', 1000)
+
+    now = [0]
+    builds = []
+    actions = [
+        # Nothing has changed.
+        lambda: None,
+
+        # A local source was changed outside of a rebuild.
+        lambda: _write_file(tmp_path, 'csv', 'e.csv', 2000),
+
+        # The full rebuild interval has passed.
+        lambda: now.__setitem__(0, 100),
+    ]
+
+    def _sleep(seconds):
+        assert seconds == 5
+
+        if not actions:
+            raise KeyboardInterrupt
+
+        actions.pop(0)()
+
+    monkeypatch.setattr('time.monotonic', lambda: now[0])
+    monkeypatch.setattr('time.sleep', _sleep)
+
+    run_daemon(DATASETS,
+               lambda datasets: builds.append([
+                   _info['filename']
+                   for _info in datasets
+               ]),
+               interval=100,
+               poll_interval=5)
+
+    all_filenames = ['a.csv', 'b.json', 'c.json', 'd.json']
+
+    assert builds == [
+        all_filenames,
+        ['d.json'],
+        all_filenames,
+    ]
+
+    output = capsys.readouterr()
+    assert 'Local sources changed: e.csv' in output.out
+    assert 'Stopping the dataset daemon.' in output.err
@@ -0,0 +1,185 @@
+import json
+import os
+import threading
+
+import bc19live.utils
+from bc19live.daterows import DateRowStore
+from bc19live.utils import (add_or_update_json_date_row,
+                            collect_output_rows, get_date_row_store,
+                            materialize_json_date_rows, use_date_row_store)
+
+
+def test_add_rows(date_row_store, tmp_path):
+    """Testing DateRowStore.add_rows"""
+    filename = os.path.join(tmp_path, 'a.json')
+
+    assert date_row_store.get_last_date(filename) is None
+
+    date_row_store.add_rows(filename, [
+        {'date': '2021-01-01', 'value': 1},
+        {'date': '2021-01-02', 'value': 2},
+    ])
+    date_row_store.add_rows(filename,
+                            [{'date': '2021-01-02', 'value': 3}],
+                            replace_last=True)
+
+    assert date_row_store.get_last_date(filename) == '2021-01-02'
+    assert date_row_store.get_row_count(filename) == 2
+    assert date_row_store.needs_write(filename)
+    assert [
+        json.loads(_row_text)
+        for _row_text in date_row_store.iter_row_texts(filename)
+    ] == [
+        {'date': '2021-01-01', 'value': 1},
+        {'date': '2021-01-02', 'value': 3},
+    ]
+
+
+def test_get_row_count_unmanaged(date_row_store, tmp_path):
+    """Testing DateRowStore.get_row_count with a dataset not in the store"""
+    filename = os.path.join(tmp_path, 'a.json')
+
+    assert date_row_store.get_row_count(filename) is None
+    assert not date_row_store.needs_write(filename)
+
+
+def test_materialize(date_row_store, tmp_path):
+    """Testing add_or_update_json_date_row and materialize_json_date_rows"""
+    filename = os.path.join(tmp_path, 'a.json')
+
+    add_or_update_json_date_row(filename, {
+        'date': '2021-01-01',
+        'value': 1,
+    })
+    add_or_update_json_date_row(filename, {
+        'date': '2021-01-04',
+        'value': 4,
+    })
+
+    output_rows = {}
+
+    with collect_output_rows(output_rows):
+        assert materialize_json_date_rows(filename)
+
+    with open(filename, 'r') as fp:
+        dates = json.load(fp)['dates']
+
+    # Missing dates are filled in.
+    assert [_row['date'] for _row in dates] == [
+        '2021-01-01',
+        '2021-01-02',
+        '2021-01-03',
+        '2021-01-04',
+    ]
+    assert dates[1] == {'date': '2021-01-02'}
+    assert dates[3]['value'] == 4
+    assert output_rows == {
+        filename: 4,
+    }
+
+    # Nothing has changed, so there's nothing to write, but the row count is
+    # still recorded.
+    output_rows = {}
+
+    with collect_output_rows(output_rows):
+        assert not materialize_json_date_rows(filename)
+
+    assert output_rows == {
+        filename: 4,
+    }
+
+
+def test_materialize_unmanaged(date_row_store, tmp_path):
+    """Testing materialize_json_date_rows with a dataset not in the store"""
+    filename = os.path.join(tmp_path, 'a.json')
+    output_rows = {}
+
+    with collect_output_rows(output_rows):
+        assert not materialize_json_date_rows(filename)
+
+    assert output_rows == {}
+    assert not os.path.exists(filename)
+
+
+def test_external_changes(date_row_store, tmp_path):
+    """Testing DateRowStore re-importing a JSON file changed outside of it"""
+    filename = os.path.join(tmp_path, 'a.json')
+
+    add_or_update_json_date_row(filename, {
+        'date': '2021-01-01',
+        'value': 1,
+    })
+    materialize_json_date_rows(filename)
+
+    with open(filename, 'w') as fp:
+        json.dump(
+            {
+                'dates': [
+                    {'date': '2021-02-01', 'value': 10},
+                    {'date': '2021-02-02', 'value': 20},
+                ],
+            },
+            fp)
+
+    assert date_row_store.get_last_date(filename) == '2021-02-02'
+    assert date_row_store.get_row_count(filename) == 2
+
+    os.unlink(filename)
+
+    assert date_row_store.get_last_date(filename) is None
+    assert date_row_store.get_row_count(filename) == 0
+
+
+def test_external_changes_with_pending_rows(date_row_store, tmp_path,
+                                            capsys):
+    """Testing DateRowStore with a JSON file changed with pending rows"""
+    filename = os.path.join(tmp_path, 'a.json')
+
+    add_or_update_json_date_row(filename, {
+        'date': '2021-01-01',
+        'value': 1,
+    })
+    materialize_json_date_rows(filename)
+    add_or_update_json_date_row(filename, {
+        'date': '2021-01-02',
+        'value': 2,
+    })
+
+    assert date_row_store.needs_write(filename)
+
+    with open(filename, 'w') as fp:
+        json.dump(
+            {
+                'dates': [
+                    {'date': '2021-02-01', 'value': 10},
+                    {'date': '2021-02-02', 'value': 20},
+                    {'date': '2021-02-03', 'value': 30},
+                ],
+            },
+            fp)
+
+    # The file wins over the pending rows, which would otherwise overwrite
+    # the changes when written.
+    assert date_row_store.get_last_date(filename) == '2021-02-03'
+    assert date_row_store.get_row_count(filename) == 3
+    assert not date_row_store.needs_write(filename)
+    assert 'Discarding those rows' in capsys.readouterr().err
+
+
+def test_use_date_row_store(date_row_store):
+    """Testing use_date_row_store only affecting the current thread"""
+    other_stores = []
+    thread = threading.Thread(
+        target=lambda: other_stores.append(get_date_row_store()))
+    thread.start()
+    thread.join()
+
+    assert get_date_row_store() is date_row_store
+    assert other_stores == [bc19live.utils.date_row_store]
+
+    other_store = DateRowStore(date_row_store.filename)
+
+    with use_date_row_store(other_store):
+        assert get_date_row_store() is other_store
+
+    assert get_date_row_store() is date_row_store
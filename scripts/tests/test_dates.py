@@ -0,0 +1,122 @@
+from datetime import datetime
+
+import pytest
+
+from bc19live.errors import ParseError
+from bc19live.utils import (_parse_known_date, build_missing_date_rows,
+                            format_date, format_date_ordinal,
+                            get_date_ordinal, iter_missing_date_rows,
+                            parse_csv_value, parse_date)
+
+
+@pytest.mark.parametrize('value,date_format', [
+    ('2021-01-02', '%Y-%m-%d'),
+    ('01/02/2021', '%m/%d/%Y'),
+    ('2021-01-02T03:04:05.000Z', '%Y-%m-%dT%H:%M:%S.%fZ'),
+    ('2021-01-02T03:04:05.123456Z', '%Y-%m-%dT%H:%M:%S.%fZ'),
+    ('2021-01-02T03:04:05.5Z', '%Y-%m-%dT%H:%M:%S.%fZ'),
+])
+def test_parse_known_date(value, date_format):
+    """Testing _parse_known_date matching strptime"""
+    assert _parse_known_date(value, date_format) == \
+        datetime.strptime(value, date_format)
+
+
+@pytest.mark.parametrize('value,date_format', [
+    # These aren't zero-padded, or are in other formats, and are left for
+    # strptime().
+    ('2021-1-2', '%Y-%m-%d'),
+    ('1/2/2021', '%m/%d/%Y'),
+    ('2021-01-02T03:04:05Z', '%Y-%m-%dT%H:%M:%S.%fZ'),
+    ('Jan 2, 2021', '%b %d, %Y'),
+    ('2021-01-02', '%b %d, %Y'),
+    ('２０２１-01-02', '%Y-%m-%d'),
+    # This is invalid, and left for strptime() to report.
+    ('2021-02-30', '%Y-%m-%d'),
+])
+def test_parse_known_date_unhandled(value, date_format):
+    """Testing _parse_known_date with values left for strptime"""
+    assert _parse_known_date(value, date_format) is None
+
+
+def test_parse_date():
+    """Testing parse_date"""
+    parse_date.cache_clear()
+
+    assert parse_date('1/2/2021', '%m/%d/%Y') == datetime(2021, 1, 2)
+    assert parse_date('Jan 2, 2021', '%b %d, %Y') == datetime(2021, 1, 2)
+    assert parse_date('01/02/2021', '%m/%d/%Y') == datetime(2021, 1, 2)
+    assert parse_date('01/02/2021', '%m/%d/%Y') == datetime(2021, 1, 2)
+
+    # Repeated dates are only parsed once.
+    assert parse_date.cache_info().hits == 1
+
+    with pytest.raises(ValueError):
+        parse_date('2021-02-30', '%Y-%m-%d')
+
+    with pytest.raises(ValueError):
+        parse_date('01/02/2021', '%Y-%m-%d')
+
+
+def test_date_ordinals():
+    """Testing get_date_ordinal and format_date_ordinal"""
+    day = get_date_ordinal('2021-02-28')
+
+    assert get_date_ordinal('03/01/2021', '%m/%d/%Y') == day + 1
+    assert format_date_ordinal(day) == '2021-02-28'
+    assert format_date_ordinal(day + 1) == '2021-03-01'
+    assert format_date(datetime(2021, 3, 1, 12, 30)) == '2021-03-01'
+
+
+def test_parse_csv_value_date():
+    """Testing parse_csv_value with dates"""
+    col_info = {
+        'format': '%Y-%m-%dT%H:%M:%S.%fZ',
+    }
+
+    assert parse_csv_value('2021-01-02T03:04:05.000Z',
+                           data_type='date',
+                           col_info=col_info) == '2021-01-02'
+
+    with pytest.raises(ParseError,
+                       match='Unable to parse date "2021-01-02" using '
+                             'format'):
+        parse_csv_value('2021-01-02',
+                        data_type='date',
+                        col_info=col_info)
+
+
+def test_build_missing_date_rows():
+    """Testing build_missing_date_rows"""
+    rows = build_missing_date_rows(cur_date=datetime(2021, 3, 2),
+                                   latest_date=datetime(2021, 2, 27),
+                                   date_field='day',
+                                   empty_row_data={'cases': None})
+
+    assert rows == [
+        {'day': '2021-02-28', 'cases': None},
+        {'day': '2021-03-01', 'cases': None},
+    ]
+
+    # Each row can be changed without affecting the others.
+    rows[0]['cases'] = 1
+
+    assert rows[1]['cases'] is None
+
+    assert build_missing_date_rows(cur_date=datetime(2021, 3, 2),
+                                   latest_date=datetime(2021, 3, 1)) == []
+
+    with pytest.raises(AssertionError):
+        build_missing_date_rows(cur_date=datetime(2021, 3, 1),
+                                latest_date=datetime(2021, 3, 2))
+
+
+def test_iter_missing_date_rows():
+    """Testing iter_missing_date_rows generating rows as needed"""
+    day = get_date_ordinal('2021-01-01')
+    rows = iter_missing_date_rows(cur_day=day + 1000000,
+                                  latest_day=day)
+
+    assert next(rows) == {'date': '2021-01-02'}
+    assert next(rows) == {'date': '2021-01-03'}
+    assert list(iter_missing_date_rows(cur_day=day, latest_day=day)) == []
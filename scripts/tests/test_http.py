@@ -0,0 +1,230 @@
+import os
+
+import pytest
+
+from bc19live.buildcache import hash_bytes
+from bc19live.http import (StreamedBody, build_response, http_get,
+                           iter_response_lines, normalize_url)
+
+
+@pytest.mark.parametrize('url,expected', [
+    ('https://example.com/a.csv', 'https://example.com/a.csv'),
+    ('https://example.com/a?b=1&_=1612345678',
+     'https://example.com/a?b=1'),
+    ('https://example.com/a?_=1612345678&b=1',
+     'https://example.com/a?b=1'),
+    ('https://example.com/a?_=1612345678', 'https://example.com/a'),
+    ('https://example.com/a?b=1&_b=2', 'https://example.com/a?b=1&_b=2'),
+])
+def test_normalize_url(url, expected):
+    """Testing normalize_url"""
+    assert normalize_url(url) == expected
+
+
+def test_build_response():
+    """Testing build_response"""
+    response = build_response('https://example.com/a.csv',
+                              b'a,b\n',
+                              headers={
+                                  'Content-Type': 'text/csv; charset=utf-8',
+                              })
+
+    assert response.status_code == 200
+    assert response.url == 'https://example.com/a.csv'
+    assert response.content == b'a,b\n'
+    assert response.encoding == 'utf-8'
+    assert response.headers['content-type'] == 'text/csv; charset=utf-8'
+
+    # Headers aren't shared between responses.
+    response = build_response('https://example.com/b.csv', b'')
+    response.headers['ETag'] = '"abc"'
+
+    assert 'ETag' not in build_response('https://example.com/c.csv',
+                                        b'').headers
+
+
+def test_http_get_caches_body(standin_server, http_cache_store):
+    """Testing http_get storing response bodies for HTTP 304 responses"""
+    url = 'https://example.com/a.csv'
+    standin_server.store.add_response(
+        'GET',
+        url,
+        build_response(url,
+                       b'a,b\n1,2\n',
+                       headers={
+                           'Content-Type': 'text/csv; charset=utf-8',
+                           'Last-Modified': 'Fri, 01 Jan 2021 00:00:00 GMT',
+                       }))
+
+    response = http_get(url)[1]
+
+    assert response.status_code == 200
+    assert not getattr(response, 'from_cache', False)
+
+    entry = http_cache_store.get(url)
+
+    assert entry['etag']
+    assert entry['last_modified'] == 'Fri, 01 Jan 2021 00:00:00 GMT'
+    assert entry['fetched'] > 0
+    assert entry['has_body']
+    assert entry['headers'] == {
+        'Content-Type': 'text/csv; charset=utf-8',
+    }
+
+    # The server reports that nothing has changed, and the cached body is
+    # attached so the parser can be re-run.
+    response = http_get(url)[1]
+
+    assert response.status_code == 304
+    assert response.from_cache
+    assert response.content == b'a,b\n1,2\n'
+    assert response.encoding == 'utf-8'
+
+    # The body is fetched again if the cache isn't allowed.
+    response = http_get(url, allow_cache=False)[1]
+
+    assert response.status_code == 200
+    assert response.content == b'a,b\n1,2\n'
+    assert standin_server.request_count == 3
+
+
+
+def test_http_get_volatile_query_args(standin_server, http_cache_store):
+    """Testing http_get caching URLs with cache-busting query arguments"""
+    for url in ('https://example.com/a?b=1&_=1',
+                'https://example.com/a?b=1&_=2'):
+        standin_server.store.add_response('GET', url,
+                                          build_response(url, b'a,b\n'))
+
+    assert http_get('https://example.com/a?b=1&_=1')[1].status_code == 200
+    assert http_cache_store.get('https://example.com/a?b=1')['etag']
+
+    response = http_get('https://example.com/a?b=1&_=2')[1]
+
+    assert response.status_code == 304
+    assert response.from_cache
+    assert response.content == b'a,b\n'
+
+
+def test_http_get_unchanged_body(standin_server, http_cache_store):
+    """Testing http_get with an unchanged body and no conditional requests"""
+    url = 'https://example.com/a.csv'
+    standin_server.store.add_response('GET', url,
+                                      build_response(url, b'a,b\n1,2\n'))
+
+    response = http_get(url)[1]
+
+    assert not getattr(response, 'from_cache', False)
+
+    # Simulate a server that doesn't support conditional requests.
+    http_cache_store.set(url, dict(http_cache_store.get(url),
+                                   etag=None,
+                                   last_modified=None))
+    response = http_get(url)[1]
+
+    assert response.status_code == 200
+    assert response.from_cache
+
+    # A changed body isn't reported as coming from the cache.
+    http_cache_store.set(url, dict(http_cache_store.get(url), etag=None))
+    standin_server.store.add_response('GET', url,
+                                      build_response(url, b'a,b\n3,4\n'))
+    response = http_get(url)[1]
+
+    assert response.status_code == 200
+    assert not getattr(response, 'from_cache', False)
+    assert http_cache_store.get(url)['body_hash'] == \
+        hash_bytes(b'a,b\n3,4\n')
+
+
+def test_http_get_offline(standin_server, monkeypatch):
+    """Testing http_get in offline mode"""
+    url = 'https://example.com/a.csv'
+    standin_server.store.add_response('GET', url,
+                                      build_response(url, b'a,b\n1,2\n'))
+    http_get(url)
+
+    monkeypatch.setattr('bc19live.http._offline', True)
+
+    response = http_get(url)[1]
+
+    assert response.status_code == 200
+    assert response.from_cache
+    assert response.content == b'a,b\n1,2\n'
+
+    response = http_get(url, stream=True)[1]
+
+    assert list(iter_response_lines(response)) == [b'a,b', b'1,2']
+
+    response = http_get('https://example.com/b.csv')[1]
+
+    assert response.status_code == 504
+
+    # Nothing was fetched once offline.
+    assert standin_server.request_count == 1
+
+
+def test_http_get_stream(standin_server, http_cache_store):
+    """Testing http_get with a streamed, compressed response"""
+    url = 'https://example.com/a.csv'
+    content = b''.join(
+        b'2021-01-%02d,%d\r\n' % (_i % 28 + 1, _i)
+        for _i in range(1000)
+    )
+    standin_server.store.add_response('GET', url,
+                                      build_response(url, content))
+
+    response = http_get(url, stream=True)[1]
+
+    # The body is large enough to be sent compressed.
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert not http_cache_store.get(url)['has_body']
+
+    lines = list(iter_response_lines(response))
+
+    assert len(lines) == 1000
+    assert lines[0] == b'2021-01-01,0'
+    assert lines[-1] == b'2021-01-20,999'
+    assert response.streamed_body.size == len(content)
+    assert response.streamed_body.hash == hash_bytes(content)
+
+    # The body was stored in the cache as it was read.
+    entry = http_cache_store.get(url)
+
+    assert entry['has_body']
+    assert entry['body_hash'] == hash_bytes(content)
+
+    response = http_get(url, stream=True)[1]
+
+    assert response.status_code == 304
+    assert response.from_cache
+    assert response.streamed_body.hash == hash_bytes(content)
+    assert list(iter_response_lines(response)) == lines
+
+
+def test_http_get_stream_incomplete(standin_server, http_cache_store,
+                                    tmp_path):
+    """Testing http_get with a streamed response that isn't fully read"""
+    url = 'https://example.com/a.csv'
+    standin_server.store.add_response('GET', url,
+                                      build_response(url, b'a\n' * 5000))
+
+    response = http_get(url, stream=True)[1]
+    lines = iter_response_lines(response)
+    next(lines)
+    lines.close()
+
+    assert not http_cache_store.get(url)['has_body']
+    assert os.listdir(os.path.join(tmp_path, 'http-cache-bodies')) == []
+
+
+def test_streamed_body_iter_lines():
+    """Testing StreamedBody.iter_lines with lines split across chunks"""
+    class Response(object):
+        def iter_content(self, chunk_size):
+            return iter([b'a,b\r', b'\n1,', b'2\n\n3,4\r\n5,6'])
+
+    body = StreamedBody(Response())
+
+    assert list(body.iter_lines()) == [b'a,b', b'1,2', b'', b'3,4', b'5,6']
+    assert body.size == 18
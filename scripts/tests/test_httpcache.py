@@ -0,0 +1,192 @@
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from bc19live.buildcache import get_build_key, is_build_current, record_build
+from bc19live.httpcache import HTTPCacheStore
+
+
+def _set_entries(filename, prefix, count):
+    """Set entries in a HTTP cache store.
+
+    Args:
+        filename (str):
+            The path to the database file.
+
+        prefix (str):
+            The prefix for each URL.
+
+        count (int):
+            The number of entries to set.
+    """
+    store = HTTPCacheStore(filename)
+
+    try:
+        for i in range(count):
+            store.set('%s/%d.csv' % (prefix, i), {
+                'etag': '"%d"' % i,
+            })
+    finally:
+        store.close()
+
+
+def test_set_and_get(http_cache_store):
+    """Testing HTTPCacheStore.set and get"""
+    http_cache_store.set('https://example.com/a.csv', {
+        'etag': '"abc"',
+        'headers': {
+            'Content-Type': 'text/csv',
+        },
+        'has_body': True,
+    })
+
+    entry = http_cache_store.get('https://example.com/a.csv')
+
+    assert entry['etag'] == '"abc"'
+    assert entry['last_modified'] is None
+    assert entry['headers'] == {
+        'Content-Type': 'text/csv',
+    }
+    assert entry['has_body'] is True
+    assert http_cache_store.get('https://example.com/b.csv') is None
+
+
+def test_update(http_cache_store):
+    """Testing HTTPCacheStore.update"""
+    http_cache_store.set('https://example.com/a.csv', {
+        'etag': '"abc"',
+    })
+    http_cache_store.update('https://example.com/a.csv',
+                            fetched=123,
+                            body_hash='1234')
+    http_cache_store.update('https://example.com/b.csv', fetched=456)
+
+    entry = http_cache_store.get('https://example.com/a.csv')
+
+    assert entry['etag'] == '"abc"'
+    assert entry['fetched'] == 123
+    assert entry['body_hash'] == '1234'
+    assert http_cache_store.get('https://example.com/b.csv') is None
+
+
+def test_append_state(http_cache_store):
+    """Testing HTTPCacheStore.get_append_state and set_append_state"""
+    assert http_cache_store.get_append_state('a.csv') is None
+
+    http_cache_store.set_append_state('a.csv', {
+        'last_seen': '2021-01-01',
+    })
+    assert http_cache_store.get_append_state('a.csv') == {
+        'last_seen': '2021-01-01',
+    }
+
+    http_cache_store.set_append_state('a.csv', None)
+    assert http_cache_store.get_append_state('a.csv') is None
+
+
+def test_shared_store(http_cache_store):
+    """Testing HTTPCacheStore entries being visible to other stores"""
+    other_store = HTTPCacheStore(http_cache_store.filename)
+
+    try:
+        http_cache_store.set('https://example.com/a.csv', {
+            'etag': '"abc"',
+        })
+
+        assert other_store.get('https://example.com/a.csv')['etag'] == \
+            '"abc"'
+    finally:
+        other_store.close()
+
+
+def test_shared_between_processes(http_cache_store):
+    """Testing HTTPCacheStore with several processes writing at once"""
+    with ProcessPoolExecutor(
+            max_workers=2,
+            mp_context=multiprocessing.get_context('spawn')) as pool:
+        futures = [
+            pool.submit(_set_entries, http_cache_store.filename,
+                        'https://%s.example.com' % _host, 100)
+            for _host in ('a', 'b')
+        ]
+
+        for future in futures:
+            future.result()
+
+    # No process overwrote the other's entries.
+    for host in ('a', 'b'):
+        for i in range(100):
+            assert http_cache_store.get(
+                'https://%s.example.com/%d.csv' % (host, i))['etag'] == \
+                '"%d"' % i
+
+
+def test_import_json(http_cache_store, tmp_path):
+    """Testing HTTPCacheStore.import_json keeps existing entries"""
+    json_filename = os.path.join(tmp_path, 'http-cache.json')
+
+    with open(json_filename, 'w') as fp:
+        json.dump(
+            {
+                'https://example.com/a.csv': {
+                    'etag': '"old"',
+                },
+                'https://example.com/b.csv': {
+                    'etag': '"imported"',
+                },
+            },
+            fp)
+
+    http_cache_store.set('https://example.com/a.csv', {
+        'etag': '"new"',
+    })
+    http_cache_store.import_json(json_filename)
+
+    assert http_cache_store.get('https://example.com/a.csv')['etag'] == \
+        '"new"'
+    assert http_cache_store.get('https://example.com/b.csv')['etag'] == \
+        '"imported"'
+
+    # The file is only imported once.
+    http_cache_store.set('https://example.com/b.csv', {
+        'etag': '"changed"',
+    })
+    http_cache_store.import_json(json_filename)
+
+    assert http_cache_store.get('https://example.com/b.csv')['etag'] == \
+        '"changed"'
+
+
+def test_build_keys(http_cache_store):
+    """Testing get_build_key with is_build_current and record_build"""
+    def parser(**kwargs):
+        pass
+
+    info = {
+        'filename': 'a.csv',
+        'format': 'csv',
+    }
+    key = get_build_key(info, parser, {
+        'main': '1234',
+    })
+
+    assert key == get_build_key(dict(info), parser, {
+        'main': '1234',
+    })
+    assert key != get_build_key(info, parser, {
+        'main': '5678',
+    })
+    assert key != get_build_key(dict(info, tsv=False), parser, {
+        'main': '1234',
+    })
+    assert get_build_key(info, parser, {
+        'main': None,
+    }) is None
+
+    assert not is_build_current('a.csv', key)
+
+    record_build('a.csv', key)
+
+    assert is_build_current('a.csv', key)
+    assert not is_build_current('a.csv', None)
@@ -0,0 +1,214 @@
+import csv
+import os
+
+from bc19live.http import build_response
+from bc19live.incremental import can_fetch_appended
+from bc19live.main import _build_dataset
+from bc19live.report import RunReport
+from bc19live.utils import parse_csv
+
+
+URL = 'https://example.com/facilities.csv'
+
+SOURCE_CSV = (
+    b'date,county,cases\n'
+    b'2021-01-01,Butte,1\n'
+    b'2021-01-01,Yuba,2\n'
+    b'2021-01-02,Butte,3\n'
+)
+
+
+class _Registry(object):
+    """A registry containing a single dataset.
+
+    Attributes:
+        info (dict):
+            The dataset information.
+    """
+
+    def __init__(self, info):
+        """Initialize the registry.
+
+        Args:
+            info (dict):
+                The dataset information.
+        """
+        self.info = info
+
+    def get_dataset(self, filename):
+        """Return the dataset information.
+
+        Args:
+            filename (str):
+                The filename of the dataset.
+
+        Returns:
+            dict:
+            The dataset information.
+        """
+        assert filename == self.info['filename']
+
+        return self.info
+
+
+def _make_info(**csv_info):
+    """Return dataset information for an append-only dataset.
+
+    Args:
+        **csv_info (dict):
+            Options to set in the CSV parser options.
+
+    Returns:
+        dict:
+        The dataset information.
+    """
+    return {
+        'filename': 'facilities.csv',
+        'format': 'csv',
+        'append_only': True,
+        'tsv': False,
+        'url': URL,
+        'csv': dict({
+            'filters': [
+                ('county', '==', 'Butte'),
+            ],
+            'sort_by': 'date',
+            'columns': [
+                {
+                    'name': 'date',
+                    'type': 'date',
+                    'format': '%Y-%m-%d',
+                },
+                {
+                    'name': 'cases',
+                    'type': 'int',
+                },
+            ],
+        }, **csv_info),
+    }
+
+
+def _build(server, tmp_path, content):
+    """Serve new content for the dataset, and build it.
+
+    Args:
+        server (bc19live.standin.StandInServer):
+            The stand-in server.
+
+        tmp_path (pathlib.Path):
+            The data directory.
+
+        content (bytes):
+            The content to serve.
+
+    Returns:
+        tuple:
+        A 2-tuple containing the HTTP status codes for the build, and the
+        rows written to the dataset.
+    """
+    info = _make_info()
+    report = RunReport()
+    server.store.add_response('GET', URL, build_response(URL, content))
+
+    _build_dataset(
+        {
+            'filename': info['filename'],
+            'format': info['format'],
+        },
+        _Registry(info),
+        report=report)
+
+    with open(os.path.join(tmp_path, 'csv', info['filename']), 'r') as fp:
+        rows = [
+            (_row['date'], _row['cases'])
+            for _row in csv.DictReader(fp)
+        ]
+
+    return report.datasets[info['filename']].http_statuses, rows
+
+
+def test_can_fetch_appended():
+    """Testing can_fetch_appended"""
+    info = _make_info()
+
+    assert can_fetch_appended(info, parse_csv)
+    assert not can_fetch_appended(info, lambda **kwargs: None)
+    assert not can_fetch_appended(dict(info, append_only=False), parse_csv)
+    assert not can_fetch_appended(dict(info, stream=True), parse_csv)
+    assert not can_fetch_appended(_make_info(end_if=lambda row: False),
+                                  parse_csv)
+
+    info = _make_info()
+    info['csv']['columns'].append({
+        'name': 'new_cases',
+        'source_column': 'cases',
+        'type': 'delta',
+        'delta_from': 'cases',
+    })
+
+    assert not can_fetch_appended(info, parse_csv)
+
+
+def test_build_appended(standin_server, date_row_store, tmp_path,
+                        monkeypatch):
+    """Testing building an append-only dataset incrementally"""
+    monkeypatch.setattr('bc19live.main.DATA_DIR', str(tmp_path))
+
+    statuses, rows = _build(standin_server, tmp_path, SOURCE_CSV)
+
+    assert statuses == [200]
+    assert rows == [
+        ('2021-01-01', '1'),
+        ('2021-01-02', '3'),
+    ]
+
+    # Only the appended rows are fetched. An incomplete last line is left
+    # for the next fetch.
+    content = SOURCE_CSV + (
+        b'2021-01-03,Yuba,4\n'
+        b'2021-01-04,Butte,5\n'
+        b'2021-01-05,Butte,'
+    )
+    statuses, rows = _build(standin_server, tmp_path, content)
+
+    assert statuses == [206]
+    assert rows == [
+        ('2021-01-01', '1'),
+        ('2021-01-02', '3'),
+        ('2021-01-04', '5'),
+    ]
+
+    content += b'6\n'
+    statuses, rows = _build(standin_server, tmp_path, content)
+
+    assert statuses == [206]
+    assert rows[-1] == ('2021-01-05', '6')
+
+    # Nothing has changed since.
+    statuses, rows = _build(standin_server, tmp_path, content)
+
+    assert statuses == [304]
+    assert len(rows) == 4
+
+
+def test_build_appended_prefix_changed(standin_server, date_row_store,
+                                       tmp_path, monkeypatch):
+    """Testing building an append-only dataset after earlier rows change"""
+    monkeypatch.setattr('bc19live.main.DATA_DIR', str(tmp_path))
+
+    _build(standin_server, tmp_path, SOURCE_CSV)
+
+    # A row that was already processed has changed, so the whole file is
+    # fetched and parsed again.
+    statuses, rows = _build(
+        standin_server,
+        tmp_path,
+        SOURCE_CSV.replace(b'2021-01-02,Butte,3', b'2021-01-02,Butte,7') +
+        b'2021-01-03,Butte,8\n')
+
+    assert statuses == [206, 200]
+    assert rows == [
+        ('2021-01-01', '1'),
+        ('2021-01-02', '7'),
+        ('2021-01-03', '8'),
+    ]
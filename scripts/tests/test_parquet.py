@@ -0,0 +1,129 @@
+import csv
+import os
+import subprocess
+import sys
+
+import pytest
+
+from bc19live.utils import get_output_filenames, safe_open_csv_for_write
+
+
+PARQUET_COLUMNS = [
+    ('date', 'date'),
+    ('cases', 'int_or_blank'),
+    ('note', None),
+]
+
+
+def _write(tmp_path, rows):
+    """Write rows to CSV, TSV, and Parquet files.
+
+    Args:
+        tmp_path (pathlib.Path):
+            The directory to write the files to.
+
+        rows (list of dict):
+            The rows to write.
+
+    Returns:
+        str:
+        The filename of the CSV file.
+    """
+    filename = os.path.join(tmp_path, 'test.csv')
+
+    with safe_open_csv_for_write(filename,
+                                 fieldnames=['date', 'cases', 'note'],
+                                 parquet_columns=PARQUET_COLUMNS) as writer:
+        writer.writeheader()
+
+        for row in rows:
+            writer.writerow(row)
+
+    return filename
+
+
+def _read_csv(filename):
+    """Return the rows in a CSV file.
+
+    Args:
+        filename (str):
+            The filename of the CSV file.
+
+    Returns:
+        list of dict:
+        The rows.
+    """
+    with open(filename, 'r', newline='') as fp:
+        return list(csv.DictReader(fp))
+
+
+def test_pyarrow_imported_lazily():
+    """Testing that pyarrow isn't imported until Parquet files are written"""
+    subprocess.check_call(
+        [
+            sys.executable,
+            '-c',
+            'import sys\n'
+            'import bc19live.main\n'
+            'assert "pyarrow" not in sys.modules\n',
+        ],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def test_write_without_pyarrow(tmp_path, monkeypatch):
+    """Testing writing files for a Parquet dataset without pyarrow"""
+    monkeypatch.setattr('bc19live.utils._get_pyarrow', lambda: None)
+
+    filename = _write(tmp_path, [
+        {'date': '2021-01-01', 'cases': 1, 'note': 'a'},
+    ])
+
+    assert sorted(os.listdir(tmp_path)) == ['test.csv', 'test.tsv']
+    assert get_output_filenames(filename, {'parquet': True}) == [filename]
+
+
+def test_write_parquet(tmp_path):
+    """Testing writing a Parquet file alongside CSV files"""
+    pyarrow_parquet = pytest.importorskip('pyarrow.parquet')
+
+    filename = _write(tmp_path, [
+        {'date': '2021-01-01', 'cases': 1, 'note': 'a'},
+        {'date': '2021-01-02', 'cases': '', 'note': None},
+    ])
+    parquet_filename = os.path.join(tmp_path, 'test.parquet')
+
+    assert get_output_filenames(filename, {'parquet': True}) == [
+        filename,
+        parquet_filename,
+    ]
+
+    table = pyarrow_parquet.read_table(parquet_filename)
+
+    assert [str(_field.type) for _field in table.schema] == [
+        'date32[day]',
+        'int64',
+        'string',
+    ]
+    assert table.column('cases').to_pylist() == [1, None]
+    assert table.column('note').to_pylist() == ['a', None]
+
+
+def test_write_parquet_with_error(tmp_path, capsys):
+    """Testing that Parquet errors don't stop CSV files from being written"""
+    pytest.importorskip('pyarrow')
+
+    _write(tmp_path, [
+        {'date': '2021-01-01', 'cases': 1, 'note': 'a'},
+    ])
+
+    assert os.path.exists(os.path.join(tmp_path, 'test.parquet'))
+
+    filename = _write(tmp_path, [
+        {'date': '2021-01-01', 'cases': 1, 'note': 'a'},
+        {'date': '2021-01-02', 'cases': 'many', 'note': 'b'},
+    ])
+
+    # The out-of-date Parquet file is removed, rather than left behind.
+    assert sorted(os.listdir(tmp_path)) == ['test.csv', 'test.tsv']
+    assert [_row['cases'] for _row in _read_csv(filename)] == ['1', 'many']
+    assert 'Unable to write column "cases"' in capsys.readouterr().err
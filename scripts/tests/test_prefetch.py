@@ -0,0 +1,141 @@
+import threading
+import time
+
+from bc19live.http import HTTPPrefetcher, build_response, http_get
+
+
+def _add_responses(server, urls):
+    """Record a response for each URL on a stand-in server.
+
+    Args:
+        server (bc19live.standin.StandInServer):
+            The stand-in server.
+
+        urls (list of str):
+            The URLs to record responses for. The payload for each is the
+            URL.
+    """
+    for url in urls:
+        server.store.add_response(
+            'GET',
+            url,
+            build_response(url,
+                           url.encode('utf-8'),
+                           headers={
+                               'Content-Type': 'text/plain',
+                           }))
+
+
+def test_prefetch(standin_server):
+    """Testing HTTPPrefetcher fetching each URL once"""
+    urls = [
+        'https://a.example.com/1.csv',
+        'https://b.example.com/2.csv',
+    ]
+    _add_responses(standin_server, urls)
+
+    prefetcher = HTTPPrefetcher()
+    prefetcher.start([
+        (urls[0], True),
+        (urls[1], True),
+        (urls[0], True),
+    ])
+
+    try:
+        for url in (urls[1], urls[0], urls[0]):
+            session, response, duration = prefetcher.get(url)
+
+            assert response.status_code == 200
+            assert response.content == url.encode('utf-8')
+            assert duration >= 0
+
+        # Each listing can only claim the response once.
+        assert prefetcher.get(urls[0]) is None
+        assert prefetcher.get('https://c.example.com/3.csv') is None
+    finally:
+        prefetcher.shutdown()
+
+    assert standin_server.request_count == 2
+
+
+def test_prefetch_allow_cache(standin_server):
+    """Testing HTTPPrefetcher with caching disallowed by one listing"""
+    url = 'https://a.example.com/1.csv'
+    _add_responses(standin_server, [url])
+    http_get(url)
+
+    prefetcher = HTTPPrefetcher()
+    prefetcher.start([(url, True)])
+
+    try:
+        response = prefetcher.get(url)[1]
+    finally:
+        prefetcher.shutdown()
+
+    assert response.status_code == 304
+    assert response.from_cache
+    assert response.content == url.encode('utf-8')
+
+    prefetcher = HTTPPrefetcher()
+    prefetcher.start([(url, True), (url, False)])
+
+    try:
+        response = prefetcher.get(url)[1]
+    finally:
+        prefetcher.shutdown()
+
+    assert response.status_code == 200
+
+
+def test_prefetch_per_host_limit(monkeypatch):
+    """Testing HTTPPrefetcher limiting concurrent fetches per host"""
+    lock = threading.Lock()
+    active = {}
+    max_active = {}
+
+    def _http_get(url, allow_cache=True):
+        host = url.split('/')[2]
+
+        with lock:
+            active[host] = active.get(host, 0) + 1
+            max_active[host] = max(max_active.get(host, 0), active[host])
+
+        time.sleep(0.05)
+
+        with lock:
+            active[host] -= 1
+
+        return None, build_response(url, b'')
+
+    monkeypatch.setattr('bc19live.http.http_get', _http_get)
+
+    prefetcher = HTTPPrefetcher(max_workers=4, max_per_host=1)
+    prefetcher.start([
+        ('https://a.example.com/%d.csv' % _i, True)
+        for _i in range(3)
+    ] + [
+        ('https://b.example.com/1.csv', True),
+    ])
+    prefetcher.shutdown()
+
+    assert max_active == {
+        'a.example.com': 1,
+        'b.example.com': 1,
+    }
+
+
+def test_prefetch_with_error(monkeypatch):
+    """Testing HTTPPrefetcher with a URL that fails to fetch"""
+    def _http_get(url, allow_cache=True):
+        raise IOError('Oops')
+
+    monkeypatch.setattr('bc19live.http.http_get', _http_get)
+
+    prefetcher = HTTPPrefetcher()
+    prefetcher.start([('https://a.example.com/1.csv', True)])
+
+    try:
+        # The caller will fetch the URL itself.
+        assert prefetcher.get('https://a.example.com/1.csv') is None
+    finally:
+        prefetcher.shutdown()
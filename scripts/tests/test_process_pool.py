@@ -0,0 +1,123 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from bc19live.errors import ParseError
+from bc19live.main import _parse_local_sources_in_process
+from bc19live.utils import record_output_rows
+
+
+def _raise_parse_error():
+    """Raise a parse error with row context.
+
+    Raises:
+        bc19live.errors.ParseError:
+            The error.
+    """
+    raise ParseError('Bad row', row={'date': '2021-01-01'})
+
+
+def _copy_parser(info, in_fp, out_filename):
+    """Copy a local source to the output file.
+
+    Args:
+        info (dict):
+            The dataset information.
+
+        in_fp (file):
+            The local source.
+
+        out_filename (str):
+            The filename of the file to write.
+
+    Returns:
+        int:
+        The number of lines copied.
+    """
+    lines = in_fp.read().splitlines()
+
+    with open(out_filename, 'w') as fp:
+        fp.write(''.join('%s\n' % _line for _line in lines))
+
+    record_output_rows(out_filename, len(lines) - 1)
+
+    return len(lines)
+
+
+class _Registry(object):
+    """A registry containing a single dataset.
+
+    Attributes:
+        module_names (list of str):
+            The module names the registry was created with.
+    """
+
+    def __init__(self, module_names):
+        """Initialize the registry.
+
+        Args:
+            module_names (list of str):
+                The module names to load datasets from.
+        """
+        self.module_names = module_names
+
+    def get_dataset(self, filename):
+        """Return the dataset information.
+
+        Args:
+            filename (str):
+                The filename of the dataset.
+
+        Returns:
+            dict:
+            The dataset information.
+        """
+        assert self.module_names == ['copy']
+
+        return {
+            'filename': filename,
+            'format': 'csv',
+            'parser': _copy_parser,
+            'cpu_bound': True,
+            'local_source': {
+                'filename': 'a.csv',
+                'format': 'csv',
+            },
+        }
+
+
+def test_parse_error_from_process():
+    """Testing ParseError keeping its row when raised in a worker process"""
+    with ProcessPoolExecutor(
+            max_workers=1,
+            mp_context=multiprocessing.get_context('spawn')) as pool:
+        with pytest.raises(ParseError) as excinfo:
+            pool.submit(_raise_parse_error).result()
+
+    assert str(excinfo.value) == 'Bad row'
+    assert excinfo.value.row == {'date': '2021-01-01'}
+
+
+def test_parse_local_sources_in_process(date_row_store, tmp_path,
+                                        monkeypatch):
+    """Testing _parse_local_sources_in_process"""
+    os.mkdir(os.path.join(tmp_path, 'csv'))
+
+    with open(os.path.join(tmp_path, 'csv', 'a.csv'), 'w') as fp:
+        fp.write('a,b\n1,2\n3,4\n')
+
+    monkeypatch.setattr('bc19live.main.DATA_DIR', str(tmp_path))
+    monkeypatch.setattr('bc19live.main.DatasetRegistry', _Registry)
+
+    result, output_rows = _parse_local_sources_in_process('copy', 'b.csv')
+    out_filename = os.path.join(tmp_path, 'csv', 'b.csv')
+
+    assert result == 3
+    assert output_rows == {
+        out_filename: 2,
+    }
+
+    with open(out_filename, 'r') as fp:
+        assert fp.read() == 'a,b\n1,2\n3,4\n'
@@ -0,0 +1,79 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from bc19live.registry import DATASET_MANIFEST, DatasetRegistry
+
+
+def test_manifest_matches_modules():
+    """Testing DATASET_MANIFEST matching every dataset module"""
+    registry = DatasetRegistry(list(DATASET_MANIFEST))
+
+    for entry in registry.entries:
+        info = registry.get_dataset(entry['filename'])
+
+        assert info['filename'] == entry['filename']
+        assert info['format'] == entry['format']
+
+
+def test_registry():
+    """Testing DatasetRegistry"""
+    registry = DatasetRegistry(['timeline', 'bc19_dashboard'])
+
+    assert list(registry.entries_by_module) == ['timeline', 'bc19_dashboard']
+    assert [_entry['filename'] for _entry in registry.entries] == [
+        'timeline.csv',
+        'timeline.json',
+        'bc19-dashboard.json',
+    ]
+    assert registry.filenames == {
+        'timeline.csv',
+        'timeline.json',
+        'bc19-dashboard.json',
+    }
+    assert registry.get_module_name('timeline.json') == 'timeline'
+
+    with pytest.raises(KeyError):
+        registry.get_dataset('wastewater-levels.csv')
+
+    with pytest.raises(KeyError):
+        DatasetRegistry(['not_a_module'])
+
+
+def test_registry_imports_lazily():
+    """Testing DatasetRegistry only importing the modules that are used"""
+    output = subprocess.check_output(
+        [
+            sys.executable,
+            '-c',
+            'import sys\n'
+            'from bc19live.registry import DATASET_MANIFEST, '
+            'DatasetRegistry\n'
+            'registry = DatasetRegistry(list(DATASET_MANIFEST))\n'
+            'registry.get_dataset("wastewater-levels.csv")\n'
+            'print(sorted(_name for _name in sys.modules\n'
+            '             if _name.startswith("bc19live.datasets.")))\n',
+        ],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        text=True)
+
+    assert output.strip() == "['bc19live.datasets.wastewater']"
+
+
+def test_registry_with_manifest_mismatch():
+    """Testing DatasetRegistry with a manifest that doesn't match a module"""
+    registry = DatasetRegistry(
+        ['wastewater'],
+        manifest={
+            'wastewater': [
+                {
+                    'filename': 'wastewater-levels.csv',
+                    'format': 'csv',
+                },
+            ],
+        })
+
+    with pytest.raises(ValueError, match='"wastewater"'):
+        registry.get_dataset('wastewater-levels.csv')
@@ -0,0 +1,94 @@
+import io
+import json
+import os
+
+from bc19live.http import build_response
+from bc19live.report import DatasetReport, RunReport
+
+
+def test_dataset_report(tmp_path):
+    """Testing DatasetReport"""
+    out_filename = os.path.join(tmp_path, 'a.csv')
+
+    with open(out_filename, 'w') as fp:
+        fp.write('a,b\n1,2\n')
+
+    report = DatasetReport('a.csv')
+    report.start()
+    report.add_response(build_response('https://example.com/', b'1234'),
+                        0.5)
+    report.add_response(build_response('https://example.com/', b'',
+                                       status_code=304),
+                        0.25)
+    report.parse_time = 0.125
+    report.add_output(out_filename, rows=1)
+    report.finish('written')
+
+    data = report.to_dict()
+
+    assert data['duration'] >= 0
+    del data['duration']
+
+    assert data == {
+        'filename': 'a.csv',
+        'status': 'written',
+        'http_time': 0.75,
+        'http_statuses': [200, 304],
+        'response_bytes': 4,
+        'parse_time': 0.125,
+        'rows': 1,
+        'output_bytes': 8,
+    }
+
+
+def test_dataset_report_missing_output(tmp_path):
+    """Testing DatasetReport.add_output with a missing file"""
+    report = DatasetReport('a.csv')
+    report.add_output(os.path.join(tmp_path, 'a.csv'), rows=1)
+
+    assert report.rows is None
+    assert report.output_bytes is None
+
+
+def test_run_report(tmp_path):
+    """Testing RunReport"""
+    report = RunReport()
+
+    for filename, duration, status in (('a.csv', 1.0, 'written'),
+                                       ('b.json', 3.0, 'up-to-date'),
+                                       ('c.csv', 2.0, 'error')):
+        dataset_report = report.add_dataset(filename)
+        dataset_report.finish(status)
+        dataset_report.duration = duration
+
+    report.finish()
+
+    report_filename = os.path.join(tmp_path, 'report.json')
+    report.write(report_filename)
+
+    with open(report_filename, 'r') as fp:
+        data = json.load(fp)
+
+    # Datasets are listed longest first.
+    assert [
+        (_dataset['filename'], _dataset['status'])
+        for _dataset in data['datasets']
+    ] == [
+        ('b.json', 'up-to-date'),
+        ('c.csv', 'error'),
+        ('a.csv', 'written'),
+    ]
+
+    fp = io.StringIO()
+    report.print_table(fp)
+    lines = fp.getvalue().splitlines()
+
+    assert lines[0].split() == ['Dataset', 'Status', 'HTTP', 'HTTP', 's',
+                                'Resp', 'bytes', 'Parse', 's', 'Rows', 'Out',
+                                'bytes', 'Total', 's']
+    assert [_line.split()[0] for _line in lines[2:5]] == [
+        'b.json',
+        'c.csv',
+        'a.csv',
+    ]
+    assert lines[-1].startswith('Total time: ')
@@ -0,0 +1,159 @@
+import threading
+
+import pytest
+
+from bc19live.scheduler import (build_dependency_graph, get_local_sources,
+                                get_named_local_sources, run_scheduled)
+
+
+DATASETS = [
+    {
+        'filename': 'c.json',
+        'format': 'json',
+        'local_sources': {
+            'a': {
+                'filename': 'a.csv',
+                'format': 'csv',
+            },
+            'b': {
+                'filename': 'b.json',
+                'format': 'json',
+            },
+        },
+    },
+    {
+        'filename': 'a.csv',
+        'format': 'csv',
+    },
+    {
+        'filename': 'b.json',
+        'format': 'json',
+        'local_source': {
+            'filename': 'a.csv',
+            'format': 'csv',
+        },
+    },
+    {
+        'filename': 'd.csv',
+        'format': 'csv',
+    },
+]
+
+
+def test_get_local_sources():
+    """Testing get_local_sources and get_named_local_sources"""
+    assert get_local_sources(DATASETS[0]) == [
+        {'filename': 'a.csv', 'format': 'csv'},
+        {'filename': 'b.json', 'format': 'json'},
+    ]
+    assert get_local_sources(DATASETS[1]) == []
+    assert get_local_sources({
+        'filename': 'c.json',
+        'format': 'json',
+        'depends': [('csv', 'a.csv')],
+    }) == [
+        {'filename': 'a.csv', 'format': 'csv'},
+    ]
+
+    assert get_named_local_sources(DATASETS[2]) == {
+        'main': {'filename': 'a.csv', 'format': 'csv'},
+    }
+    assert list(get_named_local_sources(DATASETS[0])) == ['a', 'b']
+
+
+def test_build_dependency_graph():
+    """Testing build_dependency_graph"""
+    assert build_dependency_graph(DATASETS) == {
+        'a.csv': set(),
+        'b.json': {'a.csv'},
+        'c.json': {'a.csv', 'b.json'},
+        'd.csv': set(),
+    }
+
+
+def test_build_dependency_graph_outside_list():
+    """Testing build_dependency_graph with dependencies outside the list"""
+    assert build_dependency_graph([
+        DATASETS[2],
+        {
+            # A different format isn't a dependency.
+            'filename': 'a.csv',
+            'format': 'json',
+        },
+    ]) == {
+        'a.csv': set(),
+        'b.json': set(),
+    }
+
+
+def test_build_dependency_graph_with_cycle():
+    """Testing build_dependency_graph with a dependency cycle"""
+    with pytest.raises(ValueError, match='Dependency cycle'):
+        build_dependency_graph([
+            {
+                'filename': 'a.csv',
+                'format': 'csv',
+                'local_source': {
+                    'filename': 'b.csv',
+                    'format': 'csv',
+                },
+            },
+            {
+                'filename': 'b.csv',
+                'format': 'csv',
+                'local_source': {
+                    'filename': 'a.csv',
+                    'format': 'csv',
+                },
+            },
+        ])
+
+
+def test_run_scheduled_serial():
+    """Testing run_scheduled with one worker"""
+    built = []
+
+    run_scheduled(DATASETS,
+                  lambda info: built.append(info['filename']),
+                  max_workers=1)
+
+    # Ready datasets are started in list order.
+    assert built == ['a.csv', 'd.csv', 'b.json', 'c.json']
+
+
+def test_run_scheduled_concurrent():
+    """Testing run_scheduled building independent datasets concurrently"""
+    barrier = threading.Barrier(2, timeout=5)
+    lock = threading.Lock()
+    built = []
+
+    def _build(info):
+        if info['filename'] in ('a.csv', 'd.csv'):
+            # These only both get past this if they run at the same time.
+            barrier.wait()
+
+        with lock:
+            built.append(info['filename'])
+
+    run_scheduled(DATASETS, _build, max_workers=4)
+
+    assert sorted(built[:2]) == ['a.csv', 'd.csv']
+    assert built.index('b.json') < built.index('c.json')
+
+
+def test_run_scheduled_with_error(capsys):
+    """Testing run_scheduled continuing after a dataset fails"""
+    built = []
+
+    def _build(info):
+        if info['filename'] == 'a.csv':
+            raise Exception('Oops')
+
+        built.append(info['filename'])
+
+    run_scheduled(DATASETS, _build, max_workers=1)
+
+    # Dependents are still built once their dependencies have finished.
+    assert built == ['d.csv', 'b.json', 'c.json']
+    assert 'Unexpected error while building a.csv: Oops' in \
+        capsys.readouterr().err
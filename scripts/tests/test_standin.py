@@ -0,0 +1,208 @@
+import gzip
+import json
+
+import requests
+
+import bc19live.http
+from bc19live.http import HTTPSession, _rewrite_url, build_response
+from bc19live.standin import GZIP_MIN_SIZE, get_url_map
+
+
+def _get(server, path, **kwargs):
+    """Send a request directly to the stand-in server.
+
+    Args:
+        server (bc19live.standin.StandInServer):
+            The stand-in server.
+
+        path (str):
+            The request path.
+
+        **kwargs (dict):
+            Keyword arguments for the request.
+
+    Returns:
+        requests.Response:
+        The response.
+    """
+    return requests.request(kwargs.pop('method', 'GET'),
+                            '%s%s' % (server.base_url, path),
+                            **kwargs)
+
+
+def test_get_url_map(monkeypatch):
+    """Testing get_url_map with URL rewriting"""
+    url_map = get_url_map('http://127.0.0.1:8780/')
+
+    assert url_map == {
+        'https://': 'http://127.0.0.1:8780/https/',
+        'http://': 'http://127.0.0.1:8780/http/',
+    }
+
+    monkeypatch.setitem(bc19live.http._http_settings, 'url_map',
+                        dict(url_map, **{
+                            'https://example.com/a/': 'http://localhost/a/',
+                        }))
+
+    # The longest matching prefix wins.
+    assert _rewrite_url('https://example.com/a/b.csv') == \
+        'http://localhost/a/b.csv'
+    assert _rewrite_url('https://example.com/b.csv') == \
+        'http://127.0.0.1:8780/https/example.com/b.csv'
+    assert _rewrite_url('ftp://example.com/b.csv') == \
+        'ftp://example.com/b.csv'
+
+
+def test_standin_conditional_requests(standin_server):
+    """Testing StandInServer with conditional requests"""
+    standin_server.store.add_response(
+        'GET',
+        'https://example.com/a.csv',
+        build_response('https://example.com/a.csv', b'a,b\n1,2\n',
+                       headers={
+                           'Last-Modified': 'Fri, 01 Jan 2021 00:00:00 GMT',
+                       }))
+
+    response = _get(standin_server, '/https/example.com/a.csv')
+
+    assert response.status_code == 200
+    assert response.content == b'a,b\n1,2\n'
+
+    etag = response.headers['ETag']
+
+    response = _get(standin_server, '/https/example.com/a.csv',
+                    headers={
+                        'If-None-Match': etag,
+                    })
+
+    assert response.status_code == 304
+    assert response.content == b''
+
+    response = _get(standin_server, '/https/example.com/a.csv',
+                    headers={
+                        'If-Modified-Since': 'Fri, 01 Jan 2021 00:00:00 GMT',
+                    })
+
+    assert response.status_code == 304
+
+    response = _get(standin_server, '/https/example.com/a.csv',
+                    method='HEAD')
+
+    assert response.status_code == 200
+    assert response.content == b''
+    assert response.headers['Content-Length'] == '8'
+
+
+def test_standin_byte_ranges(standin_server):
+    """Testing StandInServer with byte ranges"""
+    standin_server.store.add_response(
+        'GET',
+        'https://example.com/a.csv',
+        build_response('https://example.com/a.csv', b'a,b\n1,2\n'))
+
+    response = _get(standin_server, '/https/example.com/a.csv',
+                    headers={
+                        'Range': 'bytes=4-',
+                    })
+
+    assert response.status_code == 206
+    assert response.content == b'1,2\n'
+    assert response.headers['Content-Range'] == 'bytes 4-7/8'
+
+    response = _get(standin_server, '/https/example.com/a.csv',
+                    headers={
+                        'Range': 'bytes=-2',
+                    })
+
+    assert response.status_code == 206
+    assert response.content == b'2\n'
+
+    response = _get(standin_server, '/https/example.com/a.csv',
+                    headers={
+                        'Range': 'bytes=8-',
+                    })
+
+    assert response.status_code == 416
+    assert response.headers['Content-Range'] == 'bytes */8'
+
+
+def test_standin_gzip(standin_server):
+    """Testing StandInServer compressing large payloads"""
+    content = b'a,b\n' + b'1,2\n' * GZIP_MIN_SIZE
+    standin_server.store.add_response(
+        'GET',
+        'https://example.com/a.csv',
+        build_response('https://example.com/a.csv', content))
+
+    response = _get(standin_server, '/https/example.com/a.csv',
+                    headers={
+                        'Accept-Encoding': 'gzip',
+                    },
+                    stream=True)
+
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(response.raw.read()) == content
+
+    response = _get(standin_server, '/https/example.com/a.csv',
+                    headers={
+                        'Accept-Encoding': 'identity',
+                    })
+
+    assert 'Content-Encoding' not in response.headers
+    assert response.content == content
+
+
+def test_standin_missing_responses(standin_server):
+    """Testing StandInServer with unrecorded requests"""
+    assert _get(standin_server, '/https/example.com/a.csv').status_code == \
+        404
+    assert _get(standin_server, '/example.com/a.csv').status_code == 404
+
+    # Incremental CKAN queries return no new records.
+    response = _get(standin_server,
+                    '/https/data.chhs.ca.gov/api/3/action/'
+                    'datastore_search_sql?sql=SELECT')
+
+    assert response.status_code == 200
+    assert json.loads(response.content) == {
+        'success': True,
+        'result': {
+            'fields': [],
+            'records': [],
+        },
+    }
+
+
+def test_standin_injected_errors(standin_server):
+    """Testing StandInServer injecting errors"""
+    standin_server.store.add_response(
+        'GET',
+        'https://example.com/a.csv',
+        build_response('https://example.com/a.csv', b'a,b\n1,2\n'))
+    standin_server.error_rate = 1
+
+    response = _get(standin_server, '/https/example.com/a.csv')
+
+    assert response.status_code == 503
+    assert standin_server.error_count == 1
+
+    standin_server.error_rate = 0
+
+    assert _get(standin_server, '/https/example.com/a.csv').status_code == \
+        200
+    assert standin_server.request_count == 2
+
+
+def test_standin_host_controls(standin_server):
+    """Testing requests through StandInServer limited by the upstream host"""
+    for url in ('https://a.example.com/a.csv',
+                'https://b.example.com/b.csv'):
+        standin_server.store.add_response('GET', url,
+                                          build_response(url, b'a\n'))
+
+        assert HTTPSession().get(url).content == b'a\n'
+
+    assert set(bc19live.http._host_controls) == {
+        'a.example.com',
+        'b.example.com',
+    }
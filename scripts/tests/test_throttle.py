@@ -0,0 +1,217 @@
+import pytest
+import requests
+
+from bc19live.errors import HostUnavailableError
+from bc19live.http import (CIRCUIT_FAILURE_THRESHOLD, HTTPSession,
+                           _get_retry_delay, _http_settings, build_response)
+from bc19live.throttle import CircuitBreaker, TokenBucket
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Return a fake clock, used in place of the real one.
+
+    Sleeping advances the clock instead of waiting.
+
+    Args:
+        monkeypatch (pytest.MonkeyPatch):
+            The fixture used to replace the clock.
+
+    Returns:
+        dict:
+        The clock state, containing the current time in ``now`` and the
+        list of sleep durations in ``sleeps``.
+    """
+    state = {
+        'now': 1000.0,
+        'sleeps': [],
+    }
+
+    def _sleep(seconds):
+        state['sleeps'].append(seconds)
+        state['now'] += seconds
+
+    monkeypatch.setattr('time.monotonic', lambda: state['now'])
+    monkeypatch.setattr('time.sleep', _sleep)
+
+    return state
+
+
+@pytest.fixture
+def fake_requests(monkeypatch):
+    """Replace HTTP requests with a list of canned results.
+
+    Args:
+        monkeypatch (pytest.MonkeyPatch):
+            The fixture used to replace requests.
+
+    Returns:
+        dict:
+        The state, containing the canned ``results`` (responses or
+        exceptions) to return in order, and the list of keyword arguments
+        for each request in ``requests``.
+    """
+    state = {
+        'results': [],
+        'requests': [],
+    }
+
+    def _request(session, method, url, *args, **kwargs):
+        state['requests'].append(kwargs)
+        result = state['results'].pop(0)
+
+        if isinstance(result, Exception):
+            raise result
+
+        return result
+
+    monkeypatch.setattr('requests.Session.request', _request)
+    monkeypatch.setattr('bc19live.http._http_settings',
+                        dict(_http_settings, max_retries=2, host_rate=0))
+    monkeypatch.setattr('bc19live.http._host_controls', {})
+
+    return state
+
+
+def test_token_bucket(clock):
+    """Testing TokenBucket limiting the request rate"""
+    bucket = TokenBucket(rate=10, capacity=2)
+
+    # The bucket starts full, allowing a burst.
+    bucket.acquire()
+    bucket.acquire()
+
+    assert clock['sleeps'] == []
+
+    bucket.acquire()
+
+    assert clock['sleeps'] == [pytest.approx(0.1)]
+
+
+def test_token_bucket_unlimited(clock):
+    """Testing TokenBucket with no limit"""
+    bucket = TokenBucket(rate=0, capacity=1)
+
+    for i in range(10):
+        bucket.acquire()
+
+    assert clock['sleeps'] == []
+
+
+def test_circuit_breaker(clock):
+    """Testing CircuitBreaker opening and closing"""
+    breaker = CircuitBreaker(host='example.com',
+                             failure_threshold=2,
+                             reset_timeout=10)
+    breaker.before_request()
+    breaker.record_failure()
+    breaker.before_request()
+    breaker.record_failure()
+
+    with pytest.raises(HostUnavailableError, match='example.com'):
+        breaker.before_request()
+
+    # A single trial request is allowed through after the timeout.
+    clock['now'] += 10
+    breaker.before_request()
+
+    with pytest.raises(HostUnavailableError):
+        breaker.before_request()
+
+    # The trial failed, so the circuit stays open.
+    breaker.record_failure()
+
+    with pytest.raises(HostUnavailableError):
+        breaker.before_request()
+
+    clock['now'] += 10
+    breaker.before_request()
+    breaker.record_success()
+    breaker.before_request()
+    breaker.before_request()
+
+
+def test_get_retry_delay(monkeypatch):
+    """Testing _get_retry_delay"""
+    monkeypatch.setattr('random.uniform', lambda a, b: b)
+
+    assert _get_retry_delay(0) == 1.0
+    assert _get_retry_delay(2) == 4.0
+    assert _get_retry_delay(10) == 30.0
+
+    response = build_response('https://example.com/', b'',
+                              status_code=429,
+                              headers={
+                                  'Retry-After': '20',
+                              })
+
+    monkeypatch.setattr('random.uniform', lambda a, b: a)
+
+    assert _get_retry_delay(0, response) == 20.0
+
+
+def test_session_retries(clock, fake_requests):
+    """Testing HTTPSession retrying temporary failures"""
+    fake_requests['results'] += [
+        requests.ConnectionError('Oops'),
+        build_response('https://example.com/', b'', status_code=503),
+        build_response('https://example.com/', b'done'),
+    ]
+
+    response = HTTPSession().get('https://example.com/')
+
+    assert response.content == b'done'
+    assert len(clock['sleeps']) == 2
+    assert fake_requests['requests'][0]['timeout'] == (
+        _http_settings['connect_timeout'],
+        _http_settings['read_timeout'],
+    )
+
+
+def test_session_retries_exhausted(clock, fake_requests):
+    """Testing HTTPSession with retries exhausted"""
+    fake_requests['results'] += [
+        build_response('https://example.com/', b'', status_code=503)
+        for _i in range(3)
+    ]
+
+    response = HTTPSession().get('https://example.com/')
+
+    assert response.status_code == 503
+    assert len(fake_requests['requests']) == 3
+
+    # Unsafe methods aren't retried.
+    fake_requests['results'].append(requests.ConnectionError('Oops'))
+
+    with pytest.raises(requests.ConnectionError):
+        HTTPSession().post('https://example.com/')
+
+
+def test_session_circuit_breaker(clock, fake_requests):
+    """Testing HTTPSession failing fast once a host is down"""
+    fake_requests['results'] += [
+        requests.Timeout('Oops')
+        for _i in range(CIRCUIT_FAILURE_THRESHOLD)
+    ]
+
+    session = HTTPSession()
+
+    with pytest.raises(requests.Timeout):
+        session.get('https://a.example.com/')
+
+    # The circuit opens while retrying the next request.
+    with pytest.raises(HostUnavailableError):
+        session.get('https://a.example.com/')
+
+    assert len(fake_requests['requests']) == CIRCUIT_FAILURE_THRESHOLD
+
+    with pytest.raises(HostUnavailableError):
+        session.get('https://a.example.com/')
+
+    assert len(fake_requests['requests']) == CIRCUIT_FAILURE_THRESHOLD
+
+    # Other hosts aren't affected.
+    fake_requests['results'].append(
+        build_response('https://b.example.com/', b'done'))
+
+    assert session.get('https://b.example.com/').content == b'done'